@@ -1,12 +1,18 @@
-import json
 import logging
+import time
 from pathlib import Path
 from models.spec import UserSpec
+from storage.llm_cache import llm_cache, make_cache_key
+from utils.metrics import record_llm_call, record_cache_hit
+from utils.structured_output import create_structured, extract_json, json_schema_for
 
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 logger = logging.getLogger(__name__)
 
-def run_analyst(client, model_name: str, goal: str, skill_level: str, hours_per_week: int) -> UserSpec:
+# Only the fields the model is asked to produce; the rest are request options
+SPEC_SCHEMA = json_schema_for(UserSpec, {"goal", "skill_level", "hours_per_week", "estimated_weeks"})
+
+async def run_analyst(client, model_name: str, goal: str, skill_level: str, hours_per_week: int, bypass_cache: bool = False) -> UserSpec:
     """
     Analyzes the user's learning goal and environment to determine a target scope.
     
@@ -19,6 +25,7 @@ def run_analyst(client, model_name: str, goal: str, skill_level: str, hours_per_
         goal: The user's primary learning objective.
         skill_level: The user's current experience level.
         hours_per_week: Commitment availability.
+        bypass_cache: Skip the response cache and always call the model.
         
     Returns:
         A UserSpec object containing the goal, estimated duration, and metadata.
@@ -30,34 +37,31 @@ def run_analyst(client, model_name: str, goal: str, skill_level: str, hours_per_
 
     user_message = f"Goal: {goal}\nSkill level: {skill_level}\nHours per week: {hours_per_week}"
     
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ],
-        max_tokens=4096,
-        response_format={"type": "json_object"}
-    )
-    content = response.choices[0].message.content
-    
-    if not content or not content.strip():
-        logger.error("Empty response from AI model.")
-        raise ValueError("Analyst Agent: Empty response from model")
-
-    # Handle model-specific wrapping or thinking blocks
-    if "<think>" in content:
-        content = content.split("</think>")[-1].strip()
-
-    if "```" in content:
-        content = content.split("```")[1]
-        if content.startswith("json"):
-            content = content[4:]
-        content = content.split("```")[0].strip()
+    cache_key = make_cache_key(model_name, system_prompt, user_message, max_tokens=4096, json=True)
+    content = None if bypass_cache else llm_cache.get(cache_key)
+    from_cache = content is not None
+    if from_cache:
+        logger.info("Analyst response served from cache")
+        record_cache_hit("analyst")
+    else:
+        started = time.perf_counter()
+        response = await create_structured(
+            client, model_name, "UserSpec", SPEC_SCHEMA,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            max_tokens=4096
+        )
+        record_llm_call("analyst", started, getattr(response, "usage", None))
+        content = response.choices[0].message.content
     
     try:
-        data = json.loads(content)
-        return UserSpec(**data)
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON Decode Error in Analyst: {e}")
+        data = extract_json(content)
+        spec = UserSpec(**data)
+        if not from_cache:
+            llm_cache.set(cache_key, content)
+        return spec
+    except ValueError as e:
+        logger.error(f"Analyst output failed validation: {e}")
         raise
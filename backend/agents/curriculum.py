@@ -1,13 +1,110 @@
+import asyncio
 import json
 import logging
+import time
 from pathlib import Path
+from typing import Callable, List
+from pydantic import ValidationError, create_model
 from models.spec import UserSpec
-from models.roadmap import Phase
+from models.roadmap import Phase, Topic
+from storage.llm_cache import llm_cache, make_cache_key
+from utils.metrics import record_llm_call, record_cache_hit
+from utils.json_stream import JsonArrayStreamParser
+from utils.structured_output import create_structured, extract_json, json_schema_for, describe_errors, repair_object
 
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 logger = logging.getLogger(__name__)
 
-def run_curriculum(client, model_name: str, spec: UserSpec, refinement_feedback: str = None) -> dict:
+CURRICULUM_SCHEMA = json_schema_for(create_model("Curriculum", title=(str, ...), phases=(List[Phase], ...)))
+
+async def _stream_completion(client, model_name: str, system_prompt: str, user_message: str,
+                             on_phase: Callable[[int, dict], None]) -> str:
+    """
+    Streams the curriculum response and hands every phase to on_phase as soon
+    as its JSON object is complete and valid. Returns the full response text.
+    """
+    started = time.perf_counter()
+    stream = await create_structured(
+        client, model_name, "Curriculum", CURRICULUM_SCHEMA,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ],
+        max_tokens=4096,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    parser = JsonArrayStreamParser("phases")
+    parts = []
+    index = 0
+    ttft = None
+    usage = None
+    async for chunk in stream:
+        # The usage summary arrives on a final chunk without choices
+        usage = getattr(chunk, "usage", None) or usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        if ttft is None:
+            ttft = time.perf_counter() - started
+        parts.append(delta)
+        for phase_data in parser.feed(delta):
+            if phase_data is None:
+                # Still counted, so later phases keep their final positions
+                logger.warning(f"Streamed phase {index} is not valid JSON")
+                index += 1
+                continue
+            try:
+                Phase(**phase_data)
+            except Exception as e:
+                # Left for the full validation below to report
+                logger.warning(f"Streamed phase {index} failed validation: {str(e)}")
+            else:
+                on_phase(index, phase_data)
+            index += 1
+    record_llm_call("curriculum", started, usage, ttft=ttft)
+    return "".join(parts)
+
+async def _repair_phase(client, model_name: str, system_prompt: str, user_message: str,
+                        index: int, phase_data, error: Exception) -> dict:
+    """
+    Fixes one invalid phase. When every error sits inside individual topics,
+    only those topics are re-requested; otherwise the whole phase is.
+    """
+    label = f"phase {index + 1}"
+    errors = error.errors() if isinstance(error, ValidationError) else []
+    topic_errors_only = isinstance(phase_data, dict) and errors and all(
+        len(e["loc"]) >= 2 and e["loc"][0] == "topics" and isinstance(e["loc"][1], int) for e in errors
+    )
+    if topic_errors_only:
+        topics = list(phase_data["topics"])
+
+        async def repair_topic(t: int):
+            topic_errors = "; ".join(
+                f"{'.'.join(str(p) for p in e['loc'][2:]) or 'topic'}: {e['msg']}" for e in errors if e["loc"][1] == t
+            )
+            topics[t] = await repair_object(
+                client, model_name, "curriculum", system_prompt, user_message,
+                Topic, topics[t], topic_errors, f"topic {t + 1} of {label}"
+            )
+
+        await asyncio.gather(*(repair_topic(t) for t in sorted({e["loc"][1] for e in errors})))
+        repaired = {**phase_data, "topics": topics}
+        try:
+            Phase(**repaired)
+            return repaired
+        except ValidationError as e:
+            error = e
+    message = describe_errors(error) if isinstance(error, ValidationError) else "phase must be a JSON object"
+    return await repair_object(
+        client, model_name, "curriculum", system_prompt, user_message,
+        Phase, phase_data, message, label, max_tokens=4096
+    )
+
+async def run_curriculum(client, model_name: str, spec: UserSpec, refinement_feedback: str = None,
+                         bypass_cache: bool = False, on_phase: Callable[[int, dict], None] = None) -> dict:
     """
     Generates a structured learning curriculum based on user goals and level.
     
@@ -19,12 +116,17 @@ def run_curriculum(client, model_name: str, spec: UserSpec, refinement_feedback:
         model_name: Name of the model to use.
         spec: User requirements (goal, skill level, etc.).
         refinement_feedback: Optional string of user feedback for adjustment.
+        bypass_cache: Skip the response cache and always call the model.
+        on_phase: Optional callback receiving (index, phase_dict) for each phase
+            as soon as it is parsed. When given, the response is streamed so
+            later stages can start before the whole curriculum is done.
         
     Returns:
         A dictionary containing the roadmap structure (phases and topics).
         
     Raises:
-        ValueError: If the LLM output fails structural validation.
+        ValueError: If the LLM output fails structural validation and the
+            invalid phases cannot be repaired individually.
     """
     logger.info(f"Building curriculum modules for: {spec.goal}")
     prompt_path = PROMPTS_DIR / "curriculum_system.txt"
@@ -36,43 +138,54 @@ def run_curriculum(client, model_name: str, spec: UserSpec, refinement_feedback:
         logger.info(f"Applying refinement feedback: {refinement_feedback}")
         user_message += f"\n\nRefinement request: {refinement_feedback}"
     
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ],
-        max_tokens=4096,
-        response_format={"type": "json_object"}
-    )
-    content = response.choices[0].message.content
+    cache_key = make_cache_key(model_name, system_prompt, user_message, max_tokens=4096, json=True)
+    content = None if bypass_cache else llm_cache.get(cache_key)
+    from_cache = content is not None
+    if from_cache:
+        logger.info("Curriculum response served from cache")
+        record_cache_hit("curriculum")
+    elif on_phase is not None:
+        content = await _stream_completion(client, model_name, system_prompt, user_message, on_phase)
+    else:
+        started = time.perf_counter()
+        response = await create_structured(
+            client, model_name, "Curriculum", CURRICULUM_SCHEMA,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            max_tokens=4096
+        )
+        record_llm_call("curriculum", started, getattr(response, "usage", None))
+        content = response.choices[0].message.content
     
-    # Process model-specific formatting
-    if "<think>" in content:
-        content = content.split("</think>")[-1].strip()
-
-    if "```" in content:
-        content = content.split("```")[1]
-        if content.startswith("json"):
-            content = content[4:]
-        content = content.split("```")[0].strip()
-        
     try:
-        data = json.loads(content)
+        data = extract_json(content)
         
         # Enforce structural integrity of the roadmap
         if "phases" not in data or not isinstance(data["phases"], list):
             raise ValueError("LLM response missing 'phases' list")
         
-        # Validate each phase against the official Roadmap schema
+        # Validate each phase against the official Roadmap schema, re-requesting
+        # only the broken ones rather than the whole curriculum
+        repairs = {}
         for i, phase_data in enumerate(data["phases"]):
             try:
                 Phase(**phase_data)
-            except Exception as e:
-                logger.error(f"Phase {i} validation failed: {str(e)}")
-                raise ValueError(f"Invalid structure in phase {i}") from e
-                
+            except (ValidationError, TypeError) as e:
+                logger.warning(f"Phase {i} validation failed: {str(e)}")
+                repairs[i] = _repair_phase(client, model_name, system_prompt, user_message, i, phase_data, e)
+
+        if repairs:
+            for i, phase_data in zip(repairs, await asyncio.gather(*repairs.values())):
+                data["phases"][i] = phase_data
+                if on_phase is not None:
+                    on_phase(i, phase_data)
+            content = json.dumps(data)
+
+        if not from_cache or repairs:
+            llm_cache.set(cache_key, content)
         return data
-    except (json.JSONDecodeError, ValueError) as e:
+    except ValueError as e:
         logger.error(f"Curriculum validation failed: {str(e)}")
         raise
@@ -0,0 +1,66 @@
+import math
+import re
+
+CATEGORIES = ("structure", "resources", "format")
+
+# (pattern, weight) per category; matched case-insensitively against the feedback
+RULES: dict[str, list[tuple[str, float]]] = {
+    "structure": [
+        (r"\bphases?\b", 1.0),
+        (r"\b(re)?order(ing|ed)?\b|\bsequence\b|\brearrange\b|\brestructure\b|\bmove\b", 1.5),
+        (r"\b(add|remove|drop|skip|include|cover|merge|split|combine)\w*\b", 0.5),
+        (r"\btopics?\b|\bsubtopics?\b|\bmodules?\b|\bsections?\b", 0.4),
+        (r"\bweeks?\b|\bmonths?\b|\bhours?\b|\bpace\b|\btimeline\b|\bschedule\b|\bduration\b", 1.0),
+        (r"\bspend\b|\b(more|less) time\b|\bshorter\b|\blonger\b", 1.0),
+        (r"\btoo (long|short|fast|slow|easy|hard|basic|advanced)\b", 1.5),
+        (r"\b(beginner|intermediate|advanced|difficulty|prerequisites?)\b", 1.0),
+        (r"\bmissing\b|\b(more|less) on\b|\bfocus\b|\bdeeper\b|\bin depth\b", 1.2),
+        (r"\bbefore\b|\bafter\b|\bearlier\b|\blater\b|\bfirst\b", 0.8),
+        (r"\bprojects?\b|\bexercises?\b|\bhands[- ]on\b|\bpractice\b", 0.8),
+    ],
+    "resources": [
+        (r"\bresources?\b", 2.0),
+        (r"\blinks?\b|\burls?\b|\b(web)?sites?\b|\b404\b|\bbroken\b|\bdead\b|\boutdated\b", 1.5),
+        (r"\bvideos?\b|\byoutube\b|\bbooks?\b|\bcourses?\b|\btutorials?\b|\barticles?\b", 1.5),
+        (r"\bdocs\b|\bdocumentation\b|\breferences?\b|\bsources?\b|\breading\b|\bmaterials?\b", 1.2),
+        (r"\bpodcasts?\b|\btalks\b|\brepo(sitory|sitories|s)?\b|\bgithub\b", 1.2),
+        (r"\brecommend\w*\b|\bfree\b|\bpaid\b|\binteractive\b|\bplaygrounds?\b", 0.8),
+    ],
+    "format": [
+        (r"\bformat\w*\b|\blayout\b|\bstyle\b|\bpresentation\b", 2.0),
+        (r"\bmarkdown\b|\bheadings?\b|\bheaders?\b|\bbullets?\b|\btables?\b|\bcheck ?(box|list)\w*\b", 1.5),
+        (r"\bbold\b|\bitalics?\b|\bclutter\w*\b|\bmessy\b|\bcleaner\b", 1.5),
+        (r"\bexport\w*\b|\bpdf\b|\bprint\w*\b|\bdownload\w*\b", 1.0),
+        (r"\breadab\w+\b|\bconcise\b|\bverbose\b|\bwording\b|\btypos?\b|\bspelling\b|\bgrammar\b", 1.2),
+        (r"\bemojis?\b|\bfonts?\b|\bnumber(ed|ing)?\b|\bindent\w*\b|\bspacing\b|\bcolou?rs?\b", 1.5),
+        (r"\bsentences?\b|\bparagraphs?\b|\bsummary\b|\btitles?\b|\bdescriptions?\b|\btext\b", 1.0),
+    ],
+}
+
+_COMPILED = {
+    category: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in rules]
+    for category, rules in RULES.items()
+}
+
+def score_feedback(feedback: str) -> dict[str, float]:
+    """Sums the weights of the rules each category matches."""
+    return {
+        category: sum(weight for pattern, weight in rules if pattern.search(feedback or ""))
+        for category, rules in _COMPILED.items()
+    }
+
+def classify_locally(feedback: str) -> tuple[str, float]:
+    """
+    Classifies refinement feedback with keyword rules, in microseconds.
+
+    Returns:
+        (category, confidence). Confidence is the winning category's share
+        of the total score, damped when there is little evidence at all,
+        so it is 0 when nothing matched and low when categories tie.
+    """
+    scores = score_feedback(feedback)
+    category = max(CATEGORIES, key=lambda c: scores[c])
+    top, total = scores[category], sum(scores.values())
+    if not total:
+        return "structure", 0.0
+    return category, round(top / total * (1 - math.exp(-1.5 * top)), 3)
@@ -1,22 +1,133 @@
 import logging
+import time
 from pathlib import Path
+from typing import Callable
 from models.roadmap import Roadmap
-from models.progress import ProgressState
+from models.progress import ProgressState, TopicStatus
+from storage.llm_cache import llm_cache, make_cache_key
+from utils.metrics import record_llm_call, record_cache_hit
 
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 logger = logging.getLogger(__name__)
 
-def run_formatter(client, model_name: str, roadmap: Roadmap, progress: ProgressState) -> str:
+PHASE_EMOJI = ["🟦", "🟨", "🟧", "🟥"]
+RESOURCE_EMOJI = {"docs": "📖", "video": "🎥", "article": "📝", "interactive": "🛠️"}
+STATUS_CHECKBOX = {
+    TopicStatus.not_started: "[ ]",
+    TopicStatus.in_progress: "[~]",
+    TopicStatus.done: "[x]",
+}
+FOOTER = "Generated by AI Learning Roadmap Creator · Powered by Local AI"
+
+def _cell(value) -> str:
+    """Makes a value safe to place inside a Markdown table cell."""
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+def _percent(done: int, total: int) -> int:
+    return round(done * 100 / total) if total else 0
+
+def render_markdown(roadmap: Roadmap, progress: ProgressState) -> str:
+    """
+    Renders a roadmap and its progress as Markdown without calling a model.
+    
+    Follows the same layout the formatter prompt asks the LLM for, but the
+    output is deterministic and cheap enough to regenerate on every
+    progress change.
+    
+    Args:
+        roadmap: The full Roadmap object.
+        progress: The user's current progress state.
+        
+    Returns:
+        A string containing the formatted Markdown content.
+    """
+    spec = roadmap.spec
+    skill_level = getattr(spec.skill_level, "value", spec.skill_level)
+
+    def status_of(topic_name: str) -> TopicStatus:
+        try:
+            return TopicStatus(progress.topics.get(topic_name, TopicStatus.not_started))
+        except ValueError:
+            return TopicStatus.not_started
+
+    lines = [
+        f"# {roadmap.title}",
+        "",
+        f"- **Goal:** {spec.goal}",
+        f"- **Skill level:** {skill_level}",
+        f"- **Hours per week:** {spec.hours_per_week}",
+        f"- **Estimated duration:** {spec.estimated_weeks} weeks",
+        f"- **Created:** {roadmap.created_at[:10]}",
+        "",
+        "## Overview",
+        "",
+        "| Phase | Title | Duration | Topics |",
+        "| --- | --- | --- | --- |",
+    ]
+    for phase in roadmap.phases:
+        lines.append(f"| {phase.phase_number} | {_cell(phase.title)} | {_cell(phase.week_range)} | {len(phase.topics)} |")
+    lines.append("")
+
+    for index, phase in enumerate(roadmap.phases):
+        emoji = PHASE_EMOJI[min(index, len(PHASE_EMOJI) - 1)]
+        lines += [f"## Phase {phase.phase_number}: {phase.title} ({phase.week_range})", ""]
+        for topic in phase.topics:
+            lines += [f"### {emoji} {STATUS_CHECKBOX[status_of(topic.name)]} {topic.name}", ""]
+            if topic.content:
+                lines += [topic.content, ""]
+            if topic.subtopics:
+                lines += [f"**Subtopics:** {', '.join(topic.subtopics)}", ""]
+            if topic.resources:
+                lines.append("**Resources:**")
+                lines += [
+                    f"- {RESOURCE_EMOJI.get(r.type, '🔗')} [{r.label}]({r.url})"
+                    for r in topic.resources
+                ]
+                lines.append("")
+            if topic.project:
+                lines += [f"**Project:** {topic.project}", ""]
+
+    lines += [
+        "## Progress Summary",
+        "",
+        "| Phase | Done | Progress |",
+        "| --- | --- | --- |",
+    ]
+    total_done = total_topics = 0
+    for phase in roadmap.phases:
+        done = sum(1 for t in phase.topics if status_of(t.name) == TopicStatus.done)
+        total_done += done
+        total_topics += len(phase.topics)
+        lines.append(
+            f"| Phase {phase.phase_number}: {_cell(phase.title)} | {done}/{len(phase.topics)} "
+            f"| {_percent(done, len(phase.topics))}% |"
+        )
+    lines += [
+        f"| **Overall** | {total_done}/{total_topics} | {_percent(total_done, total_topics)}% |",
+        "",
+        "---",
+        "",
+        f"*{FOOTER}*",
+        "",
+    ]
+    return "\n".join(lines)
+
+async def run_formatter(client, model_name: str, roadmap: Roadmap, progress: ProgressState, bypass_cache: bool = False,
+                        on_token: Callable[[str], None] = None) -> str:
     """
     Transforms the structured roadmap data into a user-friendly Markdown document.
     
     Includes progress information to highlight completed or in-progress topics.
+    This is the opt-in "polish" mode; render_markdown is used by default.
     
     Args:
         client: The AI model client.
         model_name: Name of the model to use.
         roadmap: The full Roadmap object.
         progress: The user's current progress state.
+        bypass_cache: Skip the response cache and always call the model.
+        on_token: Optional callback receiving raw text deltas as the response
+            streams in. A cached response is passed in a single call.
         
     Returns:
         A string containing the formatted Markdown content.
@@ -29,18 +140,48 @@ def run_formatter(client, model_name: str, roadmap: Roadmap, progress: ProgressS
     # Combine data models for a comprehensive formatting context
     user_message = f"Roadmap:\n{roadmap.model_dump_json()}\n\nProgress:\n{progress.model_dump_json()}"
     
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ],
-        max_tokens=4096,
-    )
-    content = response.choices[0].message.content
+    cache_key = make_cache_key(model_name, system_prompt, user_message, max_tokens=4096)
+    cached = None if bypass_cache else llm_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Formatter response served from cache")
+        record_cache_hit("formatter")
+        if on_token is not None:
+            on_token(cached)
+        return cached
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_message}
+    ]
+    started = time.perf_counter()
+    if on_token is None:
+        response = await client.chat.completions.create(model=model_name, messages=messages, max_tokens=4096)
+        record_llm_call("formatter", started, getattr(response, "usage", None))
+        content = response.choices[0].message.content
+    else:
+        stream = await client.chat.completions.create(
+            model=model_name, messages=messages, max_tokens=4096,
+            stream=True, stream_options={"include_usage": True}
+        )
+        parts = []
+        ttft = None
+        usage = None
+        async for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            parts.append(delta)
+            on_token(delta)
+        record_llm_call("formatter", started, usage, ttft=ttft)
+        content = "".join(parts)
     
     if "<think>" in content:
         content = content.split("</think>")[-1].strip()
         
+    llm_cache.set(cache_key, content)
+
     logger.info(f"Formatted Markdown length: {len(content)}")
     return content
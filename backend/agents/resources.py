@@ -1,75 +1,240 @@
+import asyncio
 import json
 import logging
+import time
 from pathlib import Path
+from typing import Callable
 from pydantic import ValidationError
-from models.roadmap import Phase
+from models.roadmap import Phase, Topic
+from storage.llm_cache import llm_cache, make_cache_key
+from storage.topic_cache import topic_cache, normalize_topic
+from utils.roadmap_diff import topic_signature
+from utils.metrics import record_llm_call, record_cache_hit
+from utils.structured_output import create_structured, extract_json, json_schema_for, describe_errors, repair_object
 
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 logger = logging.getLogger(__name__)
 
-def run_resources(client, model_name: str, roadmap_dict: dict) -> dict:
+PHASE_SCHEMA = json_schema_for(Phase)
+
+async def _request_resources(client, model_name: str, system_prompt: str, phase: dict, bypass_cache: bool = False) -> dict:
+    """
+    Requests resources for a single phase. Topics that fail validation are
+    re-requested individually, and fall back to their original version if
+    the repair fails too; unusable output falls back to the original phase.
+    """
+    logger.info(f"Processing phase {phase.get('phase_number')}: {phase.get('title')}")
+    
+    user_message = json.dumps(phase)
+    
+    cache_key = make_cache_key(model_name, system_prompt, user_message, max_tokens=2000, json=True)
+    content = None if bypass_cache else llm_cache.get(cache_key)
+    from_cache = content is not None
+    if from_cache:
+        record_cache_hit("resources")
+    else:
+        started = time.perf_counter()
+        response = await create_structured(
+            client, model_name, "Phase", PHASE_SCHEMA,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            max_tokens=2000
+        )
+        record_llm_call("resources", started, getattr(response, "usage", None))
+        content = response.choices[0].message.content
+
+    try:
+        enriched_phase_dict = extract_json(content)
+        
+        # Structural validation to ensure LLM respected the schema
+        if not isinstance(enriched_phase_dict.get("topics"), list):
+            raise ValueError("LLM returned non-list topics for phase")
+
+        repaired = False
+        degraded = False
+        original_topics = phase.get("topics", [])
+        for i, topic in enumerate(enriched_phase_dict["topics"]):
+            try:
+                Topic(**topic)
+            except (ValidationError, TypeError) as e:
+                error = describe_errors(e) if isinstance(e, ValidationError) else "topic must be a JSON object"
+                try:
+                    enriched_phase_dict["topics"][i] = await repair_object(
+                        client, model_name, "resources", system_prompt, user_message,
+                        Topic, topic, error, f"topic {i + 1}"
+                    )
+                except ValueError:
+                    if i >= len(original_topics):
+                        raise
+                    logger.warning(f"Keeping original topic {i + 1} of phase {phase.get('phase_number')}")
+                    enriched_phase_dict["topics"][i] = original_topics[i]
+                    degraded = True
+                repaired = True
+
+        Phase(**enriched_phase_dict)
+        if repaired:
+            content = json.dumps(enriched_phase_dict)
+        # Partially fallen-back phases are not cached, so a later run can do better
+        if (not from_cache or repaired) and not degraded:
+            llm_cache.set(cache_key, content)
+        return enriched_phase_dict
+    except (ValidationError, ValueError) as e:
+        logger.warning(
+            f"Invalid structure for phase {phase.get('phase_number')}: {str(e)}. "
+            "Falling back to original topics."
+        )
+        return phase
+
+async def _enrich_phase(client, model_name: str, system_prompt: str, phase: dict, bypass_cache: bool = False,
+                        skill_level: str = None, reuse: dict[str, list] = None) -> dict:
+    """
+    Fills topics whose resources are already known and requests resources
+    only for the rest, sent as a trimmed phase. Known resources come from
+    `reuse` (unchanged topics of the roadmap being refined, by topic
+    signature) and then from the cross-roadmap topic cache. Newly found
+    resources are added to the cache. The cache is used only when the
+    skill level is known, and is not read when bypass_cache is set.
+    """
+    topics = phase.get("topics", [])
+    known: dict[int, list] = {}
+    for i, topic in enumerate(topics):
+        resources = (reuse or {}).get(topic_signature(topic))
+        if resources is None and skill_level is not None and not bypass_cache:
+            resources = topic_cache.get(topic.get("name"), skill_level, model_name)
+        if resources is not None:
+            known[i] = resources
+    if known and len(known) == len(topics):
+        logger.info(f"Reusing known resources for every topic of phase {phase.get('phase_number')}")
+        return {**phase, "topics": [{**t, "resources": known[i]} for i, t in enumerate(topics)]}
+
+    unknown = [i for i in range(len(topics)) if i not in known]
+    trimmed = {**phase, "topics": [topics[i] for i in unknown]} if known else phase
+    enriched = await _request_resources(client, model_name, system_prompt, trimmed, bypass_cache)
+
+    fresh = enriched.get("topics", [])
+    by_name = {normalize_topic(t.get("name")): t for t in fresh if isinstance(t, dict)}
+    merged = [{**t, "resources": known[i]} if i in known else t for i, t in enumerate(topics)]
+    for position, i in enumerate(unknown):
+        # Topics are matched by position, or by name if the model dropped or added some
+        if len(fresh) == len(unknown):
+            topic = fresh[position]
+        else:
+            topic = by_name.get(normalize_topic(topics[i].get("name")), topics[i])
+        merged[i] = topic
+        if skill_level is not None and topic.get("resources") and topic["resources"] != topics[i].get("resources"):
+            topic_cache.set(topics[i].get("name"), skill_level, model_name, topic["resources"])
+    if not known:
+        return enriched
+    return {**phase, "topics": merged}
+
+class PhaseEnricher:
+    """
+    Schedules per-phase enrichment as soon as each phase is known.
+
+    Phases can be submitted one by one while the curriculum is still being
+    streamed, and collect() later returns the enriched phases in order,
+    reusing finished work for phases that did not change in the meantime.
+    on_enriched, if given, receives (index, enriched_phase) as each phase
+    finishes, so results can be reported before the whole roadmap is done.
+    skill_level enables the cross-roadmap topic cache, and reuse maps topic
+    signatures to resources carried over from a previous version of the
+    roadmap; both may be set after construction.
+    """
+
+    def __init__(self, client, model_name: str, max_concurrency: int = 1, bypass_cache: bool = False,
+                 on_enriched: Callable[[int, dict], None] = None, skill_level: str = None):
+        self.client = client
+        self.model_name = model_name
+        self.bypass_cache = bypass_cache
+        self.skill_level = skill_level
+        self.reuse: dict[str, list] = {}
+        self.on_enriched = on_enriched
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._tasks: dict[int, tuple[dict, asyncio.Task]] = {}
+        prompt_path = PROMPTS_DIR / "resources_system.txt"
+        with open(prompt_path, "r", encoding="utf-8") as f:
+            self._system_prompt = f.read()
+
+    async def _bounded(self, index: int, phase: dict) -> dict:
+        async with self._semaphore:
+            enriched = await _enrich_phase(
+                self.client, self.model_name, self._system_prompt, phase, self.bypass_cache,
+                self.skill_level, self.reuse
+            )
+        if self.on_enriched is not None:
+            self.on_enriched(index, enriched)
+        return enriched
+
+    def submit(self, index: int, phase: dict):
+        """Starts enriching the phase at the given position, replacing stale work."""
+        existing = self._tasks.get(index)
+        if existing is not None:
+            if existing[0] == phase:
+                return
+            existing[1].cancel()
+        self._tasks[index] = (phase, asyncio.create_task(self._bounded(index, phase)))
+
+    def _needs_restart(self, index: int, phase: dict) -> bool:
+        existing = self._tasks.get(index)
+        if existing is None or existing[0] != phase:
+            return True
+        task = existing[1]
+        return task.done() and (task.cancelled() or task.exception() is not None)
+
+    async def collect(self, phases: list[dict]) -> list[dict]:
+        """Returns the enriched version of every phase, in input order."""
+        for index, phase in enumerate(phases):
+            if self._needs_restart(index, phase):
+                self._tasks.pop(index, None)
+                self.submit(index, phase)
+        for index in [i for i in self._tasks if i >= len(phases)]:
+            self._tasks.pop(index)[1].cancel()
+
+        try:
+            # gather preserves input order, so phases stay deterministic
+            return list(await asyncio.gather(*(self._tasks[i][1] for i in range(len(phases)))))
+        except Exception:
+            self.cancel()
+            raise
+
+    def cancel(self):
+        """Cancels all outstanding enrichment work."""
+        for _, task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+async def run_resources(client, model_name: str, roadmap_dict: dict, max_concurrency: int = 1,
+                        bypass_cache: bool = False, enricher: PhaseEnricher = None) -> dict:
     """
     Enriches a roadmap's topics with educational resources using an LLM.
     
     This agent processes each phase of the roadmap independently to maintain 
     high output quality and avoid token limit issues with smaller models.
+    Phases are enriched concurrently, up to max_concurrency at a time, and
+    are returned in their original order. Topics whose resources are already
+    known from other roadmaps are filled from the topic cache instead.
     
     Args:
         client: The AI model client.
         model_name: Name of the model to use.
         roadmap_dict: The current roadmap structure as a dictionary.
+        max_concurrency: Maximum number of phases enriched at the same time.
+        bypass_cache: Skip the response cache and always call the model.
+        enricher: Optional PhaseEnricher that already started work on some
+            phases, e.g. while the curriculum was streaming.
         
     Returns:
         The roadmap dictionary updated with resource links for each topic.
     """
-    logger.info(f"Enriching topics with resources using {model_name}...")
-    prompt_path = PROMPTS_DIR / "resources_system.txt"
-    with open(prompt_path, "r", encoding="utf-8") as f:
-        system_prompt = f.read()
-
-    enriched_phases = []
-    for phase in roadmap_dict.get("phases", []):
-        logger.info(f"Processing phase {phase.get('phase_number')}: {phase.get('title')}")
-        
-        user_message = json.dumps(phase)
-        
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            max_tokens=2000, 
-            response_format={"type": "json_object"}
+    logger.info(f"Enriching topics with resources using {model_name} (concurrency={max_concurrency})...")
+    if enricher is None:
+        enricher = PhaseEnricher(
+            client, model_name, max_concurrency, bypass_cache,
+            skill_level=(roadmap_dict.get("spec") or {}).get("skill_level")
         )
-        content = response.choices[0].message.content
-
-        # Extract content from model-specific wrapping (thinking blocks or markdown fences)
-        if "<think>" in content:
-            content = content.split("</think>")[-1].strip()
-
-        if "```" in content:
-            content = content.split("```")[1]
-            if content.startswith("json"):
-                content = content[4:]
-            content = content.split("```")[0].strip()
-            
-        try:
-            enriched_phase_dict = json.loads(content)
-            
-            # Structural validation to ensure LLM respected the schema
-            if not isinstance(enriched_phase_dict.get("topics"), list):
-                raise ValueError("LLM returned non-list topics for phase")
-            
-            Phase(**enriched_phase_dict)
-            enriched_phases.append(enriched_phase_dict)
-        except (json.JSONDecodeError, ValidationError, ValueError) as e:
-            logger.warning(
-                f"Invalid structure for phase {phase.get('phase_number')}: {str(e)}. "
-                "Falling back to original topics."
-            )
-            enriched_phases.append(phase)
 
-    roadmap_dict["phases"] = enriched_phases
+    roadmap_dict["phases"] = await enricher.collect(roadmap_dict.get("phases", []))
     logger.info("Successfully enriched all roadmap resources.")
     return roadmap_dict
@@ -0,0 +1,175 @@
+"""
+Evaluates the feedback classifiers on labelled refinement feedback.
+
+Reports accuracy and latency for the local rules alone, the LLM alone and
+the hybrid used by the API (rules, with the LLM below the confidence
+threshold), plus how often the hybrid needed the LLM.
+
+Those numbers are measured on the same samples the threshold was chosen
+against, so they flatter it. A stratified k-fold run therefore picks the
+threshold on k-1 folds (the lowest at which the rules reach
+--target-accuracy on the samples they answer) and scores it on the
+held-out fold. The held-out accuracy and fallback rate are the numbers to
+quote when choosing FEEDBACK_CLASSIFIER_THRESHOLD.
+
+    python -m bench.eval_classifier --provider ollama --model llama3.2:latest
+    python -m bench.eval_classifier --skip-llm --folds 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from agents.feedback_classifier import CATEGORIES, classify_locally
+from bench.run import percentile
+from clients import get_client_and_model, close_clients
+from orchestrator import classify_feedback_llm
+
+SAMPLES = Path(__file__).parent / "feedback_samples.jsonl"
+# Candidate hybrid thresholds for the cross-validated search
+THRESHOLDS = [round(0.05 * i, 2) for i in range(21)]
+
+def load_samples(path: Path) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def summarize(name: str, labels: list[str], predictions: list[str], latencies: list[float]) -> dict:
+    correct = sum(p == l for p, l in zip(predictions, labels))
+    return {
+        "classifier": name,
+        "accuracy": round(correct / len(labels), 3) if labels else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "confusion": {
+            label: dict(Counter(p for p, l in zip(predictions, labels) if l == label))
+            for label in CATEGORIES
+        }
+    }
+
+def answered_accuracy(labels: list[str], local: list[str], confidences: list[float], threshold: float):
+    """Accuracy of the rules on the samples they answer at a threshold, and the share left to the LLM."""
+    answered = [p == l for p, l, c in zip(local, labels, confidences) if c >= threshold]
+    accuracy = round(sum(answered) / len(answered), 3) if answered else None
+    return accuracy, round(1 - len(answered) / len(labels), 3) if labels else 0.0
+
+def pick_threshold(labels: list[str], local: list[str], confidences: list[float], target: float) -> float:
+    """Lowest threshold at which the rules are right on at least `target` of the samples they answer."""
+    for threshold in THRESHOLDS:
+        accuracy, _ = answered_accuracy(labels, local, confidences, threshold)
+        if accuracy is None or accuracy >= target:
+            return threshold
+    return THRESHOLDS[-1]
+
+def cross_validate(labels: list[str], local: list[str], confidences: list[float], llm: list[str],
+                   folds: int, target: float, seed: int) -> dict:
+    """
+    Chooses the threshold on k-1 folds and scores it on the held-out fold.
+    Held-out results are pooled across folds. Hybrid accuracy needs the LLM
+    answers, so it is None with --skip-llm.
+    """
+    # Stratified: each label's samples are dealt round-robin across the folds
+    order = list(range(len(labels)))
+    random.Random(seed).shuffle(order)
+    fold_of = {}
+    for label in sorted(set(labels)):
+        for n, i in enumerate(i for i in order if labels[i] == label):
+            fold_of[i] = n % folds
+
+    thresholds, answered, rules_correct, hybrid_correct = [], 0, 0, 0
+    for k in range(folds):
+        train = [i for i in order if fold_of[i] != k]
+        threshold = pick_threshold([labels[i] for i in train], [local[i] for i in train],
+                                   [confidences[i] for i in train], target)
+        thresholds.append(threshold)
+        for i in (i for i in order if fold_of[i] == k):
+            if confidences[i] >= threshold:
+                answered += 1
+                rules_correct += local[i] == labels[i]
+                hybrid_correct += local[i] == labels[i]
+            elif llm:
+                hybrid_correct += llm[i] == labels[i]
+    return {
+        "folds": folds,
+        "target_accuracy": target,
+        "thresholds": thresholds,
+        "held_out_rules_accuracy": round(rules_correct / answered, 3) if answered else None,
+        "held_out_llm_fallback_rate": round(1 - answered / len(labels), 3),
+        "held_out_hybrid_accuracy": round(hybrid_correct / len(labels), 3) if llm else None,
+    }
+
+async def evaluate(samples: list[dict], threshold: float, provider: str, model: str, skip_llm: bool,
+                   folds: int, target: float, seed: int) -> tuple[list[dict], dict]:
+    labels = [s["label"] for s in samples]
+    local, local_latencies, confidences = [], [], []
+    for sample in samples:
+        started = time.perf_counter()
+        category, confidence = classify_locally(sample["feedback"])
+        local_latencies.append(time.perf_counter() - started)
+        local.append(category)
+        confidences.append(confidence)
+    results = [summarize("rules", labels, local, local_latencies)]
+    results[0]["answered_accuracy"], results[0]["llm_fallback_rate"] = answered_accuracy(labels, local, confidences, threshold)
+    if skip_llm:
+        return results, cross_validate(labels, local, confidences, None, folds, target, seed)
+
+    client, model_name = get_client_and_model(provider, model, agent="classify")
+    llm, llm_latencies = [], []
+    try:
+        for sample in samples:
+            started = time.perf_counter()
+            llm.append(await classify_feedback_llm(client, model_name, sample["feedback"]))
+            llm_latencies.append(time.perf_counter() - started)
+    finally:
+        await close_clients()
+    results.append(summarize("llm", labels, llm, llm_latencies))
+
+    # The hybrid's answers and latencies follow from the two runs above
+    confident = [c >= threshold for c in confidences]
+    hybrid = [r if ok else m for r, m, ok in zip(local, llm, confident)]
+    hybrid_latencies = [r if ok else r + m for r, m, ok in zip(local_latencies, llm_latencies, confident)]
+    summary = summarize(f"hybrid@{threshold}", labels, hybrid, hybrid_latencies)
+    summary["llm_fallback_rate"] = round(1 - sum(confident) / len(samples), 3)
+    results.append(summary)
+    return results, cross_validate(labels, local, confidences, llm, folds, target, seed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the local feedback classifier with the LLM path.")
+    parser.add_argument("--samples", type=Path, default=SAMPLES, help="JSONL file of {feedback, label} records.")
+    parser.add_argument("--threshold", type=float, default=0.6, help="Hybrid confidence threshold.")
+    parser.add_argument("--provider")
+    parser.add_argument("--model")
+    parser.add_argument("--skip-llm", action="store_true", help="Only evaluate the local rules.")
+    parser.add_argument("--folds", type=int, default=5, help="Folds for the cross-validated threshold.")
+    parser.add_argument("--target-accuracy", type=float, default=0.95,
+                        help="Accuracy the rules must reach on the samples they answer.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the fold assignment.")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    results, cv = asyncio.run(evaluate(samples, args.threshold, args.provider, args.model, args.skip_llm,
+                                       args.folds, args.target_accuracy, args.seed))
+    for r in results:
+        extra = f"  llm_fallback_rate={r['llm_fallback_rate']}" if "llm_fallback_rate" in r else ""
+        if "answered_accuracy" in r:
+            extra = f"  @{args.threshold}: answered_accuracy={r['answered_accuracy']}" + extra
+        print(f"{r['classifier']:<12} accuracy={r['accuracy']:<6} p50={r['p50_ms']}ms p95={r['p95_ms']}ms{extra}")
+        for label, row in r["confusion"].items():
+            print(f"    {label:<10} -> {row}")
+    print(f"{cv['folds']}-fold held out: thresholds={cv['thresholds']} "
+          f"rules_accuracy={cv['held_out_rules_accuracy']} llm_fallback_rate={cv['held_out_llm_fallback_rate']}"
+          + (f" hybrid_accuracy={cv['held_out_hybrid_accuracy']}" if cv["held_out_hybrid_accuracy"] is not None else ""))
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps({"config": {**vars(args), "samples": str(args.samples)},
+                                                    "results": results, "cross_validation": cv}, indent=2))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Deterministic OpenAI-compatible stand-in for the LLM providers.
+
+Serves /v1/chat/completions with canned, schema-valid responses for every
+agent prompt, so the full pipeline can be exercised without network access.
+Latency, token rate and the share of malformed JSON responses are
+configurable; identical request sequences always produce identical output.
+
+    python -m bench.fake_llm --port 9100 --latency 0.2 --token-rate 200
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+class FakeLLMSettings:
+    def __init__(self, latency: float = 0.2, token_rate: float = 200.0, invalid_rate: float = 0.0,
+                 seed: int = 0, phases: int = 4, topics: int = 3):
+        self.latency = latency  # seconds before the first token
+        self.token_rate = token_rate  # generated tokens per second, 0 for instant
+        self.invalid_rate = invalid_rate  # share of JSON responses returned truncated
+        self.seed = seed
+        self.phases = phases
+        self.topics = topics
+
+settings = FakeLLMSettings()
+app = FastAPI(title="Fake LLM")
+
+# Attempt counter per prompt, so a retried request gets a fresh draw
+_attempts: dict[str, int] = {}
+
+def _tokens(text: str) -> list[str]:
+    """Splits text into ~4 character pieces, a rough stand-in for model tokens."""
+    return [text[i:i + 4] for i in range(0, len(text), 4)] or [""]
+
+def _analyst(rng: random.Random, user_message: str) -> dict:
+    goal = re.search(r"Goal: (.*)", user_message)
+    level = re.search(r"Skill level: (?:SkillLevel\.)?(\w+)", user_message)
+    hours = re.search(r"Hours per week: (\d+)", user_message)
+    return {
+        "goal": goal.group(1).strip() if goal else "benchmark",
+        "skill_level": level.group(1) if level else "beginner",
+        "hours_per_week": int(hours.group(1)) if hours else 5,
+        "estimated_weeks": rng.randint(4, 24)
+    }
+
+def _curriculum(rng: random.Random, user_message: str) -> dict:
+    try:
+        goal = json.loads(user_message.split("\n\n")[0]).get("goal", "Benchmark")
+    except (json.JSONDecodeError, AttributeError):
+        goal = "Benchmark"
+    phases = []
+    for p in range(1, settings.phases + 1):
+        topics = [{
+            "name": f"{goal} {p}.{t} {rng.choice(['Basics', 'Patterns', 'Tooling', 'Testing', 'Deployment'])}",
+            "content": f"Covers part {t} of phase {p}.",
+            "subtopics": [f"Subtopic {p}.{t}.{s}" for s in range(1, 5)],
+            "resources": [],
+            "project": f"Build a small {goal} exercise for phase {p}"
+        } for t in range(1, settings.topics + 1)]
+        phases.append({
+            "phase_number": p,
+            "title": f"Phase {p}",
+            "week_range": f"Week {2 * p - 1}-{2 * p}",
+            "topics": topics
+        })
+    return {"title": f"{goal} Roadmap", "phases": phases}
+
+def _resources(rng: random.Random, user_message: str) -> dict:
+    phase = json.loads(user_message)
+    for topic in phase.get("topics", []):
+        slug = re.sub(r"[^a-z0-9]+", "-", topic.get("name", "topic").lower()).strip("-")
+        topic["resources"] = [
+            {"label": f"{kind.title()} for {topic.get('name')}", "url": f"https://example.com/{slug}/{kind}", "type": kind}
+            for kind in rng.sample(["docs", "video", "article", "interactive"], 4)
+        ]
+    return phase
+
+def _formatter(rng: random.Random, user_message: str) -> str:
+    return "# Roadmap\n\n" + "\n".join(f"- Section {i}" for i in range(1, 9)) + "\n"
+
+def _respond(system_prompt: str, user_message: str) -> str:
+    """Returns the canned response text for an agent prompt."""
+    digest = hashlib.sha256((system_prompt + "\0" + user_message).encode("utf-8")).hexdigest()
+    attempt = _attempts.get(digest, 0)
+    _attempts[digest] = attempt + 1
+    rng = random.Random(f"{settings.seed}:{digest}:{attempt}")
+
+    role = system_prompt.splitlines()[0] if system_prompt else ""
+    if "Analyst" in role:
+        data = _analyst(rng, user_message)
+    elif "Curriculum" in role:
+        data = _curriculum(rng, user_message)
+    elif "Resource" in role:
+        try:
+            data = _resources(rng, user_message)
+        except json.JSONDecodeError:
+            data = {}
+    elif "Formatter" in role:
+        return _formatter(rng, user_message)
+    else:
+        # Feedback classification and anything else
+        return "structure"
+
+    text = json.dumps(data)
+    if rng.random() < settings.invalid_rate:
+        text = text[:len(text) // 2]
+    return text
+
+def _usage(prompt: str, completion_tokens: int) -> dict:
+    prompt_tokens = len(_tokens(prompt))
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    system_prompt = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    user_message = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    text = _respond(system_prompt, user_message)
+    tokens = _tokens(text)
+    usage = _usage(system_prompt + user_message, len(tokens))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    model = body.get("model", "fake")
+
+    if not body.get("stream"):
+        await asyncio.sleep(settings.latency + (len(tokens) / settings.token_rate if settings.token_rate else 0))
+        return JSONResponse({
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage
+        })
+
+    include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+    async def events():
+        def chunk(delta: dict = None, finish_reason: str = None, **extra) -> str:
+            choices = [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                       "model": model, "choices": choices, **extra}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        await asyncio.sleep(settings.latency)
+        yield chunk({"role": "assistant", "content": ""})
+        # Batch tokens so a high token rate does not mean thousands of tiny sleeps
+        batch = max(1, int(settings.token_rate // 50)) if settings.token_rate else len(tokens)
+        for i in range(0, len(tokens), batch):
+            if settings.token_rate:
+                await asyncio.sleep(batch / settings.token_rate)
+            yield chunk({"content": "".join(tokens[i:i + batch])})
+        yield chunk({}, finish_reason="stop")
+        if include_usage:
+            yield chunk(usage=usage)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "bench"}]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible fake LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token.")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Tokens per second; 0 for instant.")
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="Share of JSON responses to truncate.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--phases", type=int, default=4)
+    parser.add_argument("--topics", type=int, default=3, help="Topics per phase.")
+    args = parser.parse_args()
+
+    global settings
+    settings = FakeLLMSettings(args.latency, args.token_rate, args.invalid_rate, args.seed, args.phases, args.topics)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
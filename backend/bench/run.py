@@ -0,0 +1,192 @@
+"""
+Offline benchmark for the API.
+
+Starts the fake LLM server and the API as subprocesses, with an isolated
+data directory. It then drives these scenarios at a fixed concurrency:
+generate -> stream, list, and progress PATCH. For each one it reports
+p50/p95/p99 latency and requests per second.
+
+    python -m bench.run --requests 40 --concurrency 8 --storage sqlite
+
+Pass --api-url to benchmark an API that is already running instead.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def percentile(samples: list[float], p: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+async def _wait_ready(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+async def run_scenario(name: str, requests: int, concurrency: int,
+                       call: Callable[[int], Awaitable[None]]) -> dict:
+    """Runs call(i) for i in range(requests) with bounded concurrency and summarizes latencies."""
+    latencies: list[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                await call(i)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors += 1
+                print(f"  {name} #{i} failed: {e}", file=sys.stderr)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+    return {
+        "scenario": name,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0
+    }
+
+async def benchmark(api_url: str, requests: int, concurrency: int) -> list[dict]:
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=api_url, timeout=300, limits=limits) as client:
+        roadmaps: list[tuple[str, list[str]]] = []
+
+        async def generate(i: int):
+            response = await client.post("/api/roadmaps/generate", json={
+                "goal": f"Benchmark goal {i}", "skill_level": "beginner",
+                "hours_per_week": 5 + i % 10, "provider": "ollama", "model": "fake"
+            })
+            response.raise_for_status()
+            roadmap_id = response.json()["roadmap_id"]
+            async with client.stream("GET", f"/api/roadmaps/{roadmap_id}/stream") as stream:
+                async for line in stream.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    event = json.loads(line[5:])
+                    if event["type"] == "error":
+                        raise RuntimeError(event.get("message"))
+                    if event["type"] == "complete":
+                        break
+                else:
+                    raise RuntimeError("stream ended before completion")
+            roadmap = (await client.get(f"/api/roadmaps/{roadmap_id}")).json()
+            roadmaps.append((roadmap_id, [t["name"] for p in roadmap["phases"] for t in p["topics"]]))
+
+        async def list_roadmaps(i: int):
+            (await client.get("/api/roadmaps", params={"limit": 50})).raise_for_status()
+
+        async def update_progress(i: int):
+            roadmap_id, topics = roadmaps[i % len(roadmaps)]
+            response = await client.patch(f"/api/roadmaps/{roadmap_id}/progress", json={
+                "topic_name": topics[i % len(topics)],
+                "status": ("in_progress", "done", "not_started")[i % 3]
+            })
+            response.raise_for_status()
+
+        results = [await run_scenario("generate+stream", requests, concurrency, generate)]
+        results.append(await run_scenario("list", requests * 5, concurrency, list_roadmaps))
+        if roadmaps:
+            results.append(await run_scenario("progress_patch", requests * 5, concurrency, update_progress))
+        return results
+
+def _print_table(results: list[dict]):
+    columns = ["scenario", "requests", "errors", "p50_ms", "p95_ms", "p99_ms", "rps"]
+    widths = [max(len(c), *(len(str(r[c])) for r in results)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in results:
+        print("  ".join(str(r[c]).ljust(w) for c, w in zip(columns, widths)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline API benchmark against a fake LLM server.")
+    parser.add_argument("--requests", type=int, default=20, help="Roadmaps to generate; list/progress run 5x this.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--api-url", help="Benchmark an already running API instead of starting one.")
+    parser.add_argument("--storage", choices=["file", "sqlite"], default="file")
+    parser.add_argument("--job-concurrency", type=int, default=4, help="JOB_MAX_CONCURRENCY for the API.")
+    parser.add_argument("--provider-concurrency", type=int, default=4, help="OLLAMA_MAX_CONCURRENCY for the API.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM seconds before the first token.")
+    parser.add_argument("--token-rate", type=float, default=400.0, help="Fake LLM tokens per second.")
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="Share of malformed fake JSON responses.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    processes = []
+    api_url = args.api_url
+    try:
+        if not api_url:
+            llm_port, api_port = _free_port(), _free_port()
+            processes.append(subprocess.Popen([
+                sys.executable, "-m", "bench.fake_llm", "--port", str(llm_port),
+                "--latency", str(args.latency), "--token-rate", str(args.token_rate),
+                "--invalid-rate", str(args.invalid_rate), "--seed", str(args.seed)
+            ], cwd=BACKEND_DIR))
+            env = dict(
+                os.environ,
+                DATA_DIR=tempfile.mkdtemp(prefix="astar-bench-"),
+                OLLAMA_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+                OPENROUTER_API_KEY="",
+                STORAGE_BACKEND=args.storage,
+                SQLITE_PATH="",
+                LLM_CACHE_ENABLED="false",
+                TOPIC_CACHE_ENABLED="false",
+                JOB_MAX_CONCURRENCY=str(args.job_concurrency),
+                OLLAMA_MAX_CONCURRENCY=str(args.provider_concurrency),
+            )
+            processes.append(subprocess.Popen([
+                sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port), "--log-level", "warning"
+            ], cwd=BACKEND_DIR, env=env))
+            api_url = f"http://127.0.0.1:{api_port}"
+            asyncio.run(_wait_ready(f"http://127.0.0.1:{llm_port}/v1/models"))
+            print(f"Data directory: {env['DATA_DIR']}")
+        asyncio.run(_wait_ready(api_url + "/"))
+
+        results = asyncio.run(benchmark(api_url, args.requests, args.concurrency))
+        _print_table(results)
+        if args.json_path:
+            Path(args.json_path).write_text(json.dumps({"config": vars(args), "results": results}, indent=2))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,638 @@
+import asyncio
+import contextvars
 import os
+import re
+import time
 import logging
-from openai import OpenAI
+from collections import OrderedDict, deque
+from types import SimpleNamespace
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, Timeout
+from utils.metrics import LLM_CALL_RETRIES, CIRCUIT_OPENED, LLM_QUEUE_WAIT, LLM_HEDGES, LLM_FAILOVERS
+from utils.retry import RetryPolicy, CircuitOpenError, classify_error, time_left, RATE_LIMITED, TRANSIENT, CIRCUIT_OPEN
 
 logger = logging.getLogger(__name__)
 
-def get_client_and_model(provider: str = None, model: str = None):
+# Default number of simultaneous requests a single stage may issue per provider
+DEFAULT_MAX_CONCURRENCY = {
+    "openrouter": 4,
+    "ollama": 2,
+}
+
+# Default number of requests in flight per provider/model across all pipelines
+DEFAULT_MAX_INFLIGHT = {
+    "openrouter": 8,
+    "ollama": 2,
+}
+
+# Process-wide client registry keyed by (provider, base_url) so keep-alive
+# connections are reused across pipelines instead of re-handshaking per roadmap
+_CLIENTS: dict[tuple[str, str], "GuardedClient"] = {}
+
+# Retries for throttled or failed provider calls, before any output is consumed
+CALL_RETRY_POLICY = RetryPolicy.from_env("LLM_CALL", max_retries=3, base_delay=1.0, max_delay=30.0)
+
+def _env_number(name: str, default, cast=int):
+    """Reads a numeric setting from the environment, falling back to default."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}: {value}")
+        return default
+
+class CircuitBreaker:
     """
-    Returns (client, model_name).
-    Supports 'openrouter' and 'ollama'. Falls back to Ollama.
+    Stops calling a provider/model after repeated provider-side failures.
+
+    After failure_threshold consecutive rate-limit or transient errors the
+    circuit opens and calls fail fast with CircuitOpenError. Once
+    reset_seconds have passed a single trial call is let through: success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, key: str, failure_threshold: int, reset_seconds: float):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def check(self) -> bool:
+        """
+        Raises CircuitOpenError unless a call may go ahead. Returns True when
+        the call is the half-open trial; the caller passes that back to
+        release/record_failure so only the trial's owner ends the trial.
+        """
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        remaining = max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(self.key, remaining or self.reset_seconds)
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def release(self, trial: bool):
+        """Ends a call whose outcome said nothing about provider health."""
+        if trial:
+            self._trial_in_flight = False
+
+    def record_failure(self, trial: bool):
+        self._failures += 1
+        if trial or self._failures >= self.failure_threshold:
+            if self._opened_at is None or trial:
+                logger.warning(f"Circuit opened for {self.key} after {self._failures} failure(s)")
+                CIRCUIT_OPENED.inc(key=self.key)
+            self._opened_at = time.monotonic()
+        if trial:
+            self._trial_in_flight = False
+
+_BREAKERS: dict[str, CircuitBreaker] = {}
+
+def get_breaker(provider: str, model: str) -> CircuitBreaker:
+    """Returns the circuit breaker for a provider/model pair."""
+    key = f"{provider}/{model}"
+    breaker = _BREAKERS.get(key)
+    if breaker is None:
+        breaker = _BREAKERS[key] = CircuitBreaker(
+            key,
+            failure_threshold=max(1, _env_number("CIRCUIT_FAILURE_THRESHOLD", 5)),
+            reset_seconds=_env_number("CIRCUIT_RESET_SECONDS", 30.0, float),
+        )
+    return breaker
+
+class TokenBucket:
+    """Continuously refilling budget of `per_minute` units, e.g. requests or tokens."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self._tokens = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available; 0 for an unlimited bucket."""
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        # Oversized requests only wait for a full bucket rather than forever
+        missing = min(amount, self.capacity) - self._tokens
+        return max(0.0, missing * 60 / self.capacity)
+
+    def take(self, amount: float):
+        if self.capacity:
+            self._refill()
+            self._tokens -= amount
+
+    def give_back(self, amount: float):
+        if self.capacity:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+# Fairness key for queued requests; run_pipeline sets it to the roadmap id
+_flow: contextvars.ContextVar[str] = contextvars.ContextVar("llm_flow", default="default")
+
+def set_request_flow(key: str):
+    """Groups the current context's LLM requests for fair queuing, e.g. per roadmap."""
+    _flow.set(key)
+
+class ProviderLimiter:
+    """
+    Admission control for one provider/model, shared by every pipeline.
+
+    A request is admitted when fewer than max_inflight requests are running
+    and the requests-per-minute and tokens-per-minute buckets allow it.
+    Waiting requests are grouped by flow (roadmap) and admitted round-robin,
+    so one large roadmap cannot starve the others. Overload therefore shows
+    up as queueing delay instead of provider 429s and timeouts.
+    """
+
+    def __init__(self, key: str, max_inflight: int, rpm: float, tpm: float):
+        self.key = key
+        self.max_inflight = max(1, max_inflight)
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._inflight = 0
+        self._waiting: OrderedDict[str, deque] = OrderedDict()
+        self._timer: asyncio.TimerHandle = None
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for q in self._waiting.values() for fut, _ in q if not fut.done())
+
+    async def acquire(self, cost: float):
+        """Waits for a slot for a request expected to use `cost` tokens."""
+        flow = _flow.get()
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(flow, deque()).append((future, cost))
+        started = time.perf_counter()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the waiter was cancelled
+                self.release()
+            raise
+        LLM_QUEUE_WAIT.observe(time.perf_counter() - started, key=self.key)
+
+    def release(self, reserved: float = 0, used: float = None):
+        """Frees a slot, settling the token reservation against actual usage if known."""
+        self._inflight -= 1
+        if used is not None and reserved:
+            if used < reserved:
+                self._tokens.give_back(reserved - used)
+            else:
+                self._tokens.take(used - reserved)
+        self._dispatch()
+
+    def _dispatch(self):
+        # Every acquire/release re-dispatches; drop the pending wake-up so
+        # timers do not pile up behind a rate-limited head of queue
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiting and self._inflight < self.max_inflight:
+            flow, queue = next(iter(self._waiting.items()))
+            future, cost = queue[0]
+            if future.done():
+                queue.popleft()
+            else:
+                wait = max(self._requests.wait_time(1), self._tokens.wait_time(cost))
+                if wait > 0:
+                    self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                    return
+                queue.popleft()
+                self._requests.take(1)
+                self._tokens.take(cost)
+                self._inflight += 1
+                future.set_result(None)
+            # Round-robin: the next admission comes from the next flow
+            if queue:
+                self._waiting.move_to_end(flow)
+            else:
+                del self._waiting[flow]
+
+_LIMITERS: dict[str, ProviderLimiter] = {}
+
+def get_limiter(provider: str, model: str) -> ProviderLimiter:
+    """
+    Returns the shared limiter for a provider/model pair, configured by
+    <PROVIDER>_MAX_INFLIGHT, <PROVIDER>_RPM and <PROVIDER>_TPM (0 = unlimited).
+    """
+    key = f"{provider}/{model}"
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        prefix = provider.upper()
+        limiter = _LIMITERS[key] = ProviderLimiter(
+            key,
+            max_inflight=_env_number(f"{prefix}_MAX_INFLIGHT", DEFAULT_MAX_INFLIGHT.get(provider, 4)),
+            rpm=_env_number(f"{prefix}_RPM", 0.0, float),
+            tpm=_env_number(f"{prefix}_TPM", 0.0, float),
+        )
+    return limiter
+
+def _estimate_tokens(kwargs: dict) -> float:
+    """Rough prompt size (~4 characters per token) plus the completion budget."""
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in kwargs.get("messages", []))
+    return prompt_chars / 4 + kwargs.get("max_tokens", 1024)
+
+class _ReleasingStream:
+    """Holds a limiter slot until a streamed completion has been fully read."""
+
+    def __init__(self, stream, limiter: ProviderLimiter, reserved: float):
+        self._stream = stream
+        self._limiter = limiter
+        self._reserved = reserved
+        self._usage = None
+        self._released = False
+        # The limiter belongs to this loop; the finalizer must not touch it from elsewhere
+        self._loop = asyncio.get_running_loop()
+
+    def _release(self):
+        if not self._released:
+            self._released = True
+            used = getattr(self._usage, "total_tokens", None)
+            self._limiter.release(self._reserved, used)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = await self._stream.__anext__()
+        except BaseException:
+            self._release()
+            raise
+        self._usage = getattr(chunk, "usage", None) or self._usage
+        return chunk
+
+    async def close(self):
+        self._release()
+        await self._stream.close()
+
+    def __del__(self):
+        # A stream dropped unread would leak its slot. The garbage collector may
+        # run outside the loop (at shutdown, or on another thread), so hand the
+        # release to the loop instead of dispatching waiters from here.
+        if self._released or self._loop.is_closed():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+class _GuardedCompletions:
+    """
+    chat.completions with shared admission control, call-level retries and
+    a circuit breaker per model.
+    """
+
+    def __init__(self, provider: str, completions):
+        self._provider = provider
+        self._completions = completions
+
+    async def create(self, **kwargs):
+        breaker = get_breaker(self._provider, kwargs.get("model"))
+        limiter = get_limiter(self._provider, kwargs.get("model"))
+        reserved = _estimate_tokens(kwargs)
+        attempt = 0
+        while True:
+            # Wait for a slot first, so a half-open trial is not held while queued
+            await limiter.acquire(reserved)
+            try:
+                trial = breaker.check()
+            except CircuitOpenError:
+                limiter.release()
+                raise
+            try:
+                response = await self._completions.create(**kwargs)
+            except asyncio.CancelledError:
+                limiter.release()
+                breaker.release(trial)
+                raise
+            except Exception as e:
+                limiter.release()
+                kind = classify_error(e)
+                if kind not in (RATE_LIMITED, TRANSIENT):
+                    # Bad requests and similar errors say nothing about provider health
+                    breaker.release(trial)
+                    raise
+                breaker.record_failure(trial)
+                delay = CALL_RETRY_POLICY.delay(attempt, e)
+                left = time_left()
+                if breaker.state == "open" or attempt >= CALL_RETRY_POLICY.max_retries \
+                        or (left is not None and delay >= left):
+                    raise
+                LLM_CALL_RETRIES.inc(provider=self._provider, reason=kind)
+                logger.warning(f"{breaker.key} call failed ({kind}: {e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            breaker.record_success()
+            if kwargs.get("stream"):
+                return _ReleasingStream(response, limiter, reserved)
+            limiter.release(reserved, getattr(getattr(response, "usage", None), "total_tokens", None))
+            return response
+
+class GuardedClient:
+    """
+    Wraps a pooled AsyncOpenAI client so every completion goes through the
+    retry policy and circuit breaker. Other attributes pass straight through.
+    """
+
+    def __init__(self, provider: str, client: AsyncOpenAI):
+        self.provider = provider
+        self.raw = client
+        self.chat = SimpleNamespace(completions=_GuardedCompletions(provider, client.chat.completions))
+
+    def __getattr__(self, name: str):
+        return getattr(self.raw, name)
+
+class _PrefetchedStream:
+    """A completion stream whose first chunk has already been read."""
+
+    def __init__(self, first, stream):
+        self._first = first
+        self._stream = stream
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._first is not None:
+            chunk, self._first = self._first, None
+            return chunk
+        return await self._stream.__anext__()
+
+    async def close(self):
+        await self._stream.close()
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+# Recent latencies per agent and route, used for percentile hedge delays
+_LATENCIES: dict[str, deque] = {}
+
+def _hedge_delay(agent: str, key: str) -> float:
+    """
+    Seconds to wait for a route before hedging, from LLM_HEDGE_<AGENT> (or
+    LLM_HEDGE): a number of seconds, a percentile such as "p95" of that
+    route's recent latency, or "off". Percentiles need LLM_HEDGE_MIN_SAMPLES
+    observations before hedging starts.
+    """
+    setting = os.getenv(f"LLM_HEDGE_{agent.upper()}", os.getenv("LLM_HEDGE", "off")).strip().lower()
+    match = re.fullmatch(r"p(\d{1,2})", setting)
+    if match:
+        samples = sorted(_LATENCIES.get(key, ()))
+        if len(samples) < _env_number("LLM_HEDGE_MIN_SAMPLES", 20):
+            return None
+        return samples[min(len(samples) - 1, len(samples) * int(match.group(1)) // 100)]
+    try:
+        return float(setting) if float(setting) > 0 else None
+    except ValueError:
+        return None
+
+class _RoutedCompletions:
+    """
+    chat.completions over an ordered list of (client, model) targets.
+
+    The first target is tried first. On a rate-limit or transient failure,
+    or an open circuit, the request fails over to the next target; any other
+    error is raised at once, cancelling a hedged duplicate. If a hedge delay is
+    configured and the current target has not answered in time, a
+    duplicate request is sent to the next target; the first answer wins
+    and the other request is cancelled. Streamed requests count as
+    answered once their first chunk arrives.
+    """
+
+    def __init__(self, agent: str, targets: list[tuple["GuardedClient", str]]):
+        self._agent = agent
+        self._targets = targets
+
+    def _key(self, index: int, stream: bool) -> str:
+        client, model = self._targets[index]
+        return f"{self._agent}:{client.provider}/{model}:{'stream' if stream else 'full'}"
+
+    async def _call(self, index: int, kwargs: dict):
+        client, model = self._targets[index]
+        started = time.perf_counter()
+        response = await client.chat.completions.create(**{**kwargs, "model": model})
+        if kwargs.get("stream"):
+            try:
+                first = await response.__anext__()
+            except StopAsyncIteration:
+                first = None
+            response = _PrefetchedStream(first, response)
+        _LATENCIES.setdefault(self._key(index, kwargs.get("stream")), deque(maxlen=200)).append(
+            time.perf_counter() - started
+        )
+        return response
+
+    async def create(self, **kwargs):
+        stream = bool(kwargs.get("stream"))
+        tasks: dict[asyncio.Task, int] = {}
+        next_index = 0
+        hedge_index = None
+        last_error = None
+
+        def launch():
+            nonlocal next_index
+            tasks[asyncio.create_task(self._call(next_index, kwargs))] = next_index
+            next_index += 1
+
+        launch()
+        try:
+            while tasks:
+                delay = None
+                if hedge_index is None and next_index < len(self._targets):
+                    delay = _hedge_delay(self._agent, self._key(next_index - 1, stream))
+                done, _ = await asyncio.wait(tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"{self._agent}: no answer after {delay:.2f}s, hedging to target {next_index}")
+                    LLM_HEDGES.inc(agent=self._agent, outcome="sent")
+                    hedge_index = next_index
+                    launch()
+                    continue
+                for task in done:
+                    index = tasks.pop(task)
+                    if task.exception() is None:
+                        if hedge_index is not None:
+                            LLM_HEDGES.inc(agent=self._agent, outcome="won" if index == hedge_index else "lost")
+                        return task.result()
+                    last_error = task.exception()
+                    if classify_error(last_error) not in (RATE_LIMITED, TRANSIENT, CIRCUIT_OPEN):
+                        # Bad requests, auth errors and the like would fail on every target
+                        raise last_error
+                    logger.warning(f"{self._agent}: target {index} failed ({last_error})")
+                if not tasks and next_index < len(self._targets):
+                    client, model = self._targets[next_index]
+                    LLM_FAILOVERS.inc(agent=self._agent, target=f"{client.provider}/{model}")
+                    launch()
+            raise last_error
+        finally:
+            # Cancel the losing request, and close it if it finished at the same time
+            for task in tasks:
+                task.cancel()
+            for result in await asyncio.gather(*tasks, return_exceptions=True):
+                if isinstance(result, _PrefetchedStream):
+                    await result.close()
+
+class RoutedClient:
+    """
+    Client for one agent that routes completions across a primary and
+    fallback targets. Other attributes resolve to the primary client.
+    """
+
+    def __init__(self, agent: str, targets: list[tuple["GuardedClient", str]]):
+        self.agent = agent
+        self.targets = targets
+        self.chat = SimpleNamespace(completions=_RoutedCompletions(agent, targets))
+
+    def __getattr__(self, name: str):
+        return getattr(self.targets[0][0], name)
+
+def _build_client(base_url: str, api_key: str) -> AsyncOpenAI:
+    """
+    Creates an AsyncOpenAI client backed by a tuned HTTP connection pool.
+    Pool size and timeouts come from LLM_POOL_* and LLM_*_TIMEOUT env vars.
+    """
+    limits = httpx.Limits(
+        max_connections=_env_number("LLM_POOL_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_env_number("LLM_POOL_MAX_KEEPALIVE", 20),
+        keepalive_expiry=_env_number("LLM_POOL_KEEPALIVE_EXPIRY", 60.0, float),
+    )
+    # openai's own Timeout type matches whichever httpx flavour the SDK is built on
+    timeout = Timeout(
+        _env_number("LLM_REQUEST_TIMEOUT", 300.0, float),
+        connect=_env_number("LLM_CONNECT_TIMEOUT", 10.0, float),
+    )
+    return AsyncOpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        timeout=timeout,
+        # Retries are handled by GuardedClient, which also feeds the circuit breaker
+        max_retries=0,
+        http_client=DefaultAsyncHttpxClient(limits=limits),
+    )
+
+def _get_pooled_client(provider: str, base_url: str, api_key: str) -> GuardedClient:
+    """Returns the shared client for a provider/base_url, creating it on first use."""
+    key = (provider, base_url)
+    client = _CLIENTS.get(key)
+    if client is None:
+        logger.info(f"Creating pooled {provider} client for {base_url}")
+        client = GuardedClient(provider, _build_client(base_url, api_key))
+        _CLIENTS[key] = client
+    return client
+
+async def close_clients():
+    """Closes every pooled client and its connections. Called on app shutdown."""
+    clients = list(_CLIENTS.values())
+    _CLIENTS.clear()
+    for client in clients:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close LLM client cleanly: {e}")
+    logger.info(f"Closed {len(clients)} pooled LLM client(s)")
+
+def resolve_provider(provider: str = None) -> str:
+    """
+    Returns the provider that get_client_and_model will actually use,
+    accounting for the fallback to Ollama when no OpenRouter key is set.
     """
     provider = provider or os.getenv("DEFAULT_PROVIDER", "ollama")
-    
-    if provider == "openrouter":
-        openrouter_key = os.getenv("OPENROUTER_API_KEY")
-        if openrouter_key:
-            logger.info("Using OpenRouter client")
-            client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=openrouter_key,
-            )
-            return client, model or os.getenv("OPENROUTER_MODEL", "openai/gpt-oss-20b:free")
+    if provider == "openrouter" and os.getenv("OPENROUTER_API_KEY"):
+        return "openrouter"
+    return "ollama"
+
+def get_max_concurrency(provider: str = None) -> int:
+    """
+    Returns the per-stage concurrency limit for a provider.
+    Configurable through <PROVIDER>_MAX_CONCURRENCY, e.g. OLLAMA_MAX_CONCURRENCY=1.
+    """
+    provider = resolve_provider(provider)
+    return max(1, _env_number(f"{provider.upper()}_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY[provider]))
+
+def _resolve_target(provider: str = None, model: str = None):
+    """Returns (client, model_name) for one provider, falling back to Ollama."""
+    if resolve_provider(provider) == "openrouter":
+        logger.info("Using OpenRouter client")
+        client = _get_pooled_client(
+            "openrouter",
+            "https://openrouter.ai/api/v1",
+            os.getenv("OPENROUTER_API_KEY"),
+        )
+        return client, model or os.getenv("OPENROUTER_MODEL", "openai/gpt-oss-20b:free")
     
     # Default to Ollama
     base_url = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434/v1")
     logger.info(f"Using Ollama client at {base_url}")
-    client = OpenAI(
-        base_url=base_url,
-        api_key="ollama", # Placeholder for ollama
+    client = _get_pooled_client(
+        "ollama",
+        base_url,
+        "ollama", # Placeholder for ollama
     )
     return client, model or os.getenv("OLLAMA_MODEL", "llama3.2:latest")
 
+def _fallback_targets(agent: str) -> list[tuple[GuardedClient, str]]:
+    """
+    Parses LLM_FALLBACK_<AGENT> (or LLM_FALLBACK), a comma-separated list of
+    provider[:model] entries, e.g. "openrouter:openai/gpt-4o-mini,ollama".
+    Entries for providers that are not configured are skipped.
+    """
+    spec = os.getenv(f"LLM_FALLBACK_{agent.upper()}", os.getenv("LLM_FALLBACK", ""))
+    targets = []
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        provider, _, model = entry.partition(":")
+        if resolve_provider(provider) != provider:
+            logger.warning(f"Skipping fallback {entry!r} for {agent}: provider not configured")
+            continue
+        targets.append(_resolve_target(provider, model or None))
+    return targets
+
+def get_client_and_model(provider: str = None, model: str = None, agent: str = None):
+    """
+    Returns (client, model_name).
+    Supports 'openrouter' and 'ollama'. Falls back to Ollama.
+    The client is a shared AsyncOpenAI instance, so agent calls must be awaited
+    and never block the event loop, and callers must not close it.
+
+    When `agent` is given and fallbacks are configured for it, the client is
+    a RoutedClient that fails over and hedges across those targets.
+    """
+    client, model_name = _resolve_target(provider, model)
+    if agent:
+        fallbacks = [t for t in _fallback_targets(agent) if t != (client, model_name)]
+        if fallbacks:
+            return RoutedClient(agent, [(client, model_name)] + fallbacks), model_name
+    return client, model_name
+
 def is_openai_client(client):
     """Since we only use OpenAI-compatible clients now (OpenRouter/Ollama), this is always true."""
-    return isinstance(client, OpenAI)
+    return isinstance(getattr(client, "raw", client), AsyncOpenAI)
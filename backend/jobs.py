@@ -0,0 +1,310 @@
+import asyncio
+import bisect
+import itertools
+import json
+from collections import deque
+import logging
+import os
+import time
+from typing import AsyncGenerator, Optional
+
+from models.roadmap import Roadmap
+from orchestrator import run_pipeline
+from storage.locks import FileLease
+from storage.store import get_store
+from utils.metrics import JOB_QUEUE_DEPTH, JOBS_RUNNING
+
+logger = logging.getLogger(__name__)
+
+# Token deltas kept for subscribers that fall briefly behind; they are never replayed in full
+TOKEN_BACKLOG = 256
+
+def _is_token(event: dict) -> bool:
+    try:
+        return json.loads(event.get("data", "")).get("type") == "token"
+    except (ValueError, AttributeError):
+        return False
+
+# Seconds between attempts to take a run lease held by another worker
+LEASE_POLL_SECONDS = 1.0
+
+def try_run_lease(roadmap_id: str) -> Optional[FileLease]:
+    """
+    Claims the right to run a roadmap's pipeline across worker processes.
+    Returns None while another process (or queue) holds it. Where the lease
+    lives is up to the storage backend.
+    """
+    return get_store().try_run_lease(roadmap_id)
+
+def request_data_for(roadmap: Roadmap, bypass_cache: bool = False, polish_markdown: bool = False) -> dict:
+    """
+    Builds the pipeline configuration from a stored roadmap's spec.
+    bypass_cache and polish_markdown apply to this run only and are never
+    saved on the spec.
+    """
+    return {
+        "goal": roadmap.spec.goal,
+        "skill_level": roadmap.spec.skill_level,
+        "hours_per_week": roadmap.spec.hours_per_week,
+        "provider": roadmap.spec.provider,
+        "model": roadmap.spec.model,
+        "bypass_cache": bypass_cache,
+        "polish_markdown": polish_markdown
+    }
+
+class Job:
+    """
+    A single pipeline run for one roadmap.
+
+    Every event the pipeline yields is buffered, so any number of SSE
+    subscribers can attach at any time, replay what they missed and then
+    follow live events until the job finishes. Token deltas are the
+    exception: they only reach subscribers attached when they are
+    published, so the buffer does not grow with every streamed token.
+    """
+
+    def __init__(self, roadmap_id: str, request_data: dict, refinement: dict = None, priority: int = 0):
+        self.roadmap_id = roadmap_id
+        self.request_data = request_data
+        self.refinement = refinement
+        self.priority = priority
+        self.status = "queued"  # queued | running | done | cancelled
+        self.events: list[dict] = []  # replayable events
+        self._event_seqs: list[int] = []  # publication number of each buffered event
+        self._tokens: deque[tuple[int, dict]] = deque(maxlen=TOKEN_BACKLOG)
+        self._seq = 0
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    async def _publish(self, event: dict):
+        async with self._changed:
+            if _is_token(event):
+                self._tokens.append((self._seq, event))
+            else:
+                self.events.append(event)
+                self._event_seqs.append(self._seq)
+            self._seq += 1
+            self._changed.notify_all()
+
+    async def _finish(self, status: str):
+        async with self._changed:
+            self.status = status
+            self.finished_at = time.time()
+            self._changed.notify_all()
+
+    async def run(self):
+        """Runs the pipeline to completion, buffering its events."""
+        self.status = "running"
+        logger.info(f"Job started for roadmap {self.roadmap_id}")
+        try:
+            async for event in run_pipeline(self.request_data, self.refinement, roadmap_id=self.roadmap_id):
+                await self._publish(event)
+        except asyncio.CancelledError:
+            await self._finish("cancelled")
+            raise
+        await self._finish("done")
+        logger.info(f"Job finished for roadmap {self.roadmap_id}")
+
+    async def wait(self):
+        """Blocks until the job has finished."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.finished)
+
+    async def subscribe(self) -> AsyncGenerator[dict, None]:
+        """
+        Yields all buffered events, then live ones until the job finishes.
+        Token deltas are included from the moment of subscribing.
+        """
+        seen = 0  # publication number of the next event to deliver
+        tokens_from = self._seq
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._seq > seen or self.finished)
+                start = bisect.bisect_left(self._event_seqs, seen)
+                batch = list(zip(self._event_seqs[start:], self.events[start:]))
+                batch += [(seq, event) for seq, event in self._tokens if seq >= max(seen, tokens_from)]
+                batch.sort(key=lambda item: item[0])
+                seen = self._seq
+                done = self.finished
+            for _, event in batch:
+                yield event
+            if done:
+                return
+
+def _job_key(roadmap_id: str, refinement: dict = None) -> tuple:
+    """Identifies equivalent pipeline runs: same roadmap and same refinement payload."""
+    if not refinement:
+        return (roadmap_id, None, None)
+    return (roadmap_id, refinement.get("feedback"), refinement.get("feedback_type"))
+
+class JobQueue:
+    """
+    Priority queue of pipeline jobs drained by a bounded pool of workers.
+
+    Generation no longer depends on an open SSE connection: a dropped tab
+    leaves the job running, and reconnecting replays its buffered events.
+
+    Submissions are single-flight: a duplicate request for a job that is
+    still active (or finished within coalesce_seconds) attaches to it
+    instead of starting another run, and different jobs for the same
+    roadmap run one after another so their checkpoints never race.
+
+    While a roadmap has a queued or running job, the queue holds its run
+    lease, so other worker processes (and crash recovery in them) can see
+    it is taken. A job whose lease is held elsewhere waits for it.
+    """
+
+    def __init__(self, max_concurrency: int, retention_seconds: float, coalesce_seconds: float):
+        self.max_concurrency = max(1, max_concurrency)
+        self.retention_seconds = retention_seconds
+        self.coalesce_seconds = coalesce_seconds
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: list[asyncio.Task] = []
+        self._jobs: dict[tuple, Job] = {}  # by job key, for coalescing
+        self._latest: dict[str, Job] = {}  # most recent job per roadmap
+        self._active: dict[str, Job] = {}  # queued or running job per roadmap
+        self._waiting: dict[str, deque[Job]] = {}  # jobs held back until the active one finishes
+        self._leases: dict[str, FileLease] = {}  # run leases of active (or claimed) roadmaps
+        self._counter = itertools.count()
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self._active.values() if job.status == "running")
+
+    def start(self):
+        """Starts the worker pool on the running event loop."""
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+        logger.info(f"Job queue started with {self.max_concurrency} workers")
+
+    async def stop(self):
+        """Cancels workers; interrupted roadmaps stay at their last checkpoint."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        for lease in self._leases.values():
+            lease.release()
+        self._leases.clear()
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._wait_for_lease(job.roadmap_id)
+                await job.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job for roadmap {job.roadmap_id} crashed: {e}", exc_info=True)
+                await job._finish("done")
+            finally:
+                self._queue.task_done()
+                self._release(job.roadmap_id)
+
+    def _enqueue(self, job: Job):
+        self._active[job.roadmap_id] = job
+        self.claim(job.roadmap_id)
+        self._queue.put_nowait((-job.priority, next(self._counter), job))
+
+    def _release(self, roadmap_id: str):
+        """Marks the roadmap idle and starts the next job held back for it."""
+        self._active.pop(roadmap_id, None)
+        waiting = self._waiting.get(roadmap_id)
+        if waiting:
+            self._enqueue(waiting.popleft())
+            if not waiting:
+                del self._waiting[roadmap_id]
+        else:
+            self.unclaim(roadmap_id)
+
+    def claim(self, roadmap_id: str) -> bool:
+        """
+        Takes the roadmap's run lease for this queue if no other process
+        holds it. Returns True if the queue holds the lease afterwards.
+        """
+        if roadmap_id not in self._leases:
+            lease = try_run_lease(roadmap_id)
+            if lease is None:
+                return False
+            self._leases[roadmap_id] = lease
+        return True
+
+    def unclaim(self, roadmap_id: str):
+        """Releases a claimed lease, unless the roadmap still has an active job."""
+        if roadmap_id in self._active:
+            return
+        lease = self._leases.pop(roadmap_id, None)
+        if lease is not None:
+            lease.release()
+
+    async def _wait_for_lease(self, roadmap_id: str):
+        if self.claim(roadmap_id):
+            return
+        logger.info(f"Roadmap {roadmap_id} is running in another worker; waiting for it to finish")
+        while not self.claim(roadmap_id):
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for key, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self._jobs[key]
+                if self._latest.get(job.roadmap_id) is job:
+                    del self._latest[job.roadmap_id]
+
+    def get(self, roadmap_id: str) -> Optional[Job]:
+        """Returns the most recent job for a roadmap, if still retained."""
+        self._prune()
+        return self._latest.get(roadmap_id)
+
+    def submit(self, roadmap_id: str, request_data: dict, refinement: dict = None, priority: int = 0) -> Job:
+        """
+        Enqueues a pipeline run, or returns the equivalent job already in flight.
+        Higher priority jobs are picked up first; equal priorities run in
+        submission order.
+        """
+        if self._queue is None:
+            self.start()
+        self._prune()
+
+        key = _job_key(roadmap_id, refinement)
+        existing = self._jobs.get(key)
+        if existing is not None and (
+            not existing.finished or time.time() - existing.finished_at < self.coalesce_seconds
+        ):
+            logger.info(f"Coalescing duplicate request into running job for roadmap {roadmap_id}")
+            return existing
+
+        job = Job(roadmap_id, request_data, refinement, priority)
+        self._jobs[key] = job
+        self._latest[roadmap_id] = job
+        if roadmap_id in self._active:
+            # Wait for the current run so both never write checkpoints at once
+            self._waiting.setdefault(roadmap_id, deque()).append(job)
+            logger.info(f"Holding job for roadmap {roadmap_id} until its current run finishes")
+        else:
+            self._enqueue(job)
+            logger.info(f"Queued job for roadmap {roadmap_id} (priority={priority}, depth={self.depth})")
+        return job
+
+job_queue = JobQueue(
+    max_concurrency=int(os.getenv("JOB_MAX_CONCURRENCY", 4)),
+    retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", 600)),
+    coalesce_seconds=float(os.getenv("JOB_COALESCE_SECONDS", 30)),
+)
+JOB_QUEUE_DEPTH.set_function(lambda: job_queue.depth)
+JOBS_RUNNING.set_function(lambda: job_queue.running)
@@ -1,23 +1,48 @@
 import os
+from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
+# Load .env before importing modules that read settings at import time
+load_dotenv()
+
 from utils.logging_config import setup_logging
-from routers import roadmaps, progress
+from routers import roadmaps, progress, cache
+from clients import close_clients
+from jobs import job_queue
+from recovery import start_recovery
+from storage.store import get_store, close_store
+from utils.metrics import render_metrics
 
 # Initialize system configurations
 setup_logging()
-load_dotenv()
 
 # Pre-flight environment check
 if not os.getenv("OLLAMA_BASE_URL") and not os.getenv("OPENROUTER_API_KEY"):
     print("WARNING: Neither OLLAMA_BASE_URL nor OPENROUTER_API_KEY found in environment.")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts the generation worker pool and resumes roadmaps interrupted by a
+    previous shutdown; on shutdown stops both and releases pooled LLM
+    connections and storage handles.
+    """
+    job_queue.start()
+    recovery = start_recovery(get_store(), job_queue)
+    yield
+    recovery.cancel()
+    await job_queue.stop()
+    await close_clients()
+    close_store()
+
 app = FastAPI(
     title="AStarRoadMaps API",
-    description="Backend service for generating and managing personalized learning roadmaps."
+    description="Backend service for generating and managing personalized learning roadmaps.",
+    lifespan=lifespan
 )
 
 # Configure CORS for frontend interaction
@@ -27,17 +52,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
 # Register specialized routers
 app.include_router(roadmaps.router, prefix="/api/roadmaps", tags=["roadmaps"])
 app.include_router(progress.router, prefix="/api/roadmaps", tags=["progress"])
+app.include_router(cache.router, prefix="/api/cache", tags=["cache"])
 
 @app.get("/")
 async def root():
     """Service health check and welcome message."""
     return {"message": "Welcome to the AStarRoadMaps API"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Pipeline, LLM, storage and queue metrics in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     # Start the development server with reload-safe configuration
     uvicorn.run(
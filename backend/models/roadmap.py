@@ -35,6 +35,8 @@ class Roadmap(BaseModel):
     """
     The root data model for a complete learning roadmap.
     Statuses: "pending", "generating", "complete", "error"
+    markdown_source: how the stored markdown was produced, "template" or
+    "polished" (LLM formatter); None for roadmaps saved before it was recorded.
     """
     id: str
     title: str
@@ -42,3 +44,4 @@ class Roadmap(BaseModel):
     phases: List[Phase]
     created_at: str
     status: str = "pending"
+    markdown_source: Optional[str] = None
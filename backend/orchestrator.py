@@ -1,5 +1,7 @@
 import asyncio
 import json
+import os
+import time
 import uuid
 import logging
 from datetime import datetime
@@ -7,23 +9,37 @@ from typing import Callable, Any, AsyncGenerator
 
 from agents.analyst import run_analyst
 from agents.curriculum import run_curriculum
-from agents.resources import run_resources
-from agents.formatter import run_formatter
+from agents.resources import run_resources, PhaseEnricher
+from agents.formatter import run_formatter, render_markdown
+from agents.feedback_classifier import classify_locally
 from models.roadmap import Roadmap
 from models.progress import ProgressState, TopicStatus
-from storage.file_store import save_roadmap, load_roadmap, save_progress, load_progress, save_markdown
-from clients import get_client_and_model
+from storage.store import get_store
+from clients import get_client_and_model, get_max_concurrency, set_request_flow
+from utils.metrics import begin_run, record_llm_call, record_retry, FEEDBACK_CLASSIFICATIONS
+from utils.roadmap_diff import reusable_resources, diff_curriculum
+from utils.retry import RetryPolicy, DeadlineExceeded, classify_error, set_deadline, time_left, FATAL, CIRCUIT_OPEN
 
 logger = logging.getLogger(__name__)
 
-async def retry_with_checkpoint(func: Callable, *args, max_retries: int = 2, **kwargs) -> Any:
+# Stage-level retries; provider throttling is retried per call in clients.GuardedClient
+STAGE_RETRY_POLICY = RetryPolicy.from_env("STAGE", max_retries=2, base_delay=1.0, max_delay=20.0)
+
+async def retry_with_checkpoint(func: Callable, *args, max_retries: int = None, **kwargs) -> Any:
     """
     Executes an agent function with a retry mechanism.
+
+    Failures are classified first: fatal errors (bad credentials, bad
+    requests, unrecognised exceptions) and open circuit breakers fail
+    immediately, while invalid output and transient errors are retried
+    with exponential backoff and jitter, honouring Retry-After. Each
+    attempt is bounded by STAGE_TIMEOUT_SECONDS and by the pipeline
+    deadline, if one is set.
     
     Args:
         func: The agent function (sync or async) to execute.
         *args: Positional arguments for the function.
-        max_retries: Maximum number of retry attempts.
+        max_retries: Maximum number of retry attempts; defaults to STAGE_MAX_RETRIES (2).
         **kwargs: Keyword arguments for the function.
         
     Returns:
@@ -32,23 +48,76 @@ async def retry_with_checkpoint(func: Callable, *args, max_retries: int = 2, **k
     Raises:
         Exception: The last encountered exception if all retries fail.
     """
+    agent = func.__name__.removeprefix("run_")
+    max_retries = STAGE_RETRY_POLICY.max_retries if max_retries is None else max_retries
+    stage_timeout = float(os.getenv("STAGE_TIMEOUT_SECONDS", 300))
     last_error = None
     for attempt in range(max_retries + 1):
+        left = time_left()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded(f"Pipeline deadline reached before {agent} could finish")
+        timeout = stage_timeout if left is None else min(stage_timeout, left)
         try:
             if asyncio.iscoroutinefunction(func):
-                return await func(*args, **kwargs)
+                return await asyncio.wait_for(func(*args, **kwargs), timeout)
             else:
                 return func(*args, **kwargs)
         except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = TimeoutError(f"{agent} attempt exceeded {timeout:.1f}s")
             last_error = e
-            logger.warning(f"Agent execution attempt {attempt + 1} failed: {str(e)}")
-            if attempt < max_retries:
-                await asyncio.sleep(1)
+            kind = classify_error(e)
+            logger.warning(f"Agent execution attempt {attempt + 1} failed ({kind}): {str(e)}")
+            if kind in (FATAL, CIRCUIT_OPEN) or attempt >= max_retries:
+                break
+            delay = STAGE_RETRY_POLICY.delay(attempt, e)
+            left = time_left()
+            if left is not None and delay >= left:
+                break
+            record_retry(agent)
+            await asyncio.sleep(delay)
     
-    logger.error(f"Agent execution failed after {max_retries + 1} attempts.")
+    logger.error(f"Agent execution failed after {attempt + 1} attempt(s).")
     raise last_error
 
-def classify_feedback(client, model_name: str, feedback: str) -> str:
+async def _with_live_events(task: asyncio.Task, live: asyncio.Queue) -> AsyncGenerator[dict, None]:
+    """
+    Yields events pushed onto the live queue while a stage task runs, then
+    any left over once it finishes. The task is cancelled if the consumer
+    stops early.
+    """
+    try:
+        while not task.done():
+            getter = asyncio.ensure_future(live.get())
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        while not live.empty():
+            yield live.get_nowait()
+    finally:
+        if not task.done():
+            task.cancel()
+
+def completed_stage(roadmap: Roadmap) -> str:
+    """
+    Infers the last pipeline stage whose checkpoint was saved for a roadmap.
+
+    Returns:
+        str: "none", "analyst", "curriculum", "resources" or "complete".
+    """
+    if roadmap.status == "complete":
+        return "complete"
+    if roadmap.status == "pending":
+        return "none"
+    if not roadmap.phases:
+        return "analyst"
+    if any(t.resources for p in roadmap.phases for t in p.topics):
+        return "resources"
+    return "curriculum"
+
+async def classify_feedback_llm(client, model_name: str, feedback: str) -> str:
     """
     Uses an LLM to categorize user feedback into predefined types.
     
@@ -66,7 +135,8 @@ def classify_feedback(client, model_name: str, feedback: str) -> str:
         "three categories: 'structure', 'resources', or 'format'. Respond ONLY with the category name."
     )
     
-    response = client.chat.completions.create(
+    started = time.perf_counter()
+    response = await client.chat.completions.create(
         model=model_name,
         messages=[
             {"role": "system", "content": system_prompt},
@@ -74,6 +144,7 @@ def classify_feedback(client, model_name: str, feedback: str) -> str:
         ],
         max_tokens=50,
     )
+    record_llm_call("classifier", started, getattr(response, "usage", None))
     result = response.choices[0].message.content.strip().lower()
     
     logger.info(f"Feedback classified as: {result}")
@@ -82,7 +153,22 @@ def classify_feedback(client, model_name: str, feedback: str) -> str:
             return cat
     return "structure"
 
-async def run_pipeline(request_data: dict, refinement: dict = None) -> AsyncGenerator[dict, None]:
+async def classify_feedback(client, model_name: str, feedback: str) -> str:
+    """
+    Categorizes user feedback with the local rule-based classifier, and
+    asks the LLM only when the rules are not confident enough
+    (FEEDBACK_CLASSIFIER_THRESHOLD, default 0.6; 0 never calls the LLM).
+    """
+    category, confidence = classify_locally(feedback)
+    threshold = float(os.getenv("FEEDBACK_CLASSIFIER_THRESHOLD", 0.6))
+    if confidence >= threshold:
+        FEEDBACK_CLASSIFICATIONS.inc(source="rules")
+        logger.info(f"Feedback classified locally as: {category} (confidence {confidence})")
+        return category
+    FEEDBACK_CLASSIFICATIONS.inc(source="llm")
+    return await classify_feedback_llm(client, model_name, feedback)
+
+async def run_pipeline(request_data: dict, refinement: dict = None, roadmap_id: str = None) -> AsyncGenerator[dict, None]:
     """
     Main orchestrator for the roadmap generation pipeline.
     
@@ -92,25 +178,78 @@ async def run_pipeline(request_data: dict, refinement: dict = None) -> AsyncGene
     Args:
         request_data: Configuration for the generation (goal, provider, model, etc.).
         refinement: Optional dictionary containing refinement feedback and roadmap ID.
+        roadmap_id: ID of the roadmap to build or resume; a new one is created when omitted.
         
     Yields:
         Server-Sent Events (SSE) as dictionaries to update the client on progress.
+        Besides agent_start/agent_done, partial results are streamed as they
+        arrive: phase_ready for each validated curriculum phase,
+        topic_resources for each enriched topic, and token deltas from the
+        LLM formatter. Refinements that regenerate the curriculum also emit
+        a reuse event with how many topics kept their resources.
     """
-    roadmap_id = refinement["roadmap_id"] if refinement else str(uuid.uuid4())
+    roadmap_id = roadmap_id or (refinement["roadmap_id"] if refinement else str(uuid.uuid4()))
     logger.info(f"Starting pipeline for Roadmap ID: {roadmap_id}")
     
-    client, model_name = get_client_and_model(
-        provider=request_data.get("provider"),
-        model=request_data.get("model")
-    )
+    # Per-agent routing: fallbacks and hedging come from LLM_FALLBACK_<AGENT> / LLM_HEDGE_<AGENT>
+    routes = {
+        agent: get_client_and_model(
+            provider=request_data.get("provider"),
+            model=request_data.get("model"),
+            agent=agent
+        )
+        for agent in ("analyst", "curriculum", "resources", "formatter")
+    }
+    model_name = routes["analyst"][1]
     logger.info(f"Using provider: {request_data.get('provider')} | Model: {model_name}")
+    store = get_store()
+
+    # Cached responses are skipped on request, and for the stage a refinement targets
+    bypass_cache = bool(request_data.get("bypass_cache"))
+    feedback_type = refinement["feedback_type"] if refinement else None
+
+    # Per-stage wall time, tokens and retries, reported on agent_done events
+    timings = begin_run()
+    # Bounds every stage attempt and provider retry in this run
+    set_deadline(float(os.getenv("PIPELINE_TIMEOUT_SECONDS", 1800)))
+    # Shared provider slots are handed out round-robin across roadmaps
+    set_request_flow(roadmap_id)
 
     def emit(event_type: str, **kwargs) -> dict:
         return {"data": json.dumps({"type": event_type, **kwargs})}
 
+    # Partial results produced inside a stage, flushed to the client while it runs
+    live: asyncio.Queue = asyncio.Queue()
+    announced_phases: dict[int, dict] = {}
+
+    def announce_phase(index: int, phase: dict):
+        if announced_phases.get(index) != phase:
+            announced_phases[index] = phase
+            live.put_nowait(emit("phase_ready", index=index, phase=phase))
+
+    def announce_resources(index: int, phase: dict):
+        for topic in phase.get("topics", []):
+            live.put_nowait(emit(
+                "topic_resources", phase_index=index, phase_number=phase.get("phase_number"),
+                topic=topic.get("name"), resources=topic.get("resources", [])
+            ))
+
+    # Enriches phases while the curriculum is still streaming, so the two stages overlap
+    enricher = PhaseEnricher(
+        *routes["resources"],
+        max_concurrency=get_max_concurrency(request_data.get("provider")),
+        bypass_cache=bypass_cache or feedback_type == "resources",
+        on_enriched=announce_resources
+    )
+
+    def on_phase(index: int, phase: dict):
+        enricher.submit(index, phase)
+        announce_phase(index, phase)
+    streaming = os.getenv("PIPELINE_STREAMING", "true").lower() == "true"
+
     try:
         try:
-            roadmap = load_roadmap(roadmap_id)
+            roadmap = store.load_roadmap(roadmap_id)
             spec = roadmap.spec
             roadmap_dict = roadmap.model_dump()
             logger.info(f"Resuming/Refining existing roadmap {roadmap_id}")
@@ -119,18 +258,30 @@ async def run_pipeline(request_data: dict, refinement: dict = None) -> AsyncGene
             spec = None
             roadmap_dict = {}
 
-        if not spec:
+        # An interrupted run picks up after its last saved checkpoint
+        resumed_stage = completed_stage(roadmap) if roadmap and roadmap.status == "generating" and not refinement else None
+        if resumed_stage:
+            logger.info(f"Resuming roadmap {roadmap_id} after stage: {resumed_stage}")
+
+        # A "pending" roadmap only holds the raw request saved by /generate
+        if not spec or roadmap.status == "pending":
             logger.info("Step: Analyst")
             yield emit("agent_start", agent="analyst")
+            timings.start("analyst")
             spec = await retry_with_checkpoint(
                 run_analyst,
-                client, 
-                model_name,
+                *routes["analyst"],
                 request_data["goal"], 
                 request_data["skill_level"], 
-                request_data["hours_per_week"]
+                request_data["hours_per_week"],
+                bypass_cache=bypass_cache
             )
-            yield emit("agent_done", agent="analyst")
+            # Keep the generation options chosen by the user rather than model defaults
+            spec = spec.model_copy(update={
+                k: request_data[k] for k in ("provider", "model")
+                if request_data.get(k) is not None
+            })
+            yield emit("agent_done", agent="analyst", timings=timings.finish("analyst"))
             
             temp_roadmap = Roadmap(
                 id=roadmap_id,
@@ -140,62 +291,96 @@ async def run_pipeline(request_data: dict, refinement: dict = None) -> AsyncGene
                 created_at=datetime.utcnow().isoformat(),
                 status="generating"
             )
-            save_roadmap(temp_roadmap)
+            store.save_roadmap(temp_roadmap)
             logger.info("Checkpoint saved: Analyst")
 
-        if not refinement or refinement["feedback_type"] == "structure" or not roadmap_dict.get("phases"):
+        # Lets the resources stage reuse topics already enriched for other roadmaps
+        enricher.skill_level = spec.skill_level
+
+        if resumed_stage in ("curriculum", "resources") and roadmap_dict.get("phases"):
+            logger.info("Skipping Curriculum, resuming from checkpoint.")
+        elif not refinement or refinement["feedback_type"] == "structure" or not roadmap_dict.get("phases"):
             logger.info("Step: Curriculum")
+            # Topics a structure refinement leaves unchanged keep their resources
+            previous_phases = roadmap_dict.get("phases") or []
+            enricher.reuse = reusable_resources(previous_phases) if refinement else {}
             yield emit("agent_start", agent="curriculum")
-            roadmap_dict = await retry_with_checkpoint(
+            timings.start("curriculum")
+            task = asyncio.create_task(retry_with_checkpoint(
                 run_curriculum, 
-                client, model_name, spec, 
-                refinement["feedback"] if refinement else None
-            )
-            yield emit("agent_done", agent="curriculum")
+                *routes["curriculum"], spec, 
+                refinement["feedback"] if refinement else None,
+                bypass_cache=bypass_cache or feedback_type == "structure",
+                on_phase=on_phase if streaming else None
+            ))
+            async for event in _with_live_events(task, live):
+                yield event
+            roadmap_dict = task.result()
+            # Cached or non-streamed curricula arrive whole
+            for index, phase in enumerate(roadmap_dict["phases"]):
+                announce_phase(index, phase)
+            while not live.empty():
+                yield live.get_nowait()
+            yield emit("agent_done", agent="curriculum", timings=timings.finish("curriculum"))
+            if enricher.reuse:
+                diff = diff_curriculum(previous_phases, roadmap_dict["phases"])
+                logger.info(f"Refinement reuses {diff['topics_reused']}/{diff['topics_total']} topics")
+                yield emit("reuse", **diff)
             
             temp_roadmap = Roadmap(
                 id=roadmap_id,
                 created_at=datetime.utcnow().isoformat(),
                 spec=spec,
-                **{k: v for k, v in roadmap_dict.items() if k not in ["id", "created_at", "spec"]},
+                **{k: v for k, v in roadmap_dict.items() if k not in ["id", "created_at", "spec", "status"]},
                 status="generating"
             )
-            save_roadmap(temp_roadmap)
+            store.save_roadmap(temp_roadmap)
             logger.info("Checkpoint saved: Curriculum")
         else:
             logger.info("Skipping Curriculum, using checkpoint data.")
 
         has_resources = any(t.get("resources") for p in roadmap_dict.get("phases", []) for t in p.get("topics", []))
-        if not refinement or refinement["feedback_type"] in ("structure", "resources") or not has_resources:
+        if resumed_stage == "resources" and has_resources:
+            logger.info("Skipping Resources, resuming from checkpoint.")
+        elif not refinement or refinement["feedback_type"] in ("structure", "resources") or not has_resources:
             logger.info("Step: Resources")
             yield emit("agent_start", agent="resources")
-            roadmap_dict = await retry_with_checkpoint(run_resources, client, model_name, roadmap_dict)
-            yield emit("agent_done", agent="resources")
+            timings.start("resources")
+            task = asyncio.create_task(retry_with_checkpoint(
+                run_resources,
+                *routes["resources"], roadmap_dict,
+                enricher=enricher
+            ))
+            async for event in _with_live_events(task, live):
+                yield event
+            roadmap_dict = task.result()
+            yield emit("agent_done", agent="resources", timings=timings.finish("resources"))
             
             temp_roadmap = Roadmap(
                 id=roadmap_id,
                 created_at=datetime.utcnow().isoformat(),
                 spec=spec,
-                **{k: v for k, v in roadmap_dict.items() if k not in ["id", "created_at", "spec"]},
+                **{k: v for k, v in roadmap_dict.items() if k not in ["id", "created_at", "spec", "status"]},
                 status="generating"
             )
-            save_roadmap(temp_roadmap)
+            store.save_roadmap(temp_roadmap)
             logger.info("Checkpoint saved: Resources")
         else:
              logger.info("Skipping Resources, using checkpoint data.")
 
         logger.info("Step: Formatter")
         yield emit("agent_start", agent="formatter")
+        timings.start("formatter")
         
         roadmap = Roadmap(
             id=roadmap_id, 
             created_at=datetime.utcnow().isoformat(), 
             spec=spec,
-            **{k: v for k, v in roadmap_dict.items() if k not in ["id", "created_at", "spec"]}
+            **{k: v for k, v in roadmap_dict.items() if k not in ["id", "created_at", "spec", "status"]}
         )
         
         try:
-            progress = load_progress(roadmap_id)
+            progress = store.load_progress(roadmap_id)
             existing_topics = progress.topics.copy()
             new_topics = {}
             for phase in roadmap.phases:
@@ -208,13 +393,28 @@ async def run_pipeline(request_data: dict, refinement: dict = None) -> AsyncGene
                 topics={t.name: TopicStatus.not_started for p in roadmap.phases for t in p.topics}
             )
             
-        markdown = await retry_with_checkpoint(run_formatter, client, model_name, roadmap, progress)
-        yield emit("agent_done", agent="formatter")
+        # The template renderer is the default; the LLM formatter is an opt-in polish pass
+        polish = request_data.get("polish_markdown") or feedback_type == "format"
+        if polish:
+            task = asyncio.create_task(retry_with_checkpoint(
+                run_formatter,
+                *routes["formatter"], roadmap, progress,
+                bypass_cache=bypass_cache or feedback_type == "format",
+                on_token=lambda delta: live.put_nowait(emit("token", agent="formatter", delta=delta))
+            ))
+            async for event in _with_live_events(task, live):
+                yield event
+            markdown = task.result()
+        else:
+            markdown = render_markdown(roadmap, progress)
+        yield emit("agent_done", agent="formatter", timings=timings.finish("formatter"))
 
         roadmap.status = "complete"
-        save_roadmap(roadmap)
-        save_progress(progress)
-        save_markdown(roadmap_id, markdown)
+        # Progress updates re-render template markdown only, never a polished one
+        roadmap.markdown_source = "polished" if polish else "template"
+        store.save_roadmap(roadmap)
+        store.save_progress(progress)
+        store.save_markdown(roadmap_id, markdown)
         logger.info(f"Roadmap {roadmap_id} completed and saved.")
 
         yield emit("complete", roadmap_id=roadmap_id)
@@ -222,3 +422,5 @@ async def run_pipeline(request_data: dict, refinement: dict = None) -> AsyncGene
     except Exception as e:
         logger.error(f"Pipeline failed at checkpoint: {str(e)}", exc_info=True)
         yield emit("error", message=str(e))
+    finally:
+        enricher.cancel()
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+from jobs import JobQueue, request_data_for
+from orchestrator import completed_stage
+from storage.base import RoadmapStore
+
+logger = logging.getLogger(__name__)
+
+def _age_seconds(created_at: str) -> float:
+    """Seconds since a checkpoint timestamp (naive UTC ISO), or 0 if unparseable."""
+    try:
+        return (datetime.utcnow() - datetime.fromisoformat(created_at)).total_seconds()
+    except (TypeError, ValueError):
+        return 0.0
+
+async def recover_interrupted(store: RoadmapStore, queue: JobQueue, max_age_seconds: float,
+                              max_concurrency: int, min_idle_seconds: float = 60) -> int:
+    """
+    Resumes roadmaps left "pending" or "generating" by a previous process.
+
+    Each roadmap is re-queued at low priority and the pipeline continues
+    after its last saved checkpoint. At most max_concurrency recovered jobs
+    are in the queue at once, so a backlog of interrupted roadmaps does not
+    crowd out new requests. Roadmaps whose last checkpoint is older than
+    max_age_seconds are marked "error" instead.
+
+    Every worker process runs this at startup, so a roadmap is only resumed
+    after claiming its run lease: roadmaps another live worker has queued
+    or is generating are skipped. Roadmaps checkpointed less than
+    min_idle_seconds ago are re-checked once they have been idle that long,
+    and skipped if a checkpoint landed in the meantime.
+
+    Returns:
+        int: The number of roadmaps re-queued.
+    """
+    candidates = store.list_roadmaps(status="pending") + store.list_roadmaps(status="generating")
+    if not candidates:
+        return 0
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def resume(roadmap):
+        idle_wait = min_idle_seconds - _age_seconds(roadmap.created_at)
+        if idle_wait > 0:
+            await asyncio.sleep(idle_wait)
+        async with semaphore:
+            # Skip roadmaps a client already picked up since the scan
+            if queue.get(roadmap.id) is not None:
+                return False
+            if not queue.claim(roadmap.id):
+                logger.info(f"Roadmap {roadmap.id} is being generated by another worker; not resuming it")
+                return False
+            # Re-read under the lease: another worker may have finished or advanced it since the scan
+            try:
+                current = store.load_roadmap(roadmap.id)
+            except FileNotFoundError:
+                current = None
+            if current is None or current.status not in ("pending", "generating") or current.created_at != roadmap.created_at:
+                queue.unclaim(roadmap.id)
+                return False
+            logger.info(f"Recovering roadmap {roadmap.id} after stage: {completed_stage(roadmap)}")
+            job = queue.submit(roadmap.id, request_data_for(roadmap), priority=-1)
+            await job.wait()
+            return True
+
+    tasks = []
+    for item in candidates:
+        try:
+            roadmap = store.load_roadmap(item["id"])
+        except FileNotFoundError:
+            continue
+        if roadmap.status not in ("pending", "generating"):
+            continue
+
+        if _age_seconds(roadmap.created_at) > max_age_seconds:
+            if queue.claim(roadmap.id):
+                roadmap.status = "error"
+                store.save_roadmap(roadmap)
+                queue.unclaim(roadmap.id)
+                logger.warning(f"Marked stale roadmap {roadmap.id} as error (last checkpoint {roadmap.created_at})")
+            continue
+
+        tasks.append(resume(roadmap))
+
+    resumed = sum(1 for started in await asyncio.gather(*tasks) if started)
+    logger.info(f"Crash recovery finished: {resumed} roadmap(s) resumed")
+    return resumed
+
+def start_recovery(store: RoadmapStore, queue: JobQueue) -> asyncio.Task:
+    """Runs recover_interrupted in the background with settings from the environment."""
+    return asyncio.create_task(recover_interrupted(
+        store, queue,
+        max_age_seconds=float(os.getenv("RECOVERY_MAX_AGE_SECONDS", 86400)),
+        max_concurrency=int(os.getenv("RECOVERY_MAX_CONCURRENCY", 2)),
+        min_idle_seconds=float(os.getenv("RECOVERY_MIN_IDLE_SECONDS", 60))
+    ))
@@ -0,0 +1,17 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter
+from storage.topic_cache import topic_cache
+
+router = APIRouter()
+
+@router.delete("/topics")
+async def invalidate_topic_resources(topic: Optional[str] = None, skill_level: Optional[str] = None,
+                                     model: Optional[str] = None):
+    """
+    Drops cached topic resources matching every given filter, e.g. one
+    topic across all models; with no filters the whole cache is cleared.
+    The cache directory is listed in a worker thread, off the event loop.
+    """
+    removed = await asyncio.to_thread(topic_cache.invalidate, topic, skill_level, model)
+    return {"removed": removed}
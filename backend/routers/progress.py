@@ -1,23 +1,57 @@
+from typing import Optional
 from fastapi import APIRouter, HTTPException
-from models.progress import ProgressState
-from schemas.requests import UpdateProgressRequest
-from storage.file_store import load_progress, save_progress
+from agents.formatter import render_markdown
+from models.progress import ProgressState, TopicStatus
+from models.roadmap import Roadmap
+from schemas.requests import UpdateProgressRequest, BatchUpdateProgressRequest
+from storage.store import get_store
 
 router = APIRouter()
 
+def _parse_changes(updates: list[UpdateProgressRequest]) -> dict[str, TopicStatus]:
+    """Validates requested statuses; later entries for the same topic win."""
+    try:
+        return {u.topic_name: TopicStatus(u.status) for u in updates}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def _rerender(roadmap: Roadmap, progress: ProgressState) -> Optional[str]:
+    """
+    Keeps exported template markdown in sync with the new status. Polished
+    (LLM formatted) markdown is left alone rather than replaced by the template.
+    """
+    if roadmap.status != "complete" or roadmap.markdown_source != "template":
+        return None
+    return render_markdown(roadmap, progress)
+
+def _apply_changes(roadmap_id: str, changes: dict[str, TopicStatus]) -> ProgressState:
+    try:
+        return get_store().update_progress(roadmap_id, changes, render=_rerender)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Roadmap not found")
+
 @router.get("/{roadmap_id}/progress")
 async def get_progress(roadmap_id: str) -> ProgressState:
     try:
-        return load_progress(roadmap_id)
+        return get_store().load_progress(roadmap_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Progress not found")
 
+@router.get("/{roadmap_id}/progress/history")
+async def get_progress_history(roadmap_id: str) -> list[dict]:
+    """
+    Returns the timeline of topic status changes, oldest first.
+    """
+    return get_store().load_progress_history(roadmap_id)
+
 @router.patch("/{roadmap_id}/progress")
 async def update_progress(roadmap_id: str, body: UpdateProgressRequest) -> ProgressState:
-    try:
-        progress = load_progress(roadmap_id)
-        progress.topics[body.topic_name] = body.status
-        save_progress(progress)
-        return progress
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return _apply_changes(roadmap_id, _parse_changes([body]))
+
+@router.patch("/{roadmap_id}/progress/batch")
+async def update_progress_batch(roadmap_id: str, body: BatchUpdateProgressRequest) -> ProgressState:
+    """
+    Applies many topic status changes in one atomic write, e.g. marking a
+    whole phase done or syncing changes made while offline.
+    """
+    return _apply_changes(roadmap_id, _parse_changes(body.updates))
@@ -1,23 +1,29 @@
+import json
 import uuid
 from datetime import datetime
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import TypeAdapter
 from sse_starlette.sse import EventSourceResponse
 
 from clients import get_client_and_model
 from models.roadmap import Roadmap
 from models.spec import UserSpec
 from schemas.requests import GenerateRequest, RefineRequest
-from schemas.responses import GenerateResponse, RoadmapListItem
-from storage.file_store import save_roadmap, load_roadmap, list_roadmaps, DATA_DIR, delete_roadmap
-from orchestrator import run_pipeline, classify_feedback
+from schemas.responses import GenerateResponse, RoadmapListItem, RoadmapSearchResponse
+from storage.store import get_store
+from storage.roadmap_cache import hot_roadmaps
+from utils.http_cache import CachedBody, cached_response
+from orchestrator import classify_feedback
+from jobs import job_queue, request_data_for
 
 router = APIRouter()
 
+_LIST_ADAPTER = TypeAdapter(list[RoadmapListItem])
+
 @router.post("/generate")
 async def generate(body: GenerateRequest) -> GenerateResponse:
     """
-    Initiates the generation of a new roadmap. 
+    Initiates the generation of a new roadmap by queueing a background job.
     Returns a unique roadmap ID that the client can use to stream the actual content.
     """
     roadmap_id = str(uuid.uuid4())
@@ -37,29 +43,48 @@ async def generate(body: GenerateRequest) -> GenerateResponse:
         created_at=datetime.utcnow().isoformat(),
         status="pending"
     )
-    save_roadmap(roadmap)
+    get_store().save_roadmap(roadmap)
+    job_queue.submit(roadmap_id, request_data_for(roadmap, body.bypass_cache, body.polish_markdown), priority=body.priority)
     
     return GenerateResponse(roadmap_id=roadmap_id)
 
+@router.get("/search")
+async def search_roadmaps(
+    q: str = Query(..., min_length=1, max_length=200),
+    status: str = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+) -> RoadmapSearchResponse:
+    """
+    Ranks the roadmap library against a full-text query over titles, goals,
+    phases, topics, subtopics and resource labels. Every query word must
+    match; results are paginated with limit/offset.
+    """
+    items, total = get_store().search_roadmaps(q, status=status, limit=limit, offset=offset)
+    next_offset = offset + len(items) if offset + len(items) < total else None
+    return RoadmapSearchResponse(items=items, total=total, next_offset=next_offset)
+
+async def _completed(roadmap: Roadmap):
+    """The single event a finished run ends with, carrying the stored roadmap."""
+    yield {"data": json.dumps({"type": "complete", "roadmap_id": roadmap.id,
+                               "roadmap": roadmap.model_dump(mode="json")})}
+
 @router.get("/{roadmap_id}/stream")
-async def stream(roadmap_id: str, feedback: str = None, feedback_type: str = None):
+async def stream(roadmap_id: str, feedback: str = None, feedback_type: str = None, bypass_cache: bool = False,
+                 polish_markdown: bool = False):
     """
     Provides a Server-Sent Events (SSE) stream for real-time roadmap generation updates.
-    Can handle both new generations and refinement requests.
+    Subscribes to the roadmap's background job, replaying events emitted so far.
+    Refinement requests, and unfinished roadmaps without a job (e.g. after a
+    restart), queue a new job first; duplicate requests attach to the job in
+    flight. A plain reconnect to a complete roadmap whose job has expired
+    gets its stored result instead of a new run.
     """
     try:
-        roadmap = load_roadmap(roadmap_id)
+        roadmap = get_store().load_roadmap(roadmap_id)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Roadmap not found")
     
-    request_data = {
-        "goal": roadmap.spec.goal,
-        "skill_level": roadmap.spec.skill_level,
-        "hours_per_week": roadmap.spec.hours_per_week,
-        "provider": roadmap.spec.provider,
-        "model": roadmap.spec.model
-    }
-    
     refinement = None
     if feedback and feedback_type:
         refinement = {
@@ -68,27 +93,52 @@ async def stream(roadmap_id: str, feedback: str = None, feedback_type: str = Non
             "feedback_type": feedback_type
         }
     
-    return EventSourceResponse(run_pipeline(request_data, refinement))
+    # Plain reconnects follow the latest job; submit() coalesces duplicate runs
+    job = None if refinement else job_queue.get(roadmap_id)
+    if job is None and not refinement and roadmap.status == "complete":
+        return EventSourceResponse(_completed(roadmap))
+    if job is None:
+        job = job_queue.submit(roadmap_id, request_data_for(roadmap, bypass_cache, polish_markdown), refinement)
+    
+    return EventSourceResponse(job.subscribe())
 
-@router.get("/{roadmap_id}")
-async def get_roadmap(roadmap_id: str) -> Roadmap:
+@router.get("/{roadmap_id}", response_model=Roadmap)
+async def get_roadmap(roadmap_id: str, request: Request):
     """
     Retrieves the full structured data for a specific roadmap.
+    Recently read roadmaps are served from their cached serialized form
+    while the stored version is unchanged; clients revalidating with
+    If-None-Match or If-Modified-Since get a 304.
     """
-    try:
-        return load_roadmap(roadmap_id)
-    except FileNotFoundError:
+    store = get_store()
+    stamp = store.roadmap_stamp(roadmap_id)
+    if stamp is None:
         raise HTTPException(status_code=404, detail="Roadmap not found")
+    version, modified = stamp
+    entry = hot_roadmaps.get(roadmap_id, version)
+    if entry is None:
+        try:
+            roadmap = store.load_roadmap(roadmap_id)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Roadmap not found")
+        # Tagged with the version read before loading, so a concurrent save only costs a miss
+        entry = CachedBody(roadmap.model_dump_json().encode("utf-8"), "application/json", modified)
+        hot_roadmaps.set(roadmap_id, version, entry)
+    return cached_response(request, entry)
 
 @router.get("/{roadmap_id}/markdown")
-async def get_markdown(roadmap_id: str):
+async def get_markdown(roadmap_id: str, request: Request):
     """
     Serves the generated roadmap as a downloadable markdown file.
     """
-    path = DATA_DIR / f"{roadmap_id}.md"
-    if not path.exists():
+    content = get_store().load_markdown(roadmap_id)
+    if not content:
         raise HTTPException(status_code=404, detail="Markdown version not found")
-    return FileResponse(path, media_type="text/markdown", filename="roadmap.md")
+    return cached_response(
+        request,
+        CachedBody(content.encode("utf-8"), "text/markdown"),
+        headers={"Content-Disposition": 'attachment; filename="roadmap.md"'}
+    )
 
 @router.patch("/{roadmap_id}/refine")
 async def refine(roadmap_id: str, body: RefineRequest):
@@ -96,16 +146,17 @@ async def refine(roadmap_id: str, body: RefineRequest):
     Analyzes user feedback for a roadmap and prepares it for a refinement stream.
     """
     try:
-        roadmap = load_roadmap(roadmap_id)
+        roadmap = get_store().load_roadmap(roadmap_id)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Roadmap not found")
 
     client, model_name = get_client_and_model(
         provider=roadmap.spec.provider,
-        model=roadmap.spec.model
+        model=roadmap.spec.model,
+        agent="classify"
     )
         
-    feedback_type = classify_feedback(client, model_name, body.feedback)
+    feedback_type = await classify_feedback(client, model_name, body.feedback)
     
     return {
         "roadmap_id": roadmap_id, 
@@ -119,15 +170,27 @@ async def remove_roadmap(roadmap_id: str):
     Permanently deletes a roadmap and all its associated data files.
     """
     try:
-        load_roadmap(roadmap_id)
-        delete_roadmap(roadmap_id)
+        get_store().load_roadmap(roadmap_id)
+        get_store().delete_roadmap(roadmap_id)
         return {"message": "Roadmap deleted successfully"}
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Roadmap not found")
 
 @router.get("", response_model=list[RoadmapListItem])
-async def list_all_roadmaps():
+async def list_all_roadmaps(
+    request: Request,
+    status: str = None,
+    limit: int = Query(None, ge=1, le=500),
+    cursor: str = None
+):
     """
-    Lists all saved roadmaps for the user's library.
+    Lists saved roadmaps for the user's library, newest first.
+    When limit is set, the cursor for the next page is returned in the
+    X-Next-Cursor header. Unchanged listings revalidate with a 304.
     """
-    return list_roadmaps()
+    try:
+        items, next_cursor = get_store().list_roadmaps_page(status=status, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    body = CachedBody(_LIST_ADAPTER.dump_json(_LIST_ADAPTER.validate_python(items)), "application/json")
+    return cached_response(request, body, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
@@ -7,6 +7,9 @@ class GenerateRequest(BaseModel):
     hours_per_week: int
     provider: str = "ollama" # "anthropic" | "openrouter" | "ollama"
     model: str = "llama3.2:latest"
+    bypass_cache: bool = False # Force fresh LLM calls instead of cached responses
+    polish_markdown: bool = False # Use the LLM formatter instead of the template renderer
+    priority: int = 0 # Higher values are picked from the job queue first
 
 class RefineRequest(BaseModel):
     feedback: str
@@ -14,3 +17,6 @@ class RefineRequest(BaseModel):
 class UpdateProgressRequest(BaseModel):
     topic_name: str
     status: str  # "not_started" | "in_progress" | "done"
+
+class BatchUpdateProgressRequest(BaseModel):
+    updates: list[UpdateProgressRequest]
@@ -9,3 +9,11 @@ class RoadmapListItem(BaseModel):
     created_at: str
     status: str
     topic_count: int
+
+class RoadmapSearchItem(RoadmapListItem):
+    score: float
+
+class RoadmapSearchResponse(BaseModel):
+    items: list[RoadmapSearchItem]
+    total: int
+    next_offset: int | None = None
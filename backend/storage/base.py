@@ -0,0 +1,109 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, Optional, Protocol
+from models.roadmap import Roadmap
+from models.progress import ProgressState, TopicStatus
+from storage.locks import FileLease
+
+class RoadmapStore(Protocol):
+    """
+    Storage interface the routers and orchestrator depend on.
+    Implementations: FileStore (storage/file_store.py) and SQLiteStore
+    (storage/sqlite_store.py). Select one with STORAGE_BACKEND.
+    """
+
+    def save_roadmap(self, roadmap: Roadmap): ...
+
+    def load_roadmap(self, roadmap_id: str) -> Roadmap:
+        """Raises FileNotFoundError if the roadmap does not exist."""
+        ...
+
+    def roadmap_stamp(self, roadmap_id: str) -> Optional[tuple[str, Optional[datetime]]]:
+        """
+        Cheap change marker for a stored roadmap, without loading it:
+        (version, last modified time), or None if it does not exist. The
+        version changes on every save.
+        """
+        ...
+
+    def save_progress(self, progress: ProgressState): ...
+
+    def load_progress(self, roadmap_id: str) -> ProgressState:
+        """Returns a new, empty ProgressState if none has been saved."""
+        ...
+
+    def update_progress(self, roadmap_id: str, changes: dict[str, TopicStatus],
+                        render: Callable[[Roadmap, ProgressState], Optional[str]] = None) -> ProgressState:
+        """
+        Atomically applies topic status changes in a single write and returns
+        the new state. If render is given it is called, under the same lock,
+        with the stored roadmap and the new progress; a returned string is
+        saved as the roadmap's markdown. Raises FileNotFoundError if render is
+        given and the roadmap does not exist.
+        """
+        ...
+
+    def load_progress_history(self, roadmap_id: str) -> list[dict]:
+        """Returns recorded status changes ({"at", "topic", "status"}), oldest first."""
+        ...
+
+    def save_markdown(self, roadmap_id: str, content: str): ...
+
+    def load_markdown(self, roadmap_id: str) -> str:
+        """Returns an empty string if no markdown has been saved."""
+        ...
+
+    def list_roadmaps_page(self, status: str = None, limit: int = None,
+                           cursor: str = None) -> tuple[list[dict], Optional[str]]: ...
+
+    def list_roadmaps(self, status: str = None) -> list[dict]: ...
+
+    def search_roadmaps(self, query: str, status: str = None, limit: int = 20,
+                        offset: int = 0) -> tuple[list[dict], int]:
+        """
+        Full-text search over titles, goals, phase titles, topics, subtopics
+        and resource labels. Returns (items, total): one page of listing
+        fields plus a "score", best first, and the number of matches.
+        """
+        ...
+
+    def delete_roadmap(self, roadmap_id: str): ...
+
+    def try_run_lease(self, roadmap_id: str) -> Optional[FileLease]:
+        """
+        Takes the cross-process lease on running a roadmap's pipeline, held
+        until released. Returns None while another worker holds it. Every
+        worker sharing this store must resolve the same lease file.
+        """
+        ...
+
+    def close(self): ...
+
+def summarize_roadmap(data: dict) -> dict:
+    """Extracts the library listing fields from a roadmap dictionary."""
+    return {
+        "id": data.get("id"),
+        "title": data.get("title"),
+        "created_at": data.get("created_at") or "",
+        "status": data.get("status"),
+        # Calculate total topics across all phases
+        "topic_count": sum(len(phase.get("topics", [])) for phase in data.get("phases", []))
+    }
+
+def encode_cursor(created_at: str, roadmap_id: str) -> str:
+    """Builds the opaque pagination cursor for a listing position."""
+    return base64.urlsafe_b64encode(json.dumps([created_at, roadmap_id]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """
+    Parses a cursor produced by encode_cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        created_at, roadmap_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(created_at), str(roadmap_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
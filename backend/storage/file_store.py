@@ -1,20 +1,69 @@
+import bisect
 import json
 import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
 from models.roadmap import Roadmap
-from models.progress import ProgressState
+from models.progress import ProgressState, TopicStatus
+from storage.base import summarize_roadmap, encode_cursor, decode_cursor
+from storage.locks import FileLease, file_lock, try_file_lock
+from storage.search_index import InvertedIndex, search_document, weigh_terms
+from storage.roadmap_cache import hot_roadmaps
 
-# Define persistent storage location
-DATA_DIR = Path(__file__).parent.parent / "data"
-DATA_DIR.mkdir(exist_ok=True)
+# Define persistent storage location (DATA_DIR overrides it, e.g. for benchmarks)
+DATA_DIR = Path(os.getenv("DATA_DIR") or Path(__file__).parent.parent / "data")
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+# Library metadata index, kept in memory and persisted as an AppendLog of
+# upsert/delete records, so listing never has to parse every roadmap file
+INDEX_FILENAME = "roadmap_index.log"
+_index: dict[str, dict] = {}
+_index_keys: list[tuple[str, str]] = []  # (created_at, id), ascending
+
+# Full-text search index: each roadmap's weighted terms in an in-memory
+# inverted index, persisted the same way
+SEARCH_INDEX_FILENAME = "search_index.log"
+_search_index = InvertedIndex()
+
+LOCKS_DIR = "locks"
+
+# Progress event log settings; the log is compacted into the snapshot past this size
+PROGRESS_LOG_COMPACT_BYTES = int(os.getenv("PROGRESS_LOG_COMPACT_BYTES", 64 * 1024))
+PROGRESS_CACHE_SIZE = 1024
+# roadmap_id -> (snapshot mtime, log offset, replayed state)
+_progress_cache: OrderedDict[str, tuple[int, int, ProgressState]] = OrderedDict()
+
+def _atomic_write(path: Path, content: str):
+    """
+    Writes content to a temp file and renames it over path, so readers never
+    see a partially written file.
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def roadmap_lock(roadmap_id: str):
+    """Returns a cross-process lock guarding read-modify-write of one roadmap's files."""
+    return file_lock(DATA_DIR / LOCKS_DIR / f"{roadmap_id}.lock")
+
+def try_run_lease(roadmap_id: str) -> Optional[FileLease]:
+    """Takes the lease on running a roadmap's pipeline, or returns None while another worker holds it."""
+    return try_file_lock(DATA_DIR / LOCKS_DIR / f"{roadmap_id}.run.lock")
 
 def save_roadmap(roadmap: Roadmap):
     """
     Serializes and saves a roadmap to a JSON file.
     """
     path = DATA_DIR / f"{roadmap.id}.json"
-    with open(path, "w") as f:
-        f.write(roadmap.model_dump_json(indent=2))
+    _atomic_write(path, roadmap.model_dump_json(indent=2))
+    hot_roadmaps.invalidate(roadmap.id)
+    data = roadmap.model_dump()
+    _index_log.append(_index_record(data))
+    _search_log.append(_search_record(data))
 
 def load_roadmap(roadmap_id: str) -> Roadmap:
     """
@@ -30,32 +79,178 @@ def load_roadmap(roadmap_id: str) -> Roadmap:
         data = json.load(f)
         return Roadmap(**data)
 
+def roadmap_stamp(roadmap_id: str) -> Optional[tuple[str, datetime]]:
+    """
+    Returns (version, modified time) of a roadmap file from a single stat,
+    or None if it does not exist. Saves replace the file, so the inode
+    changes even when two writes land within one mtime tick.
+    """
+    try:
+        stat = os.stat(DATA_DIR / f"{roadmap_id}.json")
+    except FileNotFoundError:
+        return None
+    version = f"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    return version, datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+
+def _progress_paths(data_dir: Path, roadmap_id: str) -> tuple[Path, Path, Path]:
+    """Returns the (snapshot, event log, compacted history) paths for a roadmap."""
+    return (
+        data_dir / f"{roadmap_id}_progress.json",
+        data_dir / f"{roadmap_id}_progress.log",
+        data_dir / f"{roadmap_id}_progress_history.log",
+    )
+
+def _read_events(path: Path, offset: int = 0) -> tuple[list[dict], int]:
+    """
+    Reads complete event lines from path starting at a byte offset.
+    Returns the events and the offset just past the last complete line.
+    """
+    events = []
+    if not path.exists():
+        return events, offset
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Partially written event; pick it up on the next read
+                break
+            offset += len(line)
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+    return events, offset
+
+def _apply_events(progress: ProgressState, events: list[dict]):
+    for event in events:
+        try:
+            progress.topics[event["topic"]] = TopicStatus(event["status"])
+        except (KeyError, ValueError):
+            continue
+
+def _replay_progress(data_dir: Path, roadmap_id: str) -> tuple[ProgressState, int]:
+    snapshot_path, log_path, _ = _progress_paths(data_dir, roadmap_id)
+    if snapshot_path.exists():
+        with open(snapshot_path, "r") as f:
+            progress = ProgressState(**json.load(f))
+    else:
+        progress = ProgressState(roadmap_id=roadmap_id)
+    events, offset = _read_events(log_path)
+    _apply_events(progress, events)
+    return progress, offset
+
+def read_progress(data_dir: Path, roadmap_id: str) -> ProgressState:
+    """
+    Rebuilds progress from the snapshot plus the event log in data_dir,
+    without using the in-memory cache.
+    """
+    return _replay_progress(data_dir, roadmap_id)[0]
+
+def read_progress_history(data_dir: Path, roadmap_id: str) -> list[dict]:
+    """Returns every recorded status change for a roadmap, oldest first."""
+    _, log_path, history_path = _progress_paths(data_dir, roadmap_id)
+    return _read_events(history_path)[0] + _read_events(log_path)[0]
+
+def _progress_log_mode() -> bool:
+    return os.getenv("PROGRESS_STORAGE", "log").lower() == "log"
+
 def save_progress(progress: ProgressState):
     """
     Saves the user's progress for a specific roadmap.
+    Writes a full snapshot and folds any pending events into the history.
     """
-    path = DATA_DIR / f"{progress.roadmap_id}_progress.json"
-    with open(path, "w") as f:
-        f.write(progress.model_dump_json(indent=2))
+    with roadmap_lock(progress.roadmap_id):
+        _write_snapshot(progress)
+
+def _write_snapshot(progress: ProgressState):
+    """Writes a snapshot and archives the event log. Caller must hold the roadmap lock."""
+    snapshot_path, log_path, history_path = _progress_paths(DATA_DIR, progress.roadmap_id)
+    _atomic_write(snapshot_path, progress.model_dump_json())
+    if log_path.exists():
+        with open(log_path, "rb") as src, open(history_path, "ab") as dst:
+            dst.write(src.read())
+        os.remove(log_path)
+    _progress_cache.pop(progress.roadmap_id, None)
 
 def load_progress(roadmap_id: str) -> ProgressState:
     """
     Retrieves progress data for a roadmap, falling back to a new state if none exists.
+    
+    State is cached in memory and only events appended since the last read
+    are replayed, including ones written by other worker processes.
     """
-    path = DATA_DIR / f"{roadmap_id}_progress.json"
-    if not path.exists():
-        return ProgressState(roadmap_id=roadmap_id)
-    with open(path, "r") as f:
-        data = json.load(f)
-        return ProgressState(**data)
+    snapshot_path, log_path, _ = _progress_paths(DATA_DIR, roadmap_id)
+    snapshot_mtime = snapshot_path.stat().st_mtime_ns if snapshot_path.exists() else 0
+    log_size = log_path.stat().st_size if log_path.exists() else 0
+
+    cached = _progress_cache.get(roadmap_id)
+    if cached is None or cached[0] != snapshot_mtime or log_size < cached[1]:
+        progress, offset = _replay_progress(DATA_DIR, roadmap_id)
+    else:
+        progress = cached[2]
+        offset = cached[1]
+        if log_size > offset:
+            events, offset = _read_events(log_path, offset)
+            _apply_events(progress, events)
+
+    _progress_cache[roadmap_id] = (snapshot_mtime, offset, progress)
+    _progress_cache.move_to_end(roadmap_id)
+    while len(_progress_cache) > PROGRESS_CACHE_SIZE:
+        _progress_cache.popitem(last=False)
+    return progress.model_copy(deep=True)
+
+def update_progress(roadmap_id: str, changes: dict[str, TopicStatus],
+                    render: Callable[[Roadmap, ProgressState], Optional[str]] = None) -> ProgressState:
+    """
+    Applies topic status changes atomically and writes the result once.
+    
+    The write runs under a per-roadmap lock, so concurrent updates from other
+    requests or worker processes are never lost. In the default "log" mode
+    (PROGRESS_STORAGE) the changes are appended as events, and the log is
+    compacted into a snapshot once it exceeds PROGRESS_LOG_COMPACT_BYTES.
+    Markdown from render is saved under the same lock, so it always matches
+    the progress written last.
+    """
+    with roadmap_lock(roadmap_id):
+        roadmap = load_roadmap(roadmap_id) if render else None
+        progress = _update_progress_locked(roadmap_id, changes)
+        if render:
+            markdown = render(roadmap, progress)
+            if markdown is not None:
+                save_markdown(roadmap_id, markdown)
+        return progress
+
+def _update_progress_locked(roadmap_id: str, changes: dict[str, TopicStatus]) -> ProgressState:
+    if not _progress_log_mode():
+        progress = load_progress(roadmap_id)
+        progress.topics.update(changes)
+        _write_snapshot(progress)
+        return progress
+
+    _, log_path, _ = _progress_paths(DATA_DIR, roadmap_id)
+    at = datetime.now(timezone.utc).isoformat()
+    lines = "".join(
+        json.dumps({"at": at, "topic": topic, "status": TopicStatus(status).value}) + "\n"
+        for topic, status in changes.items()
+    )
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(lines)
+
+    progress = load_progress(roadmap_id)
+    if _progress_cache[roadmap_id][1] > PROGRESS_LOG_COMPACT_BYTES:
+        _write_snapshot(progress)
+    return progress
+
+def load_progress_history(roadmap_id: str) -> list[dict]:
+    """Returns the timeline of topic status changes for a roadmap."""
+    return read_progress_history(DATA_DIR, roadmap_id)
 
 def save_markdown(roadmap_id: str, content: str):
     """
     Persists the generated markdown version of the roadmap.
     """
     path = DATA_DIR / f"{roadmap_id}.md"
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
+    _atomic_write(path, content)
 
 def load_markdown(roadmap_id: str) -> str:
     """
@@ -67,30 +262,287 @@ def load_markdown(roadmap_id: str) -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
-def list_roadmaps() -> list[dict]:
+def _read_log_header(f) -> tuple[Optional[str], int]:
     """
-    Aggregates metadata for all stored roadmaps for display in the library.
+    Reads the generation header of an open log. Returns the generation id
+    (None for logs written before headers existed) and the header's length.
+    """
+    first = f.readline()
+    try:
+        record = json.loads(first)
+    except ValueError:
+        record = None
+    if isinstance(record, dict) and record.get("op") == "generation" and first.endswith("\n"):
+        return record.get("id"), len(first.encode("utf-8"))
+    return None, 0
+
+class AppendLog:
+    """
+    An append-only log of JSON records, replayed into in-memory state that
+    each worker process keeps for itself.
+
+    Appends and compaction run under a cross-process lock, so no worker's
+    record lands between another's catch-up and append, or is dropped by a
+    rewrite. Compaction rewrites the log as a snapshot of the state under a
+    new generation, named in its first line; readers that find a different
+    generation or inode replay it from the start.
+
+    Args:
+        path: The log file.
+        apply: Applies one record to the in-memory state.
+        reset: Empties the in-memory state.
+        snapshot: Returns records that recreate the current state.
+        scan: Returns records that rebuild the state from the roadmap files.
+        size: Returns the number of live entries in the state.
     """
-    roadmaps = []
+
+    def __init__(self, path: Path, apply: Callable[[dict], None], reset: Callable[[], None],
+                 snapshot: Callable[[], Iterable[dict]], scan: Callable[[], Iterable[dict]],
+                 size: Callable[[], int]):
+        self.path = path
+        self._apply = apply
+        self._reset = reset
+        self._snapshot = snapshot
+        self._scan = scan
+        self._size = size
+        self._offset = 0
+        self._records = 0
+        self._loaded = False
+        self._generation: Optional[str] = None
+        self._inode = 0
+
+    def lock(self):
+        """Cross-process lock serializing appends to and compaction of the log."""
+        return file_lock(DATA_DIR / LOCKS_DIR / f"{self.path.name}.lock")
+
+    def _clear(self):
+        self._reset()
+        self._offset = 0
+        self._records = 0
+        self._loaded = False
+
+    def _apply_record(self, record: dict):
+        self._records += 1
+        self._apply(record)
+
+    def sync(self, locked: bool = False):
+        """
+        Loads the state on first use and replays records appended since the
+        last read, including ones written by other worker processes.
+
+        Args:
+            locked: The caller already holds the log's lock.
+        """
+        if not self.path.exists():
+            if locked:
+                self._rebuild()
+            else:
+                with self.lock():
+                    self.sync(locked=True)
+            return
+        stat = self.path.stat()
+        if self._loaded and stat.st_ino == self._inode and stat.st_size == self._offset:
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            generation, header_size = _read_log_header(f)
+            if not self._loaded or generation != self._generation or stat.st_size < self._offset:
+                # First load, or the log was compacted elsewhere; replay it from the start
+                self._clear()
+                self._generation = generation
+                self._offset = header_size
+            self._inode = stat.st_ino
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    # Partially written record; pick it up on the next sync
+                    break
+                self._offset += len(line.encode("utf-8"))
+                try:
+                    self._apply_record(json.loads(line))
+                except (ValueError, KeyError):
+                    continue
+        self._loaded = True
+
+    def append(self, record: dict):
+        """Appends a record to the log and applies it in memory."""
+        line = json.dumps(record) + "\n"
+        with self.lock():
+            self.sync(locked=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._offset += len(line.encode("utf-8"))
+            self._apply_record(record)
+            # Compact once superseded records clearly outnumber live entries
+            if self._records > 2 * self._size() + 1000:
+                self._write()
+
+    def _write(self):
+        """Replaces the log with a new generation holding a snapshot. Callers hold the lock."""
+        generation = uuid.uuid4().hex
+        lines = [json.dumps({"op": "generation", "id": generation})]
+        lines.extend(json.dumps(record) for record in self._snapshot())
+        _atomic_write(self.path, "\n".join(lines) + "\n")
+        stat = self.path.stat()
+        self._generation = generation
+        self._inode = stat.st_ino
+        self._offset = stat.st_size
+        self._records = self._size()
+
+    def rebuild(self) -> int:
+        """
+        Rebuilds the state and the log from the roadmap files on disk.
+
+        Returns:
+            The number of live entries.
+        """
+        with self.lock():
+            return self._rebuild()
+
+    def _rebuild(self) -> int:
+        self._clear()
+        for record in self._scan():
+            self._apply_record(record)
+        self._write()
+        self._loaded = True
+        return self._size()
+
+def _scan_roadmaps(to_record: Callable[[dict], dict]) -> Iterator[dict]:
+    """Yields a log record for each readable roadmap file in DATA_DIR."""
     for file in DATA_DIR.glob("*.json"):
-        # Skip progress files during listing
+        # Skip progress files during indexing
         if file.name.endswith("_progress.json"):
             continue
         try:
             with open(file, "r") as f:
                 data = json.load(f)
-                # Calculate total topics across all phases
-                topic_count = sum(len(phase['topics']) for phase in data.get('phases', []))
-                roadmaps.append({
-                    "id": data.get("id"),
-                    "title": data.get("title"),
-                    "created_at": data.get("created_at"),
-                    "status": data.get("status"),
-                    "topic_count": topic_count
-                })
+            if not data.get("id"):
+                continue
+            record = to_record(data)
         except Exception:
             continue
-    return sorted(roadmaps, key=lambda x: x["created_at"], reverse=True)
+        yield record
+
+def _index_record(data: dict) -> dict:
+    return {"op": "upsert", "item": summarize_roadmap(data)}
+
+def _apply_index_record(record: dict):
+    if record.get("op") == "delete":
+        item = _index.pop(record.get("id"), None)
+        if item is not None:
+            key = (item["created_at"], item["id"])
+            pos = bisect.bisect_left(_index_keys, key)
+            if pos < len(_index_keys) and _index_keys[pos] == key:
+                del _index_keys[pos]
+    elif record.get("op") == "upsert":
+        item = record["item"]
+        old = _index.get(item["id"])
+        if old is not None and old["created_at"] != item["created_at"]:
+            _apply_index_record({"op": "delete", "id": old["id"]})
+            old = None
+        if old is None:
+            bisect.insort(_index_keys, (item["created_at"], item["id"]))
+        _index[item["id"]] = item
+
+def _reset_index():
+    _index.clear()
+    _index_keys.clear()
+
+_index_log = AppendLog(
+    DATA_DIR / INDEX_FILENAME, _apply_index_record, _reset_index,
+    snapshot=lambda: ({"op": "upsert", "item": item} for item in _index.values()),
+    scan=lambda: _scan_roadmaps(_index_record),
+    size=lambda: len(_index),
+)
+
+def rebuild_index() -> int:
+    """
+    Rebuilds the library index from the roadmap files on disk.
+    
+    Returns:
+        The number of roadmaps indexed.
+    """
+    return _index_log.rebuild()
+
+def list_roadmaps_page(status: str = None, limit: int = None, cursor: str = None) -> tuple[list[dict], Optional[str]]:
+    """
+    Returns one page of library metadata, newest first, from the index.
+    
+    Args:
+        status: Only include roadmaps with this status.
+        limit: Maximum number of items; all remaining items when None.
+        cursor: Opaque cursor returned by the previous page.
+        
+    Returns:
+        A tuple of (items, next_cursor); next_cursor is None on the last page.
+        
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    _index_log.sync()
+    end = len(_index_keys)
+    if cursor:
+        end = bisect.bisect_left(_index_keys, decode_cursor(cursor))
+
+    items = []
+    for pos in range(end - 1, -1, -1):
+        item = _index[_index_keys[pos][1]]
+        if status and item["status"] != status:
+            continue
+        if limit is not None and len(items) == limit:
+            return items, encode_cursor(items[-1]["created_at"], items[-1]["id"])
+        items.append(dict(item))
+    return items, None
+
+def list_roadmaps(status: str = None) -> list[dict]:
+    """
+    Aggregates metadata for all stored roadmaps for display in the library.
+    """
+    return list_roadmaps_page(status=status)[0]
+
+def _search_record(data: dict) -> dict:
+    return {"op": "upsert", "id": data["id"], "terms": weigh_terms(search_document(data))}
+
+def _apply_search_record(record: dict):
+    if record.get("op") == "delete":
+        _search_index.remove(record.get("id"))
+    elif record.get("op") == "upsert":
+        _search_index.add(record["id"], record["terms"])
+
+_search_log = AppendLog(
+    DATA_DIR / SEARCH_INDEX_FILENAME, _apply_search_record, _search_index.clear,
+    snapshot=lambda: (
+        {"op": "upsert", "id": doc_id, "terms": _search_index.terms(doc_id)} for doc_id in _search_index.doc_ids()
+    ),
+    scan=lambda: _scan_roadmaps(_search_record),
+    size=lambda: len(_search_index),
+)
+
+def rebuild_search_index() -> int:
+    """
+    Rebuilds the full-text search index from the roadmap files on disk.
+    
+    Returns:
+        The number of roadmaps indexed.
+    """
+    return _search_log.rebuild()
+
+def search_roadmaps(query: str, status: str = None, limit: int = 20, offset: int = 0) -> tuple[list[dict], int]:
+    """
+    Ranks roadmaps against a full-text query.
+    
+    Returns:
+        A tuple of (items, total): library metadata plus a relevance score
+        for one page of results, best first, and the number of matches.
+    """
+    _index_log.sync()
+    _search_log.sync()
+
+    def accept(roadmap_id: str) -> bool:
+        item = _index.get(roadmap_id)
+        return item is not None and (not status or item["status"] == status)
+
+    page, total = _search_index.search(query, limit=limit, offset=offset, accept=accept)
+    return [{**_index[roadmap_id], "score": score} for roadmap_id, score in page], total
 
 def delete_roadmap(roadmap_id: str):
     """
@@ -98,9 +550,72 @@ def delete_roadmap(roadmap_id: str):
     """
     files_to_delete = [
         DATA_DIR / f"{roadmap_id}.json",
-        DATA_DIR / f"{roadmap_id}_progress.json",
+        *_progress_paths(DATA_DIR, roadmap_id),
         DATA_DIR / f"{roadmap_id}.md"
     ]
+    # Lock files stay: unlinking one another process holds or has open would
+    # let the next locker create a new inode and hold "the same" lock twice
     for path in files_to_delete:
         if path.exists():
             os.remove(path)
+    _progress_cache.pop(roadmap_id, None)
+    hot_roadmaps.invalidate(roadmap_id)
+    _index_log.append({"op": "delete", "id": roadmap_id})
+    _search_log.append({"op": "delete", "id": roadmap_id})
+
+class FileStore:
+    """
+    RoadmapStore implementation backed by loose JSON/Markdown files in DATA_DIR.
+    """
+
+    def save_roadmap(self, roadmap: Roadmap):
+        save_roadmap(roadmap)
+
+    def load_roadmap(self, roadmap_id: str) -> Roadmap:
+        return load_roadmap(roadmap_id)
+
+    def roadmap_stamp(self, roadmap_id: str) -> Optional[tuple[str, datetime]]:
+        return roadmap_stamp(roadmap_id)
+
+    def save_progress(self, progress: ProgressState):
+        save_progress(progress)
+
+    def load_progress(self, roadmap_id: str) -> ProgressState:
+        return load_progress(roadmap_id)
+
+    def update_progress(self, roadmap_id: str, changes: dict[str, TopicStatus],
+                        render: Callable[[Roadmap, ProgressState], Optional[str]] = None) -> ProgressState:
+        return update_progress(roadmap_id, changes, render)
+
+    def load_progress_history(self, roadmap_id: str) -> list[dict]:
+        return load_progress_history(roadmap_id)
+
+    def save_markdown(self, roadmap_id: str, content: str):
+        save_markdown(roadmap_id, content)
+
+    def load_markdown(self, roadmap_id: str) -> str:
+        return load_markdown(roadmap_id)
+
+    def list_roadmaps_page(self, status: str = None, limit: int = None,
+                           cursor: str = None) -> tuple[list[dict], Optional[str]]:
+        return list_roadmaps_page(status=status, limit=limit, cursor=cursor)
+
+    def list_roadmaps(self, status: str = None) -> list[dict]:
+        return list_roadmaps(status=status)
+
+    def search_roadmaps(self, query: str, status: str = None, limit: int = 20,
+                        offset: int = 0) -> tuple[list[dict], int]:
+        return search_roadmaps(query, status=status, limit=limit, offset=offset)
+
+    def delete_roadmap(self, roadmap_id: str):
+        delete_roadmap(roadmap_id)
+
+    def try_run_lease(self, roadmap_id: str) -> Optional[FileLease]:
+        return try_run_lease(roadmap_id)
+
+    def close(self):
+        pass
+
+if __name__ == "__main__":
+    print(f"Indexed {rebuild_index()} roadmaps in {DATA_DIR}")
+    print(f"Search-indexed {rebuild_search_index()} roadmaps")
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from storage.file_store import DATA_DIR
+from utils.metrics import CACHE_LOOKUPS, CACHE_STORES, CACHE_EVICTIONS
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = DATA_DIR / "llm_cache"
+# Replaced on every delete, so other processes know to drop their memory tier
+GENERATION_FILENAME = ".generation"
+
+def make_cache_key(model_name: str, system_prompt: str, user_message: str, **params) -> str:
+    """
+    Builds a content-addressed key for an LLM request.
+    Any change to the model, prompt file contents, user message or request
+    parameters (max_tokens, response_format, ...) yields a different key.
+    """
+    payload = json.dumps(
+        {"model": model_name, "system": system_prompt, "user": user_message, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    """
+    Two-tier cache for raw LLM responses.
+
+    The memory tier is an LRU capped at max_entries. The disk tier stores one
+    JSON file per key under cache_dir and is pruned oldest-first past
+    max_disk_entries. Entries older than ttl seconds are treated as misses.
+
+    The disk tier is shared by every worker process, the memory tier is not.
+    delete() and clear() therefore replace a generation marker file in
+    cache_dir, and each process drops its memory tier when it sees the
+    marker change, so deletions reach the other workers on their next get().
+    """
+
+    def __init__(self, name: str, cache_dir: Path, ttl: float, max_entries: int, max_disk_entries: int,
+                 enabled: bool = True):
+        self.name = name  # The "cache" label on the cache metrics
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.enabled = enabled
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        # Files on disk, counted once and then tracked, so writes need not list the directory
+        self._disk_count: Optional[int] = None
+        self._generation = self._read_generation()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    @property
+    def _marker(self) -> Path:
+        return self.cache_dir / GENERATION_FILENAME
+
+    def _read_generation(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(self._marker)
+        except OSError:
+            return None
+        # Replacing the marker always yields a new inode
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _bump_generation(self):
+        """Tells other processes that entries they may hold in memory were deleted."""
+        tmp = self.cache_dir / f"{GENERATION_FILENAME}.{os.getpid()}.tmp"
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(str(time.time()), encoding="utf-8")
+            os.replace(tmp, self._marker)
+        except OSError as e:
+            logger.warning(f"Failed to update cache generation in {self.cache_dir}: {e}")
+        self._generation = self._read_generation()
+
+    def _sync_generation(self):
+        """Drops the memory tier if another process has deleted entries since it was filled."""
+        generation = self._read_generation()
+        if generation != self._generation:
+            self._memory.clear()
+            self._generation = generation
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached content for key, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        self._sync_generation()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not self._expired(entry[0]):
+                self._memory.move_to_end(key)
+                CACHE_LOOKUPS.inc(cache=self.name, result="memory")
+                return entry[1]
+            del self._memory[key]
+
+        path = self._path(key)
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if not self._expired(data["created_at"]):
+                    self._remember(key, data["created_at"], data["content"])
+                    CACHE_LOOKUPS.inc(cache=self.name, result="disk")
+                    return data["content"]
+                os.remove(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Discarding unreadable cache entry {key}: {e}")
+
+        CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+        return None
+
+    def set(self, key: str, content: str):
+        """Stores content in both tiers."""
+        if not self.enabled or not content:
+            return
+        created_at = time.time()
+        self._remember(key, created_at, content)
+        CACHE_STORES.inc(cache=self.name)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            is_new = not path.exists()
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"created_at": created_at, "content": content}, f)
+            if self._disk_count is None:
+                self._disk_count = sum(1 for _ in self.cache_dir.glob("*.json"))
+            elif is_new:
+                self._disk_count += 1
+            if self._disk_count > self.max_disk_entries:
+                self._prune_disk()
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {e}")
+
+    def _remember(self, key: str, created_at: float, content: str):
+        self._memory[key] = (created_at, content)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            CACHE_EVICTIONS.inc(cache=self.name, tier="memory")
+
+    def _prune_disk(self):
+        files = list(self.cache_dir.glob("*.json"))
+        self._disk_count = len(files)
+        excess = len(files) - self.max_disk_entries
+        if excess <= 0:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for path in files[:excess]:
+            try:
+                os.remove(path)
+                CACHE_EVICTIONS.inc(cache=self.name, tier="disk")
+            except OSError:
+                continue
+        self._disk_count = len(files) - excess
+
+    def delete(self, *keys: str) -> int:
+        """Removes entries from both tiers, in every process; returns how many existed."""
+        removed = 0
+        for key in keys:
+            found = self._memory.pop(key, None) is not None
+            try:
+                os.remove(self._path(key))
+                found = True
+                if self._disk_count:
+                    self._disk_count -= 1
+            except OSError:
+                pass
+            removed += found
+        if keys:
+            self._bump_generation()
+        return removed
+
+    def keys(self, prefix: str = "") -> list[str]:
+        """Keys of the entries on disk starting with prefix, listed without reading them."""
+        return [path.stem for path in self.cache_dir.glob(f"{prefix}*.json")]
+
+    def items(self, prefix: str = ""):
+        """Yields (key, content) for every unexpired entry on disk whose key starts with prefix."""
+        for path in self.cache_dir.glob(f"{prefix}*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not self._expired(data.get("created_at", 0)):
+                yield path.stem, data.get("content")
+
+    def clear(self):
+        """Drops every entry from both tiers."""
+        self._memory.clear()
+        self._disk_count = None
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+        self._bump_generation()
+
+llm_cache = LLMCache(
+    "llm",
+    cache_dir=CACHE_DIR,
+    ttl=float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600)),
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 256)),
+    max_disk_entries=int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", 5000)),
+    enabled=os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true",
+)
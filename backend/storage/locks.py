@@ -0,0 +1,89 @@
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_thread_locks: dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+def _thread_lock(key: str) -> threading.Lock:
+    with _registry_lock:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = _thread_locks[key] = threading.Lock()
+        return lock
+
+@contextmanager
+def file_lock(path: Path):
+    """
+    Holds an exclusive lock on path for the duration of the block.
+    
+    Serializes threads in this process and other processes (e.g. several
+    uvicorn workers) that lock the same file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _thread_lock(str(path)):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+class FileLease:
+    """An exclusive file lock taken without blocking and held until release()."""
+
+    def __init__(self, fd: int):
+        self._fd = fd
+
+    def release(self):
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+def try_file_lock(path: Path) -> Optional[FileLease]:
+    """
+    Takes an exclusive lock on path if nobody else holds it, including other
+    handles in this process. Unlike file_lock it never waits, and the lease
+    can outlive a block (e.g. a whole async job). A crashed holder's lock is
+    released by the OS.
+
+    Returns:
+        The lease, or None if the lock is held elsewhere.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return None
+    return FileLease(fd)
@@ -0,0 +1,71 @@
+"""
+Imports an existing file-store data directory into a SQLite database.
+
+Usage (from backend/):
+    python -m storage.migrate [--data-dir data] [--db data/roadmaps.db]
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+from models.roadmap import Roadmap
+from storage import file_store
+from storage.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+def migrate(data_dir: Path, db_path: Path) -> dict:
+    """
+    Copies every roadmap, progress record (snapshot plus event log) and
+    markdown file into SQLite. Existing rows with the same id are
+    overwritten, so the import can be re-run; progress history is only
+    imported for roadmaps that have none yet.
+    
+    Returns:
+        Counts of imported roadmaps, progress records, markdown files and skipped files.
+    """
+    store = SQLiteStore(db_path)
+    counts = {"roadmaps": 0, "progress": 0, "markdown": 0, "skipped": 0}
+    try:
+        progress_ids = set()
+        for path in data_dir.glob("*.json"):
+            if path.name.endswith("_progress.json"):
+                progress_ids.add(path.name[:-len("_progress.json")])
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    store.save_roadmap(Roadmap(**json.load(f)))
+                counts["roadmaps"] += 1
+            except Exception as e:
+                logger.warning(f"Skipping {path.name}: {e}")
+                counts["skipped"] += 1
+
+        progress_ids.update(p.name[:-len("_progress.log")] for p in data_dir.glob("*_progress.log"))
+        for roadmap_id in progress_ids:
+            try:
+                store.save_progress(file_store.read_progress(data_dir, roadmap_id))
+                if not store.load_progress_history(roadmap_id):
+                    store.import_progress_history(roadmap_id, file_store.read_progress_history(data_dir, roadmap_id))
+                counts["progress"] += 1
+            except Exception as e:
+                logger.warning(f"Skipping progress for {roadmap_id}: {e}")
+                counts["skipped"] += 1
+
+        for path in data_dir.glob("*.md"):
+            with open(path, "r", encoding="utf-8") as f:
+                store.save_markdown(path.stem, f.read())
+            counts["markdown"] += 1
+    finally:
+        store.close()
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a file-store data directory into SQLite.")
+    parser.add_argument("--data-dir", type=Path, default=file_store.DATA_DIR)
+    parser.add_argument("--db", type=Path, default=None, help="Defaults to <data-dir>/roadmaps.db")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    counts = migrate(args.data_dir, args.db or args.data_dir / "roadmaps.db")
+    print(f"Imported {counts['roadmaps']} roadmaps, {counts['progress']} progress records, "
+          f"{counts['markdown']} markdown files ({counts['skipped']} skipped)")
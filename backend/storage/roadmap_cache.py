@@ -0,0 +1,48 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+class VersionedCache:
+    """
+    Thread-safe LRU of derived values (e.g. serialized responses) keyed by
+    roadmap id. Each entry remembers the store version it was built from,
+    so a lookup with a newer version misses even if the write happened in
+    another worker process; writes in this process also invalidate directly.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, version: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, version: str, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Serialized GET /api/roadmaps/{id} bodies of recently read roadmaps
+hot_roadmaps = VersionedCache(int(os.getenv("ROADMAP_CACHE_SIZE", 256)))
@@ -0,0 +1,153 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Callable, Optional
+
+# Relative weight of a term occurrence in each indexed field
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "goal": 3.0,
+    "phases": 1.5,
+    "topics": 2.0,
+    "subtopics": 1.0,
+    "resources": 0.5,
+}
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in into is it of on or the to with".split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercases text and splits it into terms, dropping stopwords and
+    folding simple plurals ("containers" -> "container"). Symbols that
+    matter in tech names are kept, e.g. "c++" and "c#".
+    """
+    terms = []
+    for term in _TOKEN.findall((text or "").lower()):
+        if term in STOPWORDS:
+            continue
+        if len(term) > 3 and term.endswith("s") and not term.endswith(("ss", "us", "is")):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+def search_document(data: dict) -> dict[str, str]:
+    """Extracts the searchable text of a roadmap dictionary, per field."""
+    phases = data.get("phases") or []
+    topics = [t for p in phases for t in p.get("topics") or []]
+    return {
+        "title": data.get("title") or "",
+        "goal": (data.get("spec") or {}).get("goal") or "",
+        "phases": "\n".join(p.get("title") or "" for p in phases),
+        "topics": "\n".join(t.get("name") or "" for t in topics),
+        "subtopics": "\n".join(s for t in topics for s in t.get("subtopics") or []),
+        "resources": "\n".join(r.get("label") or "" for t in topics for r in t.get("resources") or []),
+    }
+
+def weigh_terms(fields: dict[str, str]) -> dict[str, float]:
+    """Field-weighted term frequencies for a document."""
+    weights: Counter = Counter()
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS.get(field, 1.0)
+        for term in tokenize(text):
+            weights[term] += weight
+    return dict(weights)
+
+class InvertedIndex:
+    """
+    In-memory inverted index with BM25 ranking.
+
+    Documents are added and removed one at a time, so the index can be
+    kept up to date on every save and delete. A query matches documents
+    containing all of its terms; intersection starts from the rarest term,
+    so only plausible candidates are scored.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[str, float]] = {}
+        self._doc_terms: dict[str, tuple[str, ...]] = {}
+        self._doc_length: dict[str, float] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+    def clear(self):
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._doc_length.clear()
+        self._total_length = 0.0
+
+    def doc_ids(self) -> list[str]:
+        return list(self._doc_terms)
+
+    def terms(self, doc_id: str) -> dict[str, float]:
+        """Returns the weighted terms a document was indexed with."""
+        return {term: self._postings[term][doc_id] for term in self._doc_terms.get(doc_id, ())}
+
+    def add(self, doc_id: str, terms: dict[str, float]):
+        """Indexes a document from its weighted terms, replacing any previous version."""
+        self.remove(doc_id)
+        for term, weight in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = weight
+        self._doc_terms[doc_id] = tuple(terms)
+        length = sum(terms.values())
+        self._doc_length[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: str):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_length -= self._doc_length.pop(doc_id, 0.0)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0,
+               accept: Optional[Callable[[str], bool]] = None) -> tuple[list[tuple[str, float]], int]:
+        """
+        Ranks the documents matching every query term.
+
+        Args:
+            accept: Optional filter on document ids, e.g. by status.
+
+        Returns:
+            (page, total): up to `limit` (doc_id, score) pairs starting at
+            `offset`, best first, and the number of matching documents.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        postings = [self._postings.get(term) for term in terms]
+        if not terms or any(p is None for p in postings):
+            return [], 0
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return [], 0
+        if accept is not None:
+            candidates = {doc_id for doc_id in candidates if accept(doc_id)}
+
+        count = len(self._doc_terms)
+        average = self._total_length / count if count else 1.0
+        idf = [math.log(1 + (count - len(p) + 0.5) / (len(p) + 0.5)) for p in postings]
+
+        def score(doc_id: str) -> float:
+            norm = self.k1 * (1 - self.b + self.b * self._doc_length[doc_id] / average)
+            return sum(w * p[doc_id] * (self.k1 + 1) / (p[doc_id] + norm) for w, p in zip(idf, postings))
+
+        ranked = heapq.nlargest(offset + limit, ((score(d), d) for d in candidates))
+        return [(doc_id, round(s, 4)) for s, doc_id in ranked[offset:]], len(candidates)
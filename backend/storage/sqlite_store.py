@@ -0,0 +1,340 @@
+import json
+import logging
+from datetime import datetime, timezone
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+from models.roadmap import Roadmap
+from models.progress import ProgressState, TopicStatus
+from storage.base import summarize_roadmap, encode_cursor, decode_cursor
+from storage.locks import FileLease, try_file_lock
+from storage.search_index import FIELD_WEIGHTS, search_document, tokenize
+from storage.roadmap_cache import hot_roadmaps
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roadmaps (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    status TEXT,
+    created_at TEXT NOT NULL,
+    topic_count INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_roadmaps_created ON roadmaps (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_roadmaps_status_created ON roadmaps (status, created_at, id);
+CREATE TABLE IF NOT EXISTS progress (
+    roadmap_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS progress_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    roadmap_id TEXT NOT NULL,
+    at TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_progress_events_roadmap ON progress_events (roadmap_id, id);
+CREATE TABLE IF NOT EXISTS markdown (
+    roadmap_id TEXT PRIMARY KEY,
+    content TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_docs (
+    doc INTEGER PRIMARY KEY,
+    roadmap_id TEXT NOT NULL UNIQUE
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS roadmap_search USING fts5(
+    title, goal, phases, topics, subtopics, resources,
+    tokenize = "unicode61 tokenchars '+#'"
+);
+"""
+
+# roadmap_search rowids are search_docs.doc, which (unlike an implicit rowid) survives VACUUM
+SEARCH_COLUMNS = ("title", "goal", "phases", "topics", "subtopics", "resources")
+INSERT_SEARCH = (
+    f"INSERT INTO roadmap_search (rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES (?, {', '.join('?' for _ in SEARCH_COLUMNS)})"
+)
+SEARCH_RANK = f"bm25(roadmap_search, {', '.join(str(FIELD_WEIGHTS[c]) for c in SEARCH_COLUMNS)})"
+
+# Documents and queries go through search_index.tokenize, as in the file
+# store, so both backends match the same terms; FTS5 only splits on spaces
+# (keeping "c++" and "c#" whole).
+def _search_text(text: str) -> str:
+    return " ".join(tokenize(text))
+
+def _match_expression(query: str) -> str:
+    """Turns free text into an FTS5 query requiring every term, with user syntax quoted away."""
+    return " ".join(f'"{term}"' for term in dict.fromkeys(tokenize(query)))
+
+UPSERT_ROADMAP = """
+INSERT INTO roadmaps (id, title, status, created_at, topic_count, data, version, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+ON CONFLICT(id) DO UPDATE SET
+    title = excluded.title,
+    status = excluded.status,
+    created_at = excluded.created_at,
+    topic_count = excluded.topic_count,
+    data = excluded.data,
+    version = roadmaps.version + 1,
+    updated_at = excluded.updated_at
+"""
+
+# Columns added after the first release, created on databases that predate them
+MIGRATIONS = {
+    "version": "ALTER TABLE roadmaps ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+    "updated_at": "ALTER TABLE roadmaps ADD COLUMN updated_at TEXT",
+}
+
+class SQLiteStore:
+    """
+    RoadmapStore implementation backed by a single SQLite database.
+
+    Runs in WAL mode so several uvicorn workers can read while one writes.
+    Each thread reuses one connection, and all queries are parameterized so
+    sqlite3's statement cache keeps them prepared.
+    """
+
+    def __init__(self, path: Path, busy_timeout_ms: int = 5000):
+        self.path = Path(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        with self._conn() as conn:
+            search = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'roadmap_search'").fetchone()
+            if search is not None and "porter" in search["sql"]:
+                # Indexed with the old stemming tokenizer; recreated and backfilled below
+                conn.execute("DROP TABLE roadmap_search")
+                conn.execute("DELETE FROM search_docs")
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(roadmaps)")}
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(statement)
+        self._backfill_search()
+
+    def _backfill_search(self):
+        """Indexes roadmaps saved before the search table existed."""
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM roadmap_search LIMIT 1").fetchone() is not None:
+            return
+        rows = conn.execute("SELECT id, data FROM roadmaps").fetchall()
+        if rows:
+            with conn:
+                for row in rows:
+                    self._index_search(conn, row["id"], json.loads(row["data"]))
+            logger.info(f"Search-indexed {len(rows)} existing roadmaps")
+
+    def _index_search(self, conn: sqlite3.Connection, roadmap_id: str, data: dict):
+        conn.execute("INSERT INTO search_docs (roadmap_id) VALUES (?) ON CONFLICT(roadmap_id) DO NOTHING", (roadmap_id,))
+        doc = conn.execute("SELECT doc FROM search_docs WHERE roadmap_id = ?", (roadmap_id,)).fetchone()[0]
+        document = search_document(data)
+        conn.execute("DELETE FROM roadmap_search WHERE rowid = ?", (doc,))
+        conn.execute(INSERT_SEARCH, (doc, *(_search_text(document[c]) for c in SEARCH_COLUMNS)))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, cached_statements=128)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def save_roadmap(self, roadmap: Roadmap):
+        data = roadmap.model_dump(mode="json")
+        summary = summarize_roadmap(data)
+        with self._conn() as conn:
+            conn.execute(UPSERT_ROADMAP, (
+                summary["id"], summary["title"], summary["status"],
+                summary["created_at"], summary["topic_count"], json.dumps(data),
+                datetime.now(timezone.utc).isoformat()
+            ))
+            self._index_search(conn, summary["id"], data)
+        hot_roadmaps.invalidate(roadmap.id)
+
+    def load_roadmap(self, roadmap_id: str) -> Roadmap:
+        row = self._conn().execute("SELECT data FROM roadmaps WHERE id = ?", (roadmap_id,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Roadmap {roadmap_id} not found")
+        return Roadmap(**json.loads(row["data"]))
+
+    def roadmap_stamp(self, roadmap_id: str) -> Optional[tuple[str, Optional[datetime]]]:
+        row = self._conn().execute(
+            "SELECT version, updated_at FROM roadmaps WHERE id = ?", (roadmap_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        # updated_at tells apart a deleted and re-created roadmap restarting at version 1
+        modified = datetime.fromisoformat(row["updated_at"]) if row["updated_at"] else None
+        return f"{row['version']}-{row['updated_at'] or ''}", modified
+
+    def save_progress(self, progress: ProgressState):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO progress (roadmap_id, data) VALUES (?, ?) "
+                "ON CONFLICT(roadmap_id) DO UPDATE SET data = excluded.data",
+                (progress.roadmap_id, progress.model_dump_json())
+            )
+
+    def load_progress(self, roadmap_id: str) -> ProgressState:
+        row = self._conn().execute("SELECT data FROM progress WHERE roadmap_id = ?", (roadmap_id,)).fetchone()
+        if row is None:
+            return ProgressState(roadmap_id=roadmap_id)
+        return ProgressState(**json.loads(row["data"]))
+
+    def update_progress(self, roadmap_id: str, changes: dict[str, TopicStatus],
+                        render: Callable[[Roadmap, ProgressState], Optional[str]] = None) -> ProgressState:
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent
+        # read-modify-write cycles from other workers serialize
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            roadmap = None
+            if render:
+                row = conn.execute("SELECT data FROM roadmaps WHERE id = ?", (roadmap_id,)).fetchone()
+                if row is None:
+                    raise FileNotFoundError(f"Roadmap {roadmap_id} not found")
+                roadmap = Roadmap(**json.loads(row["data"]))
+            row = conn.execute("SELECT data FROM progress WHERE roadmap_id = ?", (roadmap_id,)).fetchone()
+            progress = ProgressState(**json.loads(row["data"])) if row else ProgressState(roadmap_id=roadmap_id)
+            progress.topics.update(changes)
+            conn.execute(
+                "INSERT INTO progress (roadmap_id, data) VALUES (?, ?) "
+                "ON CONFLICT(roadmap_id) DO UPDATE SET data = excluded.data",
+                (roadmap_id, progress.model_dump_json())
+            )
+            at = datetime.now(timezone.utc).isoformat()
+            conn.executemany(
+                "INSERT INTO progress_events (roadmap_id, at, topic, status) VALUES (?, ?, ?, ?)",
+                [(roadmap_id, at, topic, TopicStatus(status).value) for topic, status in changes.items()]
+            )
+            markdown = render(roadmap, progress) if render else None
+            if markdown is not None:
+                conn.execute(
+                    "INSERT INTO markdown (roadmap_id, content) VALUES (?, ?) "
+                    "ON CONFLICT(roadmap_id) DO UPDATE SET content = excluded.content",
+                    (roadmap_id, markdown)
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return progress
+
+    def load_progress_history(self, roadmap_id: str) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT at, topic, status FROM progress_events WHERE roadmap_id = ? ORDER BY id",
+            (roadmap_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def import_progress_history(self, roadmap_id: str, events: list[dict]):
+        """Appends previously recorded events, e.g. when migrating from the file store."""
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO progress_events (roadmap_id, at, topic, status) VALUES (?, ?, ?, ?)",
+                [(roadmap_id, e["at"], e["topic"], e["status"]) for e in events]
+            )
+
+    def save_markdown(self, roadmap_id: str, content: str):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO markdown (roadmap_id, content) VALUES (?, ?) "
+                "ON CONFLICT(roadmap_id) DO UPDATE SET content = excluded.content",
+                (roadmap_id, content)
+            )
+
+    def load_markdown(self, roadmap_id: str) -> str:
+        row = self._conn().execute("SELECT content FROM markdown WHERE roadmap_id = ?", (roadmap_id,)).fetchone()
+        return row["content"] if row else ""
+
+    def list_roadmaps_page(self, status: str = None, limit: int = None,
+                           cursor: str = None) -> tuple[list[dict], Optional[str]]:
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if cursor:
+            created_at, roadmap_id = decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params += [created_at, created_at, roadmap_id]
+        query = "SELECT id, title, created_at, status, topic_count FROM roadmaps"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            # Fetch one extra row to know whether another page exists
+            query += " LIMIT ?"
+            params.append(limit + 1)
+
+        items = [dict(row) for row in self._conn().execute(query, params)]
+        if limit is not None and len(items) > limit:
+            items = items[:limit]
+            return items, encode_cursor(items[-1]["created_at"], items[-1]["id"])
+        return items, None
+
+    def list_roadmaps(self, status: str = None) -> list[dict]:
+        return self.list_roadmaps_page(status=status)[0]
+
+    def search_roadmaps(self, query: str, status: str = None, limit: int = 20,
+                        offset: int = 0) -> tuple[list[dict], int]:
+        expression = _match_expression(query)
+        if not expression:
+            return [], 0
+        where = "roadmap_search MATCH ?"
+        params = [expression]
+        if status:
+            where += " AND r.status = ?"
+            params.append(status)
+        source = (
+            "FROM roadmap_search JOIN search_docs d ON d.doc = roadmap_search.rowid "
+            f"JOIN roadmaps r ON r.id = d.roadmap_id WHERE {where}"
+        )
+        conn = self._conn()
+        rows = conn.execute(
+            f"SELECT r.id, r.title, r.created_at, r.status, r.topic_count, -{SEARCH_RANK} AS score "
+            f"{source} ORDER BY {SEARCH_RANK} LIMIT ? OFFSET ?",
+            (*params, limit, offset)
+        )
+        items = [{**dict(row), "score": round(row["score"], 4)} for row in rows]
+        total = conn.execute(f"SELECT count(*) {source}", params).fetchone()[0]
+        return items, total
+
+    def delete_roadmap(self, roadmap_id: str):
+        with self._conn() as conn:
+            conn.execute(
+                "DELETE FROM roadmap_search WHERE rowid = (SELECT doc FROM search_docs WHERE roadmap_id = ?)",
+                (roadmap_id,)
+            )
+            conn.execute("DELETE FROM search_docs WHERE roadmap_id = ?", (roadmap_id,))
+            conn.execute("DELETE FROM roadmaps WHERE id = ?", (roadmap_id,))
+            conn.execute("DELETE FROM progress WHERE roadmap_id = ?", (roadmap_id,))
+            conn.execute("DELETE FROM progress_events WHERE roadmap_id = ?", (roadmap_id,))
+            conn.execute("DELETE FROM markdown WHERE roadmap_id = ?", (roadmap_id,))
+        hot_roadmaps.invalidate(roadmap_id)
+
+    def try_run_lease(self, roadmap_id: str) -> Optional[FileLease]:
+        # Next to the database, so every worker using it shares the leases
+        return try_file_lock(self.path.with_name(f"{self.path.name}.locks") / f"{roadmap_id}.run.lock")
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    # Connections owned by other threads close with their thread
+                    logger.debug("Skipping close of a connection owned by another thread")
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,59 @@
+import os
+import time
+import functools
+import logging
+from pathlib import Path
+from storage.base import RoadmapStore
+from storage import file_store
+from utils.metrics import STORAGE_DURATION
+
+logger = logging.getLogger(__name__)
+
+_store: RoadmapStore = None
+
+class TimedStore:
+    """Wraps a store so every operation's latency is recorded in /metrics."""
+
+    def __init__(self, store: RoadmapStore, backend: str):
+        self._store = store
+        self._backend = backend
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._store, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        @functools.wraps(attr)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                STORAGE_DURATION.observe(time.perf_counter() - started, backend=self._backend, op=name)
+        return timed
+
+def get_store() -> RoadmapStore:
+    """
+    Returns the process-wide store selected by STORAGE_BACKEND.
+    'file' (default) keeps loose files in DATA_DIR; 'sqlite' uses SQLITE_PATH,
+    which defaults to DATA_DIR/roadmaps.db.
+    """
+    global _store
+    if _store is None:
+        backend = os.getenv("STORAGE_BACKEND", "file").lower()
+        if backend == "sqlite":
+            from storage.sqlite_store import SQLiteStore
+            path = Path(os.getenv("SQLITE_PATH") or file_store.DATA_DIR / "roadmaps.db")
+            logger.info(f"Using SQLite storage at {path}")
+            _store = TimedStore(SQLiteStore(path), backend)
+        else:
+            logger.info(f"Using file storage at {file_store.DATA_DIR}")
+            _store = TimedStore(file_store.FileStore(), "file")
+    return _store
+
+def close_store():
+    """Closes the active store, if any. Called on app shutdown."""
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Optional
+
+from storage.file_store import DATA_DIR
+from storage.llm_cache import LLMCache
+from utils.metrics import TOPIC_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+def normalize_topic(name: str) -> str:
+    """
+    Canonical form of a topic name, so "Git Basics", "git  basics" and
+    "Git basics." share one entry.
+    """
+    name = (name or "").lower().replace("&", " and ")
+    return " ".join(re.sub(r"[^\w+#]+", " ", name).split())
+
+def _level(skill_level) -> str:
+    return str(getattr(skill_level, "value", skill_level) or "").lower()
+
+class TopicResourceCache:
+    """
+    Resources found for a topic, shared across roadmaps.
+
+    Entries are keyed by normalized topic name, skill level and model, and
+    kept in an LLMCache, so they get its memory LRU, disk pruning and TTL.
+    Keys start with a digest of the topic alone, so the entry files name
+    every entry for a topic and invalidating one never reads the others.
+    Each entry also stores its key fields, so invalidate() can drop every
+    entry for a skill level or a model too.
+    """
+
+    def __init__(self, cache: LLMCache):
+        self.cache = cache
+
+    @staticmethod
+    def topic_prefix(topic: str) -> str:
+        return hashlib.sha256(normalize_topic(topic).encode("utf-8")).hexdigest()[:16] + "-"
+
+    @classmethod
+    def make_key(cls, topic: str, skill_level, model: str) -> str:
+        payload = json.dumps([normalize_topic(topic), _level(skill_level), model])
+        return cls.topic_prefix(topic) + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, topic: str, skill_level, model: str) -> Optional[list[dict]]:
+        """Returns the cached resources for a topic, or None on a miss."""
+        content = self.cache.get(self.make_key(topic, skill_level, model))
+        if content is None:
+            TOPIC_CACHE_LOOKUPS.inc(result="miss")
+            return None
+        TOPIC_CACHE_LOOKUPS.inc(result="hit")
+        return json.loads(content)["resources"]
+
+    def set(self, topic: str, skill_level, model: str, resources: list[dict]):
+        if not resources:
+            return
+        self.cache.set(self.make_key(topic, skill_level, model), json.dumps({
+            "topic": normalize_topic(topic), "skill_level": _level(skill_level),
+            "model": model, "resources": resources
+        }))
+
+    def invalidate(self, topic: str = None, skill_level=None, model: str = None) -> int:
+        """
+        Drops the entries matching every given field; with no fields, drops
+        everything. Other worker processes stop serving the entries from
+        memory on their next lookup. Returns the number of entries removed.
+        """
+        if topic is not None and skill_level is not None and model is not None:
+            return self.cache.delete(self.make_key(topic, skill_level, model))
+        if topic is None and skill_level is None and model is None:
+            keys = self.cache.keys()
+        elif skill_level is None and model is None:
+            keys = self.cache.keys(self.topic_prefix(topic))
+        else:
+            # Only skill level and model filters need the entries read
+            wanted = {"skill_level": _level(skill_level) if skill_level is not None else None, "model": model}
+            keys = []
+            for key, content in list(self.cache.items(self.topic_prefix(topic) if topic is not None else "")):
+                try:
+                    entry = json.loads(content)
+                except (TypeError, ValueError):
+                    entry = {}
+                if all(value is None or entry.get(field) == value for field, value in wanted.items()):
+                    keys.append(key)
+        removed = self.cache.delete(*keys)
+        logger.info(f"Invalidated {removed} topic resource entr{'y' if removed == 1 else 'ies'}")
+        return removed
+
+topic_cache = TopicResourceCache(LLMCache(
+    "topic",
+    cache_dir=DATA_DIR / "topic_resources",
+    ttl=float(os.getenv("TOPIC_CACHE_TTL", 30 * 24 * 3600)),
+    max_entries=int(os.getenv("TOPIC_CACHE_MAX_ENTRIES", 2000)),
+    max_disk_entries=int(os.getenv("TOPIC_CACHE_MAX_DISK_ENTRIES", 50000)),
+    enabled=os.getenv("TOPIC_CACHE_ENABLED", "true").lower() == "true",
+))
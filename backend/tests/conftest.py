@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Storage and caches read their settings at import time, so configure them first
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="astar-tests-"))
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("TOPIC_CACHE_ENABLED", "false")
+
+# Backend modules use flat imports (e.g. `from clients import ...`)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import orchestrator
+
+DELAY = 0.2
+PIPELINES = 8
+
+class SlowCompletions:
+    """Answers every agent prompt with a canned response after an awaited delay."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def create(self, model, messages, stream=False, **kwargs):
+        await asyncio.sleep(self.delay)
+        role = messages[0]["content"].splitlines()[0]
+        if "Analyst" in role:
+            content = json.dumps({"goal": "python", "skill_level": "beginner",
+                                  "hours_per_week": 5, "estimated_weeks": 8})
+        elif "Curriculum" in role:
+            content = json.dumps({"title": "Python Roadmap", "phases": [{
+                "phase_number": n, "title": f"Phase {n}", "week_range": f"Week {n}",
+                "topics": [{"name": f"Topic {n}", "content": "", "subtopics": ["a"], "resources": []}]
+            } for n in (1, 2, 3)]})
+        elif "Resource" in role:
+            phase = json.loads(messages[-1]["content"])
+            for topic in phase["topics"]:
+                topic["resources"] = [{"label": "Docs", "url": "https://example.com", "type": "docs"}]
+            content = json.dumps(phase)
+        else:
+            content = "# Roadmap"
+        if stream:
+            return self._stream(content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+    async def _stream(self, content: str):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], usage=None)
+
+def _run_pipelines(monkeypatch, count: int) -> tuple[float, list[list[dict]]]:
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SlowCompletions(DELAY)))
+    monkeypatch.setattr(orchestrator, "get_client_and_model", lambda provider=None, model=None, agent=None: (client, "fake"))
+
+    async def one() -> list[dict]:
+        request = {"goal": "python", "skill_level": "beginner", "hours_per_week": 5}
+        return [json.loads(event["data"]) async for event in orchestrator.run_pipeline(request)]
+
+    async def main():
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(count)))
+        return time.perf_counter() - started, results
+
+    return asyncio.run(main())
+
+def test_concurrent_pipelines_take_about_as_long_as_one(monkeypatch):
+    single, (events,) = _run_pipelines(monkeypatch, 1)
+    assert events[-1]["type"] == "complete"
+
+    elapsed, results = _run_pipelines(monkeypatch, PIPELINES)
+    assert all(r[-1]["type"] == "complete" for r in results)
+    # Blocking LLM calls would serialize the runs: PIPELINES * single
+    assert elapsed < single * 2
+    assert elapsed < PIPELINES * single / 3
@@ -0,0 +1,35 @@
+import asyncio
+import json
+
+import jobs
+from jobs import Job
+
+def _event(event_type: str, **kwargs) -> dict:
+    return {"data": json.dumps({"type": event_type, **kwargs})}
+
+def test_token_deltas_are_live_only(monkeypatch):
+    async def run_pipeline(request_data, refinement=None, roadmap_id=None):
+        yield _event("agent_start", agent="formatter")
+        for i in range(1000):
+            yield _event("token", agent="formatter", delta=f"{i} ")
+            await asyncio.sleep(0)
+        yield _event("agent_done", agent="formatter")
+        yield _event("complete")
+
+    monkeypatch.setattr(jobs, "run_pipeline", run_pipeline)
+
+    async def collect(job: Job) -> list[dict]:
+        return [json.loads(event["data"]) async for event in job.subscribe()]
+
+    async def main():
+        job = Job("r1", {})
+        early = asyncio.create_task(collect(job))
+        await asyncio.sleep(0)
+        await job.run()
+        return job, await early, await collect(job)
+
+    job, early, late = asyncio.run(main())
+    assert "".join(e["delta"] for e in early if e["type"] == "token") == "".join(f"{i} " for i in range(1000))
+    assert [e["type"] for e in early if e["type"] != "token"] == ["agent_start", "agent_done", "complete"]
+    assert [e["type"] for e in late] == ["agent_start", "agent_done", "complete"]
+    assert len(job.events) == 3
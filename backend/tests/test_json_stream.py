@@ -0,0 +1,12 @@
+from utils.json_stream import JsonArrayStreamParser
+
+def test_items_are_yielded_as_they_complete():
+    parser = JsonArrayStreamParser("phases")
+    assert parser.feed('<think>"phases": [{}]</think>{"title": "x", "phases": [{"n": 1}, {"n"') == [{"n": 1}]
+    assert parser.feed(': 2}]}') == [{"n": 2}]
+    assert parser.feed(', {"n": 3}') == []
+
+def test_unparseable_items_keep_their_position():
+    parser = JsonArrayStreamParser("phases")
+    items = parser.feed('{"phases": [{"n": 1}, {"n": 2,}, {"n": 3}]}')
+    assert items == [{"n": 1}, None, {"n": 3}]
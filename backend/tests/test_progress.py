@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models.roadmap import Roadmap
+from storage.store import get_store
+
+SPEC = {"goal": "Learn Git", "skill_level": "beginner", "hours_per_week": 5, "estimated_weeks": 4}
+PHASES = [{"phase_number": 1, "title": "Basics", "week_range": "Week 1",
+           "topics": [{"name": "Commits", "subtopics": ["git add"]}]}]
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+def _save(roadmap_id: str, markdown_source: str) -> None:
+    store = get_store()
+    store.save_roadmap(Roadmap(id=roadmap_id, title="Git", spec=SPEC, phases=PHASES,
+                               created_at="2026-01-01T00:00:00", status="complete",
+                               markdown_source=markdown_source))
+    store.save_markdown(roadmap_id, "# Polished by the formatter\n")
+
+def test_progress_update_rerenders_template_markdown(client):
+    _save("templated", "template")
+    response = client.patch("/api/roadmaps/templated/progress", json={"topic_name": "Commits", "status": "done"})
+    assert response.status_code == 200
+    markdown = get_store().load_markdown("templated")
+    assert "Polished" not in markdown and "Commits" in markdown
+
+def test_progress_update_keeps_polished_markdown(client):
+    _save("polished", "polished")
+    response = client.patch("/api/roadmaps/polished/progress", json={"topic_name": "Commits", "status": "done"})
+    assert response.status_code == 200
+    assert get_store().load_markdown("polished") == "# Polished by the formatter\n"
+    assert get_store().load_progress("polished").topics["Commits"] == "done"
+
+def test_progress_update_for_unknown_roadmap_is_404(client):
+    response = client.patch("/api/roadmaps/missing/progress", json={"topic_name": "Commits", "status": "done"})
+    assert response.status_code == 404
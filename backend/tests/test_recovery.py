@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+from jobs import JobQueue
+from models.roadmap import Roadmap
+from recovery import recover_interrupted
+from storage.store import get_store
+
+@pytest.fixture(autouse=True)
+def empty_library():
+    store = get_store()
+    for item in store.list_roadmaps():
+        store.delete_roadmap(item["id"])
+
+def _save(roadmap_id: str, checkpoint_age: float) -> Roadmap:
+    roadmap = Roadmap(
+        id=roadmap_id, title="Interrupted", phases=[], status="generating",
+        created_at=(datetime.utcnow() - timedelta(seconds=checkpoint_age)).isoformat(),
+        spec={"goal": "go", "skill_level": "beginner", "hours_per_week": 5, "estimated_weeks": 4}
+    )
+    get_store().save_roadmap(roadmap)
+    return roadmap
+
+def _fake_pipeline(started: list, gate: asyncio.Event):
+    async def run_pipeline(request_data, refinement=None, roadmap_id=None):
+        started.append(roadmap_id)
+        await gate.wait()
+        yield {"data": "{}"}
+    return run_pipeline
+
+def test_recovery_skips_roadmaps_running_in_another_worker(monkeypatch):
+    _save("busy", checkpoint_age=120)
+    _save("orphan", checkpoint_age=120)
+
+    async def main():
+        started, gate = [], asyncio.Event()
+        monkeypatch.setattr(jobs, "run_pipeline", _fake_pipeline(started, gate))
+        # Two queues hold separate lock handles, like two worker processes
+        live, restarted = JobQueue(1, 60, 0), JobQueue(2, 60, 0)
+        live.submit("busy", {})
+        await asyncio.sleep(0.05)
+        recovery = asyncio.create_task(recover_interrupted(get_store(), restarted, 86400, 2, min_idle_seconds=0))
+        await asyncio.sleep(0.1)
+        assert sorted(started) == ["busy", "orphan"]
+        gate.set()
+        assert await recovery == 1
+        await live.stop()
+        await restarted.stop()
+
+    asyncio.run(main())
+
+def test_recovery_waits_out_fresh_checkpoints(monkeypatch):
+    roadmap = _save("fresh", checkpoint_age=0)
+
+    async def main():
+        started, gate = [], asyncio.Event()
+        gate.set()
+        monkeypatch.setattr(jobs, "run_pipeline", _fake_pipeline(started, gate))
+        queue = JobQueue(1, 60, 0)
+        recovery = asyncio.create_task(recover_interrupted(get_store(), queue, 86400, 2, min_idle_seconds=0.3))
+        await asyncio.sleep(0.1)
+        # A checkpoint from a run elsewhere that has not taken its lease yet
+        get_store().save_roadmap(roadmap.model_copy(update={"created_at": datetime.utcnow().isoformat()}))
+        assert await recovery == 0
+        assert started == []
+        await queue.stop()
+
+    asyncio.run(main())
+
+def test_deleting_a_roadmap_keeps_its_run_lease_exclusive():
+    _save("leased", checkpoint_age=0)
+    lease = jobs.try_run_lease("leased")
+    assert lease is not None
+    get_store().delete_roadmap("leased")
+    try:
+        assert jobs.try_run_lease("leased") is None
+    finally:
+        lease.release()
+
+def test_sqlite_leases_live_with_the_database(tmp_path):
+    from storage.file_store import DATA_DIR
+    from storage.sqlite_store import SQLiteStore
+
+    first, second = SQLiteStore(tmp_path / "roadmaps.db"), SQLiteStore(tmp_path / "roadmaps.db")
+    lease = first.try_run_lease("r1")
+    try:
+        assert lease is not None and second.try_run_lease("r1") is None
+        assert (tmp_path / "roadmaps.db.locks" / "r1.run.lock").exists()
+        assert not (DATA_DIR / "locks" / "r1.run.lock").exists()
+    finally:
+        lease.release()
+        first.close()
+        second.close()
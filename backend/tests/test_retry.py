@@ -0,0 +1,100 @@
+import asyncio
+import sys
+import time
+from collections import deque
+
+import httpx
+import openai
+from pydantic import BaseModel, ValidationError
+
+from clients import CircuitBreaker, ProviderLimiter, _ReleasingStream
+from utils.retry import classify_error, FATAL, INVALID_OUTPUT, TRANSIENT
+
+class Phase(BaseModel):
+    title: str
+
+def test_classify_error_defaults_to_fatal():
+    request = httpx.Request("POST", "https://example.invalid")
+    assert classify_error(openai.APITimeoutError(request)) == TRANSIENT
+    assert classify_error(TimeoutError()) == TRANSIENT
+    assert classify_error(ValueError("No JSON object in model response")) == INVALID_OUTPUT
+    try:
+        Phase.model_validate({"title": None})
+    except ValidationError as e:
+        assert classify_error(e) == INVALID_OUTPUT
+    assert classify_error(KeyError("phases")) == FATAL
+    assert classify_error(TypeError("bad call")) == FATAL
+    assert classify_error(RuntimeError("unexpected")) == FATAL
+
+def test_only_the_trial_call_ends_the_trial():
+    breaker = CircuitBreaker("test/model", failure_threshold=1, reset_seconds=0.05)
+    # A call admitted while closed is still in flight when the circuit opens
+    straggler = breaker.check()
+    breaker.record_failure(breaker.check())
+    assert breaker.state == "open"
+    time.sleep(0.06)
+
+    trial = breaker.check()
+    assert trial and breaker.state == "half_open"
+    # The straggler's outcome must not let a second trial through
+    breaker.release(straggler)
+    try:
+        breaker.check()
+        assert False, "second trial admitted while the first is in flight"
+    except Exception as e:
+        assert "Circuit open" in str(e)
+
+    breaker.record_failure(trial)
+    assert breaker.state == "open"
+
+def test_limiter_keeps_a_single_wakeup_timer():
+    async def scenario():
+        limiter = ProviderLimiter("test/model", max_inflight=8, rpm=1, tpm=0)
+        await limiter.acquire(0)
+        # The bucket is empty now; each queued waiter re-dispatches
+        waiters = [asyncio.ensure_future(limiter.acquire(0)) for _ in range(5)]
+        await asyncio.sleep(0)
+        pending = [h for h in asyncio.get_running_loop()._scheduled if not h.cancelled()]
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        return len(pending)
+
+    assert asyncio.run(scenario()) == 1
+
+def test_dropped_stream_releases_its_slot_on_the_loop():
+    class Stream:
+        async def __anext__(self):
+            raise StopAsyncIteration
+
+    async def scenario():
+        limiter = ProviderLimiter("test/stream", max_inflight=1, rpm=0, tpm=0)
+        await limiter.acquire(0)
+        _ReleasingStream(Stream(), limiter, 0)  # dropped unread; collected right away
+        waiter = asyncio.ensure_future(limiter.acquire(0))
+        await asyncio.sleep(0.01)
+        return waiter.done()
+
+    assert asyncio.run(scenario())
+
+def test_stream_finalized_after_its_loop_closed_does_not_raise():
+    class Stream:
+        pass
+
+    async def make():
+        limiter = ProviderLimiter("test/closed", max_inflight=2, rpm=1, tpm=0)
+        await limiter.acquire(0)
+        return limiter, _ReleasingStream(Stream(), limiter, 0)
+
+    limiter, stream = asyncio.run(make())
+    # A rate-limited waiter, so releasing would need a loop to schedule a wake-up on
+    other_loop = asyncio.new_event_loop()
+    limiter._waiting["other"] = deque([(other_loop.create_future(), 0)])
+    unraisable = []
+    hook, sys.unraisablehook = sys.unraisablehook, unraisable.append
+    try:
+        del stream
+    finally:
+        sys.unraisablehook = hook
+    other_loop.close()
+    assert not unraisable
@@ -0,0 +1,41 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from clients import _RoutedCompletions
+
+REQUEST = httpx.Request("POST", "https://example.invalid/v1/chat/completions")
+
+class FakeTarget:
+    """Stands in for a GuardedClient whose completions raise `error` or answer."""
+
+    def __init__(self, provider: str, error: Exception = None):
+        self.provider = provider
+        self.calls = 0
+        self.error = error
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return {"provider": self.provider}
+
+def _route(primary: FakeTarget, fallback: FakeTarget) -> _RoutedCompletions:
+    return _RoutedCompletions("curriculum", [(primary, "m1"), (fallback, "m2")])
+
+def test_bad_request_is_not_sent_to_the_fallback():
+    bad_request = openai.BadRequestError("response_format not supported",
+                                         response=httpx.Response(400, request=REQUEST), body=None)
+    primary, fallback = FakeTarget("groq", bad_request), FakeTarget("ollama")
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(_route(primary, fallback).create(messages=[]))
+    assert (primary.calls, fallback.calls) == (1, 0)
+
+def test_transient_errors_fail_over():
+    primary, fallback = FakeTarget("groq", openai.APIConnectionError(request=REQUEST)), FakeTarget("ollama")
+    assert asyncio.run(_route(primary, fallback).create(messages=[])) == {"provider": "ollama"}
+    assert (primary.calls, fallback.calls) == (1, 1)
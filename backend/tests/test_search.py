@@ -0,0 +1,56 @@
+import sqlite3
+
+import pytest
+
+from models.roadmap import Roadmap
+from storage.file_store import FileStore
+from storage.sqlite_store import SQLiteStore
+
+SPEC = {"goal": "", "skill_level": "beginner", "hours_per_week": 5, "estimated_weeks": 4}
+DOCUMENTS = {
+    "docker": ("Docker containers", "Running containers in production"),
+    "cpp": ("C++ for game developers", "Modern C++ templates"),
+    "csharp": ("C# and .NET", "Building services with C#"),
+    "running": ("Marathon training", "Running plans"),
+}
+QUERIES = ["container", "containers", "c++", "c#", "running", "run", "the production containers"]
+
+def _roadmap(roadmap_id: str, title: str, goal: str) -> Roadmap:
+    return Roadmap(id=roadmap_id, title=title, spec={**SPEC, "goal": goal}, phases=[],
+                   created_at=f"2026-01-01T00:00:0{len(roadmap_id) % 10}", status="complete")
+
+@pytest.fixture
+def stores(tmp_path):
+    file_store, sqlite_store = FileStore(), SQLiteStore(tmp_path / "roadmaps.db")
+    for item in file_store.list_roadmaps():
+        file_store.delete_roadmap(item["id"])
+    for roadmap_id, (title, goal) in DOCUMENTS.items():
+        file_store.save_roadmap(_roadmap(roadmap_id, title, goal))
+        sqlite_store.save_roadmap(_roadmap(roadmap_id, title, goal))
+    yield file_store, sqlite_store
+    sqlite_store.close()
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_backends_match_the_same_roadmaps(stores, query):
+    file_store, sqlite_store = stores
+    matched = [{item["id"] for item in store.search_roadmaps(query)[0]} for store in stores]
+    assert matched[0] == matched[1]
+
+def test_porter_index_is_rebuilt_with_the_shared_tokenizer(tmp_path):
+    path = tmp_path / "old.db"
+    old = SQLiteStore(path)
+    old.save_roadmap(_roadmap("docker", *DOCUMENTS["docker"]))
+    old.close()
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        DROP TABLE roadmap_search;
+        CREATE VIRTUAL TABLE roadmap_search USING fts5(
+            title, goal, phases, topics, subtopics, resources, tokenize = 'porter unicode61');
+        DELETE FROM search_docs;
+    """)
+    conn.close()
+
+    store = SQLiteStore(path)
+    items, total = store.search_roadmaps("containers")
+    assert total == 1 and items[0]["id"] == "docker"
+    store.close()
@@ -0,0 +1,27 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import jobs
+from jobs import job_queue
+from main import app
+from models.roadmap import Roadmap
+from storage.store import get_store
+
+SPEC = {"goal": "Learn Git", "skill_level": "beginner", "hours_per_week": 5, "estimated_weeks": 4}
+
+def test_reconnect_to_a_complete_roadmap_does_not_rerun_the_pipeline(monkeypatch):
+    get_store().save_roadmap(Roadmap(id="finished", title="Git", spec=SPEC, phases=[],
+                                     created_at="2026-01-01T00:00:00", status="complete"))
+
+    async def run_pipeline(*args, **kwargs):
+        raise AssertionError("pipeline started for a complete roadmap")
+        yield
+    monkeypatch.setattr(jobs, "run_pipeline", run_pipeline)
+
+    with TestClient(app) as client:
+        response = client.get("/api/roadmaps/finished/stream")
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [e["type"] for e in events] == ["complete"]
+    assert events[0]["roadmap"]["id"] == "finished"
+    assert job_queue.get("finished") is None
@@ -0,0 +1,46 @@
+from storage.llm_cache import LLMCache
+from storage.topic_cache import TopicResourceCache
+from utils.metrics import render_metrics
+
+RESOURCES = [{"title": "Pro Git", "url": "https://git-scm.com/book", "type": "book"}]
+
+def make_cache(directory) -> TopicResourceCache:
+    return TopicResourceCache(LLMCache("test-topic", directory, ttl=0, max_entries=16, max_disk_entries=100))
+
+def test_invalidate_reaches_other_processes(tmp_path):
+    # Two caches over one directory stand in for two worker processes
+    admin, worker = make_cache(tmp_path), make_cache(tmp_path)
+    admin.set("Git Basics", "beginner", "m", RESOURCES)
+    admin.set("Docker", "beginner", "m", RESOURCES)
+    assert worker.get("git basics", "beginner", "m") == RESOURCES
+    assert worker.get("Docker", "beginner", "m") == RESOURCES
+    assert 'astar_cache_lookups_total{cache="test-topic",result="disk"} 2' in render_metrics()
+
+    assert admin.invalidate(topic="Git Basics") == 1
+    assert worker.get("Git Basics", "beginner", "m") is None
+    # Entries that were not invalidated are reloaded from disk
+    assert worker.get("Docker", "beginner", "m") == RESOURCES
+
+    assert worker.invalidate() == 1
+    assert admin.get("Docker", "beginner", "m") is None
+
+def test_topic_invalidation_reads_no_other_entries(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path)
+    cache.set("Git Basics", "beginner", "m1", RESOURCES)
+    cache.set("Git Basics", "advanced", "m2", RESOURCES)
+    cache.set("Docker", "beginner", "m1", RESOURCES)
+    monkeypatch.setattr(cache.cache, "items", None)  # any full read would fail
+
+    assert cache.invalidate(topic="git basics") == 2
+    assert cache.get("Docker", "beginner", "m1") == RESOURCES
+    monkeypatch.undo()
+    assert cache.invalidate(model="m1") == 1
+    assert cache.invalidate() == 0
+
+def test_invalidate_endpoint():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        response = client.delete("/api/cache/topics", params={"topic": "Git Basics"})
+    assert response.status_code == 200 and response.json() == {"removed": 0}
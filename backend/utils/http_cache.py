@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import os
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # Optional; responses fall back to gzip without it
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 500))
+
+def make_etag(body: bytes) -> str:
+    """
+    Content-hash ETag. Weak, because the same representation is served
+    both compressed and uncompressed.
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluates the request's conditional headers. If-None-Match takes
+    precedence; If-Modified-Since is only consulted without it.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Picks br (when brotli is installed) or gzip from an Accept-Encoding header."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    # mtime=0 keeps the output, and so any proxy's cache key, stable
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+class CachedBody:
+    """
+    A serialized response body with its validators. Compressed variants are
+    built on first request and kept, so a cached body is compressed at most
+    once per encoding.
+    """
+
+    def __init__(self, body: bytes, media_type: str, last_modified: Optional[datetime] = None):
+        self.body = body
+        self.media_type = media_type
+        self.last_modified = last_modified
+        self.etag = make_etag(body)
+        self._encoded: dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> tuple[bytes, Optional[str]]:
+        """Returns the body in the given encoding, or as is if it is too small to bother."""
+        if encoding is None or len(self.body) < COMPRESS_MIN_BYTES:
+            return self.body, None
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding)
+        return data, encoding
+
+def cached_response(request: Request, entry: CachedBody, headers: dict = None) -> Response:
+    """
+    Serves a body with ETag/Last-Modified validators: 304 when the client's
+    copy is current, otherwise the body in the best encoding it accepts.
+    "no-cache" lets clients keep the copy but revalidate on every use.
+    """
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding", **(headers or {})}
+    if entry.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(entry.last_modified, usegmt=True)
+    if is_not_modified(request, entry.etag, entry.last_modified):
+        return Response(status_code=304, headers=headers)
+    body, encoding = entry.encoded(negotiate_encoding(request.headers.get("accept-encoding", "")))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=entry.media_type, headers=headers)
@@ -0,0 +1,92 @@
+import json
+import re
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class JsonArrayStreamParser:
+    """
+    Incrementally extracts complete objects from a named array in a JSON
+    document that arrives in chunks, e.g. the "phases" of a streamed
+    curriculum response.
+
+    Text inside a leading <think> block is ignored, and markdown fences are
+    tolerated because scanning starts at the first `"<key>": [` match.
+    """
+
+    def __init__(self, key: str):
+        self._pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start = None
+
+    def feed(self, chunk: str) -> list[Optional[dict]]:
+        """
+        Appends a chunk of streamed text and returns every array item that was
+        completed by it, in order. Items that fail to parse are returned as
+        None, so callers counting items keep the positions of the final array.
+        """
+        self._buffer += chunk
+        if self._done:
+            return []
+
+        if not self._in_array and not self._seek_array():
+            return []
+        return self._scan()
+
+    def _seek_array(self) -> bool:
+        start = 0
+        if "<think>" in self._buffer:
+            end = self._buffer.find("</think>")
+            if end == -1:
+                return False
+            start = end + len("</think>")
+        match = self._pattern.search(self._buffer, start)
+        if not match:
+            return False
+        self._pos = match.end()
+        self._in_array = True
+        return True
+
+    def _scan(self) -> list[Optional[dict]]:
+        items = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0 and ch == "{":
+                    self._item_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the tracked array itself
+                    self._done = True
+                    self._pos = i + 1
+                    return items
+                self._depth -= 1
+                if self._depth == 0 and self._item_start is not None:
+                    try:
+                        items.append(json.loads(buffer[self._item_start:i + 1]))
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Unparseable streamed item: {e}")
+                        items.append(None)
+                    self._item_start = None
+        self._pos = len(buffer)
+        return items
@@ -0,0 +1,208 @@
+import contextvars
+import threading
+import time
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+class _Metric:
+    """Base for a labelled metric family rendered in the Prometheus text format."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self._header() + [f"{self.name}{_format_labels(k)} {v}" for k, v in values.items()]
+
+class Gauge(_Metric):
+    """A gauge whose value is read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], float] = None):
+        super().__init__(name, help_text)
+        self._fn = fn
+
+    def set_function(self, fn: Callable[[], float]):
+        self._fn = fn
+
+    def render(self) -> list[str]:
+        if self._fn is None:
+            return []
+        return self._header() + [f"{self.name} {self._fn()}"]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        lines = self._header()
+        for key, series in snapshot.items():
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+REGISTRY: list[_Metric] = []
+
+AGENT_DURATION = Histogram("astar_agent_duration_seconds", "Wall time of each pipeline stage.")
+LLM_REQUEST_DURATION = Histogram("astar_llm_request_duration_seconds", "Latency of LLM completion requests.")
+LLM_TTFT = Histogram("astar_llm_time_to_first_token_seconds", "Time to the first streamed token.")
+LLM_TOKENS = Counter("astar_llm_tokens_total", "Tokens reported by the provider, by agent and kind.")
+LLM_CACHE_HITS = Counter("astar_llm_cache_hits_total", "Agent responses served from the LLM cache.")
+CACHE_LOOKUPS = Counter("astar_cache_lookups_total", "Response cache lookups, by cache and result (memory, disk, miss).")
+CACHE_STORES = Counter("astar_cache_stores_total", "Entries written to a response cache, by cache.")
+CACHE_EVICTIONS = Counter("astar_cache_evictions_total", "Entries evicted from a response cache, by cache and tier.")
+TOPIC_CACHE_LOOKUPS = Counter("astar_topic_cache_lookups_total", "Cross-roadmap topic resource lookups, by result.")
+FEEDBACK_CLASSIFICATIONS = Counter("astar_feedback_classifications_total", "Refinement feedback classified, by source.")
+AGENT_RETRIES = Counter("astar_agent_retries_total", "Agent attempts retried after a failure.")
+LLM_QUEUE_WAIT = Histogram("astar_llm_queue_wait_seconds", "Time LLM requests waited for a provider slot.")
+LLM_CALL_RETRIES = Counter("astar_llm_call_retries_total", "Provider calls retried, by provider and error class.")
+LLM_HEDGES = Counter("astar_llm_hedges_total", "Hedged duplicate requests sent, and which target answered.")
+LLM_FAILOVERS = Counter("astar_llm_failovers_total", "Requests failed over to a fallback target.")
+CIRCUIT_OPENED = Counter("astar_circuit_opened_total", "Times a provider/model circuit breaker opened.")
+LLM_REPAIRS = Counter("astar_llm_repairs_total", "Targeted re-requests for invalid parts of a response.")
+STORAGE_DURATION = Histogram("astar_storage_operation_seconds", "Latency of storage operations.",
+                             buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1))
+JOB_QUEUE_DEPTH = Gauge("astar_job_queue_depth", "Pipeline jobs waiting for a worker.")
+JOBS_RUNNING = Gauge("astar_jobs_running", "Pipeline jobs currently running.")
+
+def render_metrics() -> str:
+    """Renders every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+class RunTimings:
+    """
+    Per-stage measurements for one pipeline run, reported on its
+    agent_done events. LLM calls are attributed to the agent that made
+    them, so overlapping stages (streamed curriculum plus resources) are
+    still accounted separately.
+    """
+
+    def __init__(self):
+        self._stages: dict[str, dict] = {}
+        self._started: dict[str, float] = {}
+
+    def _stage(self, agent: str) -> dict:
+        return self._stages.setdefault(agent, {
+            "wall_ms": 0, "ttft_ms": None, "llm_calls": 0, "cache_hits": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "retries": 0
+        })
+
+    def start(self, agent: str):
+        self._started[agent] = time.perf_counter()
+        self._stage(agent)
+
+    def finish(self, agent: str) -> dict:
+        """Records the stage's wall time and returns its measurements."""
+        elapsed = time.perf_counter() - self._started.pop(agent, time.perf_counter())
+        AGENT_DURATION.observe(elapsed, agent=agent)
+        stage = self._stage(agent)
+        stage["wall_ms"] = round(elapsed * 1000, 1)
+        return dict(stage)
+
+_current_run: contextvars.ContextVar[Optional[RunTimings]] = contextvars.ContextVar("run_timings", default=None)
+
+def begin_run() -> RunTimings:
+    """
+    Starts collecting timings for the current pipeline run. Tasks spawned
+    afterwards inherit the context and report into the same RunTimings.
+    """
+    timings = RunTimings()
+    _current_run.set(timings)
+    return timings
+
+def record_llm_call(agent: str, started: float, usage=None, ttft: float = None):
+    """
+    Records one completed LLM request.
+
+    Args:
+        agent: Name of the calling agent.
+        started: perf_counter() value taken just before the request.
+        usage: The response's `usage` object, if the provider returned one.
+        ttft: Seconds to the first streamed token, for streamed requests.
+    """
+    LLM_REQUEST_DURATION.observe(time.perf_counter() - started, agent=agent)
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, agent=agent, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, agent=agent, kind="completion")
+    if ttft is not None:
+        LLM_TTFT.observe(ttft, agent=agent)
+
+    run = _current_run.get()
+    if run is not None:
+        stage = run._stage(agent)
+        stage["llm_calls"] += 1
+        stage["prompt_tokens"] += prompt_tokens
+        stage["completion_tokens"] += completion_tokens
+        if ttft is not None and stage["ttft_ms"] is None:
+            stage["ttft_ms"] = round(ttft * 1000, 1)
+
+def record_cache_hit(agent: str):
+    LLM_CACHE_HITS.inc(agent=agent)
+    run = _current_run.get()
+    if run is not None:
+        run._stage(agent)["cache_hits"] += 1
+
+def record_retry(agent: str):
+    AGENT_RETRIES.inc(agent=agent)
+    run = _current_run.get()
+    if run is not None:
+        run._stage(agent)["retries"] += 1
@@ -0,0 +1,118 @@
+import contextvars
+import email.utils
+import logging
+import os
+import random
+import time
+from typing import Optional
+
+import openai
+from pydantic import ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Error classes used to decide whether and how to retry
+RATE_LIMITED = "rate_limited"
+TRANSIENT = "transient"
+INVALID_OUTPUT = "invalid_output"
+CIRCUIT_OPEN = "circuit_open"
+FATAL = "fatal"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider/model whose circuit breaker is open."""
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Circuit open for {key}; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+class DeadlineExceeded(Exception):
+    """Raised when the pipeline deadline leaves no time for another attempt."""
+
+# Failures on the way to or from the provider that may well succeed on a retry.
+# openai.APITimeoutError is an APIConnectionError.
+TRANSIENT_ERRORS = (openai.APIConnectionError, openai.InternalServerError, TimeoutError, ConnectionError)
+
+def classify_error(error: BaseException) -> str:
+    """
+    Maps an exception from an agent or LLM call to one of the error classes
+    above. Anything not known to be retryable is FATAL, so programming
+    errors surface at once instead of being retried.
+    """
+    if isinstance(error, CircuitOpenError):
+        return CIRCUIT_OPEN
+    if isinstance(error, DeadlineExceeded):
+        return FATAL
+    if isinstance(error, openai.RateLimitError):
+        return RATE_LIMITED
+    if isinstance(error, TRANSIENT_ERRORS):
+        return TRANSIENT
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code in (408, 409, 425, 429) or error.status_code >= 500:
+            return RATE_LIMITED if error.status_code == 429 else TRANSIENT
+        # Auth, permission, not found and malformed requests will not fix themselves
+        return FATAL
+    # Unparseable or schema-violating model output (json.JSONDecodeError is a ValueError)
+    if isinstance(error, (ValidationError, ValueError)):
+        return INVALID_OUTPUT
+    return FATAL
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Reads the server's requested wait from Retry-After(-ms) headers, if any."""
+    if isinstance(error, CircuitOpenError):
+        return error.retry_after
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value) if value else None
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, so that pipelines throttled at the
+    same moment do not all retry in lockstep.
+    """
+
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls, prefix: str, max_retries: int, base_delay: float, max_delay: float) -> "RetryPolicy":
+        """Reads <prefix>_MAX_RETRIES, <prefix>_BASE_DELAY and <prefix>_MAX_DELAY."""
+        return cls(
+            int(os.getenv(f"{prefix}_MAX_RETRIES", max_retries)),
+            float(os.getenv(f"{prefix}_BASE_DELAY", base_delay)),
+            float(os.getenv(f"{prefix}_MAX_DELAY", max_delay)),
+        )
+
+    def delay(self, attempt: int, error: BaseException = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        requested = retry_after_seconds(error) if error is not None else None
+        if requested is not None:
+            # Honour the server, plus a little jitter to spread the herd
+            return requested + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("pipeline_deadline", default=None)
+
+def set_deadline(seconds: Optional[float]):
+    """Sets the pipeline deadline for the current context and tasks spawned from it."""
+    _deadline.set(time.monotonic() + seconds if seconds else None)
+
+def time_left() -> Optional[float]:
+    """Seconds until the pipeline deadline, or None when there is none."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
@@ -0,0 +1,46 @@
+import json
+
+from storage.topic_cache import normalize_topic
+
+def topic_signature(topic: dict) -> str:
+    """
+    Identity of a topic for reusing its resources: the normalized name and
+    subtopics. Rewording the summary does not count as a change.
+    """
+    return json.dumps([
+        normalize_topic(topic.get("name")),
+        [normalize_topic(s) for s in topic.get("subtopics") or []]
+    ])
+
+def _phase_signature(phase: dict) -> str:
+    return json.dumps([
+        (phase.get("title") or "").strip().lower(),
+        [topic_signature(t) for t in phase.get("topics", [])]
+    ])
+
+def reusable_resources(phases: list[dict]) -> dict[str, list]:
+    """Maps the signature of every topic that has resources to those resources."""
+    return {
+        topic_signature(t): t["resources"]
+        for p in phases for t in p.get("topics", []) if t.get("resources")
+    }
+
+def diff_curriculum(old_phases: list[dict], new_phases: list[dict]) -> dict:
+    """
+    Compares a regenerated curriculum with the stored one.
+
+    Returns:
+        Counts of unchanged phases and of topics whose resources carry over
+        (wherever they moved to), and the share of topics reused.
+    """
+    reusable = reusable_resources(old_phases)
+    old_phase_signatures = {_phase_signature(p) for p in old_phases}
+    topics = [t for p in new_phases for t in p.get("topics", [])]
+    reused = sum(1 for t in topics if topic_signature(t) in reusable)
+    return {
+        "phases_unchanged": sum(1 for p in new_phases if _phase_signature(p) in old_phase_signatures),
+        "phases_total": len(new_phases),
+        "topics_reused": reused,
+        "topics_total": len(topics),
+        "reuse_ratio": round(reused / len(topics), 3) if topics else 0.0
+    }
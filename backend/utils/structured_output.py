@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import re
+import time
+from typing import Type
+
+from openai import BadRequestError
+from pydantic import BaseModel, ValidationError
+
+from utils.metrics import record_llm_call, LLM_REPAIRS
+
+logger = logging.getLogger(__name__)
+
+# (base_url, model) pairs whose provider rejected json_schema response formats
+_SCHEMA_UNSUPPORTED: set[tuple[str, str]] = set()
+
+def extract_json(content: str) -> dict:
+    """
+    Parses the JSON object in a model response.
+
+    Tolerates a leading <think> block, markdown fences and prose around the
+    object, since not every model honours the requested response format.
+
+    Raises:
+        ValueError: If the response holds no parseable JSON object.
+    """
+    if not content or not content.strip():
+        raise ValueError("Empty response from model")
+    text = content.split("</think>")[-1].strip()
+    fence = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if fence:
+        text = fence.group(1).strip()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        start = text.find("{")
+        if start < 0:
+            raise ValueError("No JSON object in model response")
+        try:
+            data, _ = json.JSONDecoder().raw_decode(text[start:])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Malformed JSON in model response: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("Model response is not a JSON object")
+    return data
+
+def json_schema_for(model: Type[BaseModel], fields: set[str] = None) -> dict:
+    """Builds the JSON Schema for a Pydantic model, optionally limited to some fields."""
+    schema = model.model_json_schema()
+    if fields:
+        schema["properties"] = {k: v for k, v in schema["properties"].items() if k in fields}
+        schema["required"] = [k for k in schema.get("required", []) if k in fields]
+    return schema
+
+def describe_errors(error: ValidationError) -> str:
+    """Flattens a ValidationError into a short message a model can act on."""
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc']) or 'root'}: {e['msg']}" for e in error.errors())
+
+async def create_structured(client, model_name: str, schema_name: str, schema: dict, **kwargs):
+    """
+    Requests a completion constrained to a JSON Schema.
+
+    Falls back to plain JSON mode when the provider rejects json_schema
+    response formats, and remembers that per provider/model. Set
+    STRUCTURED_OUTPUT=json_object to always use JSON mode.
+    """
+    key = (str(getattr(client, "base_url", "")), model_name)
+    if os.getenv("STRUCTURED_OUTPUT", "json_schema").lower() == "json_schema" and key not in _SCHEMA_UNSUPPORTED:
+        try:
+            return await client.chat.completions.create(
+                model=model_name,
+                response_format={"type": "json_schema", "json_schema": {"name": schema_name, "schema": schema}},
+                **kwargs
+            )
+        except BadRequestError as e:
+            logger.warning(f"json_schema output rejected for {model_name}, retrying in JSON mode: {e}")
+            response = await client.chat.completions.create(
+                model=model_name, response_format={"type": "json_object"}, **kwargs
+            )
+            _SCHEMA_UNSUPPORTED.add(key)
+            return response
+    return await client.chat.completions.create(model=model_name, response_format={"type": "json_object"}, **kwargs)
+
+async def repair_object(client, model_name: str, agent: str, system_prompt: str, user_message: str,
+                        model: Type[BaseModel], broken, error: str, label: str,
+                        max_tokens: int = 2000, attempts: int = None) -> dict:
+    """
+    Re-requests a single invalid object (e.g. one phase or topic) with the
+    validation error attached, instead of regenerating the whole response.
+
+    Args:
+        agent: Agent name used for metrics.
+        system_prompt, user_message: The original request, for context.
+        model: Pydantic model the repaired object must satisfy.
+        broken: The invalid object as returned by the model.
+        error: Description of what failed validation.
+        label: How the object is referred to in the prompt, e.g. "phase 2".
+        attempts: Repair requests to make; defaults to LLM_REPAIR_ATTEMPTS (1).
+
+    Returns:
+        The repaired object as a validated dictionary.
+
+    Raises:
+        ValueError: If no attempt produced a valid object.
+    """
+    attempts = attempts if attempts is not None else int(os.getenv("LLM_REPAIR_ATTEMPTS", 1))
+    schema = json_schema_for(model)
+    for attempt in range(attempts):
+        LLM_REPAIRS.inc(agent=agent, target=model.__name__.lower())
+        logger.info(f"Repairing {label} (attempt {attempt + 1}): {error}")
+        started = time.perf_counter()
+        response = await create_structured(
+            client, model_name, model.__name__, schema,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message},
+                {"role": "user", "content": (
+                    f"Your previous answer contained an invalid {label}:\n{json.dumps(broken)}\n\n"
+                    f"Validation errors: {error}\n\n"
+                    f"Return ONLY the corrected {label} as a single JSON object."
+                )}
+            ],
+            max_tokens=max_tokens
+        )
+        record_llm_call(agent, started, getattr(response, "usage", None))
+        try:
+            data = extract_json(response.choices[0].message.content)
+            model(**data)
+            return data
+        except ValidationError as e:
+            error = describe_errors(e)
+        except ValueError as e:
+            error = str(e)
+    raise ValueError(f"Could not repair {label}: {error}")
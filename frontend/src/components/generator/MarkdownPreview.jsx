@@ -0,0 +1,28 @@
+import React, { useEffect, useRef } from 'react'
+
+/**
+ * MarkdownPreview Component
+ * Shows the Formatter agent's markdown as it streams in, kept scrolled to
+ * the latest output. Renders nothing until the first token arrives.
+ */
+export const MarkdownPreview = ({ text }) => {
+  const scrollRef = useRef(null)
+
+  useEffect(() => {
+    if (scrollRef.current) scrollRef.current.scrollTop = scrollRef.current.scrollHeight
+  }, [text])
+
+  if (!text) return null
+
+  return (
+    <div className="mt-8 bg-slate-900 border border-slate-800 rounded-xl p-4 animate-in fade-in duration-500">
+      <p className="text-xs font-semibold uppercase tracking-wider text-slate-500 mb-2">Formatting</p>
+      <pre
+        ref={scrollRef}
+        className="max-h-64 overflow-y-auto whitespace-pre-wrap font-mono text-xs text-slate-300"
+      >
+        {text}
+      </pre>
+    </div>
+  )
+}
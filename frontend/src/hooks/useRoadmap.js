@@ -29,6 +29,22 @@ export const useRoadmapsList = () => {
   })
 }
 
+/**
+ * Full-text search over the library. Disabled for blank queries.
+ */
+export const useSearchRoadmaps = (query) => {
+  const q = query.trim()
+  return useQuery({
+    queryKey: ['roadmaps', 'search', q],
+    queryFn: async () => {
+      const response = await api.get('/roadmaps/search', { params: { q } })
+      return response.data
+    },
+    enabled: q.length > 0,
+    placeholderData: (previous) => previous
+  })
+}
+
 /**
  * Mutation hook to delete a roadmap and refresh the library list.
  */
@@ -5,6 +5,11 @@ import { useQueryClient } from '@tanstack/react-query'
 export const useRoadmapStream = (roadmapId, feedback, feedbackType) => {
   const [isStreaming, setIsStreaming] = useState(false)
   const [error, setError] = useState(null)
+  // Partial results streamed before the pipeline completes
+  const [partialPhases, setPartialPhases] = useState([])
+  const [markdownPreview, setMarkdownPreview] = useState('')
+  // How much of the previous roadmap a refinement kept
+  const [reuse, setReuse] = useState(null)
   const setAgentStatus = useRoadmapStore((state) => state.setAgentStatus)
   const queryClient = useQueryClient()
 
@@ -13,6 +18,9 @@ export const useRoadmapStream = (roadmapId, feedback, feedbackType) => {
 
     setIsStreaming(true)
     setError(null)
+    setPartialPhases([])
+    setMarkdownPreview('')
+    setReuse(null)
 
     let url = `/api/roadmaps/${roadmapId}/stream`
     const params = new URLSearchParams()
@@ -41,6 +49,25 @@ export const useRoadmapStream = (roadmapId, feedback, feedbackType) => {
           case 'agent_done':
             if (data.agent) setAgentStatus(data.agent, 'done')
             break
+          case 'phase_ready':
+            setPartialPhases((phases) => {
+              const next = [...phases]
+              next[data.index] = data.phase
+              return next
+            })
+            break
+          case 'topic_resources':
+            setPartialPhases((phases) => phases.map((phase, index) => index !== data.phase_index ? phase : {
+              ...phase,
+              topics: phase.topics.map((topic) => topic.name === data.topic ? { ...topic, resources: data.resources } : topic)
+            }))
+            break
+          case 'reuse':
+            setReuse(data)
+            break
+          case 'token':
+            if (data.agent === 'formatter') setMarkdownPreview((text) => text + data.delta)
+            break
           case 'agent_error':
             if (data.agent) setAgentStatus(data.agent, 'error')
             break
@@ -88,5 +115,5 @@ export const useRoadmapStream = (roadmapId, feedback, feedbackType) => {
     return cleanup
   }, [startStream])
 
-  return { isStreaming, error }
+  return { isStreaming, error, partialPhases, markdownPreview, reuse }
 }
@@ -2,6 +2,7 @@ import React, { useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
 import { PageShell } from '../components/layout/PageShell'
 import { AgentProgress } from '../components/generator/AgentProgress'
+import { MarkdownPreview } from '../components/generator/MarkdownPreview'
 import { useRoadmapStream } from '../hooks/useRoadmapStream'
 import { useRoadmapStore } from '../store/useRoadmapStore'
 import { AlertCircle } from 'lucide-react'
@@ -17,7 +18,7 @@ export const Generate = () => {
   const navigate = useNavigate()
   
   // Connect to the Server-Sent Events stream for generation updates
-  const { error } = useRoadmapStream(roadmapId || null)
+  const { error, partialPhases, markdownPreview } = useRoadmapStream(roadmapId || null)
   
   // Access global state for agent statuses (Analyst, Curriculum, etc.)
   const agentStatuses = useRoadmapStore((state) => state.agentStatuses)
@@ -54,6 +55,31 @@ export const Generate = () => {
         <div className="bg-slate-900 border border-slate-800 rounded-2xl p-8 shadow-2xl">
           <AgentProgress />
         </div>
+
+        {/* Phases render as soon as the curriculum streams them in */}
+        {partialPhases.length > 0 && (
+          <div className="mt-8 space-y-3">
+            {partialPhases.filter(Boolean).map((phase) => {
+              const enriched = phase.topics.filter((topic) => topic.resources?.length > 0).length
+              return (
+                <div key={phase.phase_number} className="bg-slate-900 border border-slate-800 rounded-xl p-4 animate-in fade-in duration-500">
+                  <div className="flex items-center justify-between">
+                    <h3 className="font-semibold text-slate-200">{phase.title}</h3>
+                    <span className="text-xs text-slate-500">{phase.week_range}</span>
+                  </div>
+                  <p className="text-sm text-slate-400 mt-1">
+                    {phase.topics.map((topic) => topic.name).join(' · ')}
+                  </p>
+                  <p className="text-xs text-slate-600 mt-2">
+                    Resources ready for {enriched}/{phase.topics.length} topics
+                  </p>
+                </div>
+              )
+            })}
+          </div>
+        )}
+
+        <MarkdownPreview text={markdownPreview} />
       </div>
     </PageShell>
   )
@@ -1,10 +1,10 @@
-import React from 'react'
+import React, { useEffect, useState } from 'react'
 import { Link } from 'react-router-dom'
 import { PageShell } from '../components/layout/PageShell'
-import { useRoadmapsList, useDeleteRoadmap } from '../hooks/useRoadmap'
+import { useRoadmapsList, useDeleteRoadmap, useSearchRoadmaps } from '../hooks/useRoadmap'
 import { Card } from '../components/ui/Card'
 import { Badge } from '../components/ui/Badge'
-import { Calendar, Layers, ArrowRight, Trash2 } from 'lucide-react'
+import { Calendar, Layers, ArrowRight, Trash2, Search } from 'lucide-react'
 import { Spinner } from '../components/ui/Spinner'
 
 /**
@@ -13,7 +13,19 @@ import { Spinner } from '../components/ui/Spinner'
  * to view details or delete them.
  */
 export const MyRoadmaps = () => {
-  const { data: roadmaps, isLoading } = useRoadmapsList()
+  const { data: allRoadmaps, isLoading } = useRoadmapsList()
+  const [query, setQuery] = useState('')
+  const [debouncedQuery, setDebouncedQuery] = useState('')
+  const { data: searchResults } = useSearchRoadmaps(debouncedQuery)
+
+  // Wait for a pause in typing before querying the search endpoint
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedQuery(query), 250)
+    return () => clearTimeout(timer)
+  }, [query])
+
+  const searching = debouncedQuery.trim().length > 0
+  const roadmaps = searching ? searchResults?.items : allRoadmaps
 
   if (isLoading) {
     return (
@@ -31,6 +43,16 @@ export const MyRoadmaps = () => {
         <div className="mb-12">
           <h1 className="text-3xl font-bold font-sora text-slate-100 mb-2">My Roadmaps</h1>
           <p className="text-slate-400">Manage all your personalized learning paths in one place.</p>
+          <div className="relative mt-6 max-w-md">
+            <Search className="w-4 h-4 text-slate-500 absolute left-4 top-1/2 -translate-y-1/2" />
+            <input
+              type="search"
+              value={query}
+              onChange={(e) => setQuery(e.target.value)}
+              placeholder="Search titles, topics, resources..."
+              className="w-full bg-slate-900 border border-slate-800 rounded-xl pl-11 pr-4 py-3 text-slate-200 placeholder-slate-500 focus:outline-none focus:border-teal-500"
+            />
+          </div>
         </div>
 
         {roadmaps && roadmaps.length > 0 ? (
@@ -39,6 +61,8 @@ export const MyRoadmaps = () => {
               <RoadmapItemCard key={roadmap.id} roadmap={roadmap} />
             ))}
           </div>
+        ) : searching ? (
+          <p className="text-slate-500 text-center py-20">No roadmaps match "{debouncedQuery.trim()}".</p>
         ) : (
           <EmptyState />
         )}
@@ -6,6 +6,7 @@ import { PhaseCard } from '../components/roadmap/PhaseCard'
 import { ProgressBar } from '../components/roadmap/ProgressBar'
 import { RefinePanel } from '../components/roadmap/RefinePanel'
 import { AgentProgress } from '../components/generator/AgentProgress'
+import { MarkdownPreview } from '../components/generator/MarkdownPreview'
 import { useRoadmap } from '../hooks/useRoadmap'
 import { useProgress } from '../hooks/useProgress'
 import { useRefine } from '../hooks/useRefine'
@@ -29,7 +30,7 @@ export const Roadmap = () => {
   const [activeFeedback, setActiveFeedback] = useState(undefined)
   const [activeFeedbackType, setActiveFeedbackType] = useState(undefined)
   
-  const { isStreaming } = useRoadmapStream(
+  const { isStreaming, reuse, markdownPreview } = useRoadmapStream(
     activeFeedback ? (roadmapId || null) : null,
     activeFeedback,
     activeFeedbackType
@@ -80,10 +81,16 @@ export const Roadmap = () => {
             <div className="text-center mb-12">
               <h2 className="text-2xl font-bold font-sora text-slate-100 mb-2">Refining Your Roadmap</h2>
               <p className="text-slate-400">Updating modules based on your feedback...</p>
+              {reuse && reuse.topics_total > 0 && (
+                <p className="text-sm text-teal-400 mt-2">
+                  Keeping resources for {reuse.topics_reused} of {reuse.topics_total} topics
+                </p>
+              )}
             </div>
             <div className="bg-slate-900 border border-slate-800 rounded-2xl p-8 shadow-2xl">
               <AgentProgress />
             </div>
+            <MarkdownPreview text={markdownPreview} />
           </div>
         </div>
       )}